@@ -12,6 +12,10 @@ def create_app(config_class=Config):
     # Définir l'URI de la base de données pour utiliser le dossier 'instance'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or f'sqlite:///{os.path.join(app.instance_path, "digimarket.db")}'
 
+    # Un bind par shard de commandes (doit précéder db.init_app)
+    from .orders.sharding import configure_shards
+    configure_shards(app)
+
     # Initialiser les extensions Flask
     db.init_app(app)
     bcrypt.init_app(app)
@@ -49,12 +53,86 @@ def create_app(config_class=Config):
     app.register_blueprint(orders_bp, url_prefix='/api/orders')
     from .categories.routes import categories_bp
     app.register_blueprint(categories_bp, url_prefix='/api/categories')
+    from .monitoring.routes import monitoring_bp
+    app.register_blueprint(monitoring_bp, url_prefix='/api/monitoring')
+    from .analytics.routes import analytics_bp
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
 
     # Importer les modèles pour que les migrations les détectent
     from . import models
 
+    # Journal des changements du catalogue (produits et catégories)
+    from .changefeed import register_listeners
+    register_listeners()
+
+    # Regroupement des lectures identiques simultanées du catalogue
+    from .singleflight import SingleFlight
+    app.extensions['singleflight'] = SingleFlight()
+
+    # Cache des réponses encodées du détail produit, borné en octets par worker
+    from .cache import ResponseCache
+    app.extensions['product_cache'] = ResponseCache(max_bytes=app.config['PRODUCT_CACHE_MAX_BYTES'])
+
+    # Facettes sans filtre de la liste de produits, gardées quelques secondes
+    from .products.facets import FacetCache
+    app.extensions['facet_cache'] = FacetCache(ttl=app.config['FACETS_CACHE_TTL'])
+
+    # Index en mémoire de l'autocomplétion (construit à la première suggestion du worker)
+    from .products.suggest import SuggestIndex
+    app.extensions['suggest_index'] = SuggestIndex(max_results=app.config['SUGGEST_MAX_RESULTS'])
+
+    # Recommandations « souvent achetés ensemble », prêtes à servir
+    from .products.related import RelatedCache
+    app.extensions['related_cache'] = RelatedCache(ttl=app.config['RELATED_CACHE_TTL'])
+
+    # Group commit des créations de commandes (si ORDER_GROUP_COMMIT_ENABLED)
+    from .orders.group_commit import GroupCommitter
+    app.extensions['order_committer'] = GroupCommitter(
+        window=app.config['ORDER_GROUP_COMMIT_WINDOW_MS'] / 1000,
+        max_batch=app.config['ORDER_GROUP_COMMIT_MAX_BATCH']
+    )
+
+    # Instantané du stock partagé entre les workers de l'hôte (si STOCK_SNAPSHOT_PATH)
+    if app.config['STOCK_SNAPSHOT_PATH']:
+        from .stock_snapshot import StockSnapshot
+        app.extensions['stock_snapshot'] = StockSnapshot(
+            path=app.config['STOCK_SNAPSHOT_PATH'],
+            capacity=app.config['STOCK_SNAPSHOT_CAPACITY']
+        )
+
+    # Contrôle d'admission : concurrence bornée par classe de routes, 503 rapide au-delà
+    from .admission import init_admission
+    init_admission(app)
+
+    # Compression gzip/deflate des réponses volumineuses
+    from .compression import init_compression
+    init_compression(app)
+
+    # Diffusion SSE des changements de stock et de prix (un thread de scrutation par worker)
+    from .streaming import StockBroker
+    app.extensions['stock_broker'] = StockBroker(
+        buffer_size=app.config['STOCK_STREAM_BUFFER_SIZE'],
+        poll_interval=app.config['STOCK_STREAM_POLL_INTERVAL']
+    )
+
+    # État du préchauffage du worker (gunicorn.conf.py), exposé par la route de disponibilité
+    from .warmup import WarmupState
+    app.extensions['warmup'] = WarmupState()
+
     # Importer et enregistrer les commandes CLI
-    from .commands import seed
+    from .commands import (seed, import_products_command, prune_catalog_changes, rebuild_related_products,
+                           rebuild_sales_rollups, reconcile_order_stats, archive_orders_command, init_order_shards,
+                           process_order_queue, rebalance_stock_stripes, stock_snapshot_command)
     app.cli.add_command(seed)
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(prune_catalog_changes)
+    app.cli.add_command(rebuild_related_products)
+    app.cli.add_command(rebuild_sales_rollups)
+    app.cli.add_command(reconcile_order_stats)
+    app.cli.add_command(archive_orders_command)
+    app.cli.add_command(init_order_shards)
+    app.cli.add_command(process_order_queue)
+    app.cli.add_command(rebalance_stock_stripes)
+    app.cli.add_command(stock_snapshot_command)
 
     return app
@@ -0,0 +1,123 @@
+import threading
+import time
+from flask import current_app, g, jsonify, request
+
+# Unités de X-Request-Start par ordre de grandeur d'un horodatage Unix actuel (~1,7e9 s) :
+# (borne supérieure exclue, diviseur vers les secondes) pour les secondes, millisecondes, microsecondes, nanosecondes
+UNIT_RANGES = ((1e11, 1), (1e14, 1e3), (1e17, 1e6), (1e20, 1e9))
+
+
+class RouteClass:
+    """Limite de concurrence d'une classe de routes : `limit` requêtes à la fois, attente d'une place bornée à `max_wait` s."""
+
+    def __init__(self, name, limit, max_wait):
+        self.name = name
+        self.limit = limit
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'shed': 0, 'expired': 0, 'in_flight': 0, 'peak': 0}
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.max_wait):
+            with self._lock:
+                self.stats['shed'] += 1
+            return False
+        with self._lock:
+            self.stats['admitted'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['peak'] = max(self.stats['peak'], self.stats['in_flight'])
+        return True
+
+    def expire(self):
+        with self._lock:
+            self.stats['expired'] += 1
+
+    def release(self):
+        with self._lock:
+            self.stats['in_flight'] -= 1
+        self._slots.release()
+
+    def info(self):
+        with self._lock:
+            return {'limit': self.limit, 'max_wait_ms': self.max_wait * 1000, **self.stats}
+
+
+class AdmissionController:
+    """Contrôle d'admission par classe de routes (blueprint, ou endpoint pour une exception).
+
+    Les routes sans classe (catalogue, supervision) ne sont jamais limitées. Une requête d'une
+    classe saturée attend une place au plus `max_wait`, puis reçoit aussitôt un 503 : elle ne
+    s'accumule pas dans le worker jusqu'à l'expiration côté client.
+    """
+
+    def __init__(self, limits, max_queue_age=0, retry_after=1):
+        self.classes = {name: RouteClass(name, limit, max_wait_ms / 1000) for name, (limit, max_wait_ms) in limits.items()}
+        self.max_queue_age = max_queue_age
+        self.retry_after = retry_after
+
+    def route_class(self, endpoint, blueprint):
+        return self.classes.get(endpoint) or self.classes.get(blueprint)
+
+    def queue_age(self):
+        """Temps passé (s) avant le worker, d'après l'en-tête X-Request-Start du proxy (`t=<horodatage>`).
+
+        L'unité est déduite de l'ordre de grandeur : nginx donne des secondes (avec millisecondes),
+        Heroku des millisecondes, Apache et HAProxy des microsecondes.
+        """
+        value = request.headers.get('X-Request-Start', '').removeprefix('t=')
+        try:
+            started = float(value)
+        except ValueError:
+            return None
+        for limit, divisor in UNIT_RANGES:
+            if started < limit:
+                return time.time() - started / divisor
+        return None
+
+    def info(self):
+        return {name: route_class.info() for name, route_class in self.classes.items()}
+
+
+def _shed():
+    response = jsonify({"message": "Service momentanément surchargé, réessayez dans un instant."})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(current_app.extensions['admission'].retry_after)
+    return response
+
+
+def admit_request():
+    """Hook before_request : réserve une place dans la classe de la route, ou refuse la requête (503)."""
+    controller = current_app.extensions['admission']
+    route_class = controller.route_class(request.endpoint, request.blueprint)
+    if route_class is None:
+        return None
+    if controller.max_queue_age:
+        age = controller.queue_age()
+        if age is not None and age > controller.max_queue_age:
+            # Le client a probablement déjà abandonné : inutile de faire le travail
+            route_class.expire()
+            return _shed()
+    if not route_class.acquire():
+        return _shed()
+    g.admission_class = route_class
+    return None
+
+
+def release_request(exc=None):
+    """Hook teardown_request : libère la place réservée par la requête."""
+    route_class = g.pop('admission_class', None)
+    if route_class is not None:
+        route_class.release()
+
+
+def init_admission(app):
+    """Active le contrôle d'admission (si ADMISSION_CONTROL_ENABLED)."""
+    app.extensions['admission'] = AdmissionController(
+        limits=app.config['ADMISSION_LIMITS'],
+        max_queue_age=app.config['ADMISSION_MAX_QUEUE_AGE_MS'] / 1000,
+        retry_after=app.config['ADMISSION_RETRY_AFTER']
+    )
+    if app.config['ADMISSION_CONTROL_ENABLED']:
+        app.before_request(admit_request)
+        app.teardown_request(release_request)
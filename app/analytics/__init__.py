@@ -0,0 +1 @@
+# This file makes the 'analytics' directory a Python package. It can be empty.
\ No newline at end of file
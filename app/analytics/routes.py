@@ -0,0 +1,73 @@
+from datetime import date, datetime, timedelta, timezone
+from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import func, select
+from ..models import Category, Product, SalesRollup
+from ..extensions import db
+from ..decorators import admin_required
+
+analytics_bp = Blueprint('analytics', __name__)
+
+GROUPS = ('day', 'product', 'category')
+
+
+def _period():
+    """Période demandée (paramètres 'start' et 'end', dates ISO incluses) ; 30 derniers jours par défaut."""
+    end = request.args.get('end')
+    end = date.fromisoformat(end) if end else datetime.now(timezone.utc).date()
+    start = request.args.get('start')
+    start = date.fromisoformat(start) if start else end - timedelta(days=29)
+    if start > end:
+        raise ValueError("La date de début doit précéder la date de fin")
+    return start, end
+
+
+@analytics_bp.route('/sales', methods=['GET'])
+@admin_required()
+def get_sales():
+    """Chiffre d'affaires et unités vendues sur une période, par jour, par produit ou par catégorie.
+
+    Lu dans les agrégats (sales_rollup), jamais dans les commandes.
+    """
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in GROUPS:
+        return jsonify({"message": f"Regroupement invalide. Valeurs possibles : {', '.join(GROUPS)}"}), 400
+    try:
+        start, end = _period()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    max_limit = current_app.config['ANALYTICS_MAX_ROWS']
+    limit = min(max(request.args.get('limit', max_limit, type=int), 1), max_limit)
+
+    in_period = SalesRollup.day.between(start, end)
+    units = func.sum(SalesRollup.units).label('units')
+    revenue = func.sum(SalesRollup.revenue).label('revenue')
+
+    if group_by == 'day':
+        statement = select(SalesRollup.day, units, revenue).group_by(SalesRollup.day).order_by(SalesRollup.day)
+        key = lambda row: {"day": row.day.isoformat()}
+    elif group_by == 'product':
+        statement = (
+            select(SalesRollup.product_id, Product.name, units, revenue)
+            .outerjoin(Product, Product.id == SalesRollup.product_id)
+            .group_by(SalesRollup.product_id, Product.name)
+            .order_by(revenue.desc(), SalesRollup.product_id)
+        )
+        key = lambda row: {"product_id": row.product_id, "name": row.name}
+    else:
+        statement = (
+            select(SalesRollup.category_id, Category.name, units, revenue)
+            .outerjoin(Category, Category.id == SalesRollup.category_id)
+            .group_by(SalesRollup.category_id, Category.name)
+            .order_by(revenue.desc(), SalesRollup.category_id)
+        )
+        key = lambda row: {"category_id": row.category_id, "name": row.name}
+
+    rows = db.session.execute(statement.where(in_period).limit(limit)).all()
+    totals = db.session.execute(select(units, revenue).where(in_period)).one()
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": group_by,
+        "totals": {"units": totals.units or 0, "revenue": round(totals.revenue or 0.0, 2)},
+        "rows": [dict(key(row), units=row.units, revenue=round(row.revenue, 2)) for row in rows]
+    }), 200
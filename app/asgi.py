@@ -0,0 +1,368 @@
+import asyncio
+import math
+import re
+from urllib.parse import parse_qsl
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, lazyload, selectinload, undefer
+from a2wsgi import WSGIMiddleware
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header
+from config import Config
+from . import create_app
+from .models import Category, Product
+from .compression import ENCODINGS, compress, compress_cached
+from .streaming import format_sse, read_snapshot
+from .warmup import warm_worker
+from .categories.routes import serialize_category
+from .categories.tree import ancestors_statement, subtree_ids
+from .products.routes import serialize_product, serialize_products
+from .products.availability import snapshot_stock
+from .products.listing import product_filters, listing_statement, keyset_condition, encode_cursor
+
+# Pilotes asynchrones substitués aux pilotes synchrones de l'URL de la base
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_database_url(url):
+    """URL de la base pour le moteur asynchrone : même base, pilote asynchrone."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de pilote asynchrone connu pour la base '{backend}'")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError("Une base SQLite en mémoire ne peut pas être partagée avec le moteur asynchrone")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class Reply:
+    """Réponse JSON d'une lecture asynchrone, avant la négociation de la compression."""
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+
+
+# --- Lectures asynchrones du catalogue ---
+# Chaque lecture retourne une Reply, ou None pour confier la requête à l'application Flask
+# (erreurs 400/404, facettes) : les réponses restent celles des routes des blueprints.
+
+async def get_products(service, session, args):
+    """Liste des produits (pages numérotées ou curseur) et récupération groupée par IDs."""
+    if args.get('ids'):
+        return await get_products_by_ids(service, session, args['ids'])
+    if args.get('facets'):
+        # Agrégations et cache des facettes synchrones : servies par l'application Flask
+        return None
+
+    try:
+        category_id = args.get('category_id', type=int)
+        category_ids = (await session.scalars(subtree_ids(category_id))).all() if category_id else None
+        conditions = product_filters(args, category_ids)
+        sort = args.get('sort')
+        statement = listing_statement(conditions, sort)
+        cursor = args.get('cursor')
+        if cursor:
+            statement = statement.where(keyset_condition(cursor, sort))
+    except ValueError:
+        return None
+
+    per_page = args.get('per_page', 10, type=int)
+    if cursor is not None:
+        per_page = max(per_page, 1)
+        products = (await session.scalars(statement.limit(per_page + 1))).all()
+        has_more = len(products) > per_page
+        products = products[:per_page]
+        response = {
+            "products": serialize_products(products, service.snapshot),
+            "next_cursor": encode_cursor(products[-1], sort) if has_more else None
+        }
+    else:
+        # Mêmes règles que db.paginate(error_out=False)
+        page = args.get('page', 1, type=int)
+        page = page if page >= 1 else 1
+        per_page = per_page if per_page >= 1 else 20
+        products = (await session.scalars(statement.limit(per_page).offset((page - 1) * per_page))).unique().all()
+        total = await session.scalar(
+            select(func.count()).select_from(statement.options(lazyload('*')).order_by(None).subquery())
+        )
+        pages = math.ceil(total / per_page) if total else 0
+        response = {
+            "products": serialize_products(products, service.snapshot),
+            "total": total,
+            "pages": pages,
+            "current_page": page,
+            "next_page": page + 1 if page < pages else None,
+            "prev_page": page - 1 if page > 1 else None
+        }
+    return Reply(service.json(response))
+
+
+async def get_products_by_ids(service, session, raw_ids):
+    """Plusieurs produits en une seule requête indexée, dans l'ordre demandé."""
+    try:
+        ids = list(dict.fromkeys(int(product_id) for product_id in raw_ids.split(',') if product_id.strip()))
+    except ValueError:
+        return None
+    if len(ids) > service.config['PRODUCT_MULTI_GET_MAX_IDS']:
+        return None
+
+    products = {
+        product.id: product
+        for product in await session.scalars(
+            select(Product).options(joinedload(Product.category), undefer(Product.available_stock))
+            .where(Product.id.in_(ids))
+        )
+    }
+    return Reply(service.json({
+        "products": serialize_products([products[product_id] for product_id in ids if product_id in products],
+                                       service.snapshot),
+        "missing": [product_id for product_id in ids if product_id not in products]
+    }))
+
+
+async def get_product(service, session, args, accept_encoding, product_id):
+    """Détail d'un produit, servi par le cache des réponses encodées partagé avec l'application Flask."""
+    cache = service.flask_app.extensions['product_cache']
+    version = (await session.execute(
+        select(Product.updated_at, Category.name, Product.available_stock)
+        .join(Product.category).where(Product.id == product_id)
+    )).first()
+    if version is None:
+        return None
+    stock = snapshot_stock(service.snapshot, [product_id]).get(product_id, version[2])
+    version = (version[0], version[1], stock)
+
+    encoding = 'gzip' if accept_encoding['gzip'] else 'identity'
+    body = cache.get(product_id, version, encoding)
+    if body is None:
+        identity = cache.get(product_id, version, 'identity')
+        if identity is None:
+            product = await session.get(Product, product_id,
+                                        options=[joinedload(Product.category), undefer(Product.available_stock)])
+            if product is None:
+                return None
+            identity = service.json(serialize_product(product, stock))
+            cache.put(product_id, version, 'identity', identity)
+        body = identity
+        if encoding == 'gzip':
+            body = compress(identity, 'gzip', service.config['COMPRESS_LEVEL'])
+            cache.put(product_id, version, 'gzip', body)
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding == 'gzip':
+        headers['Content-Encoding'] = 'gzip'
+    return Reply(body, headers)
+
+
+async def get_categories(service, session, args):
+    """Liste de toutes les catégories."""
+    categories = (await session.scalars(select(Category))).all()
+    return Reply(service.json([serialize_category(category) for category in categories]))
+
+
+async def get_category(service, session, args, category_id):
+    """Catégorie avec son fil d'Ariane et ses sous-catégories directes."""
+    category = await session.get(Category, category_id, options=[selectinload(Category.children)])
+    if category is None:
+        return None
+    data = serialize_category(category)
+    data["path"] = [{"id": c.id, "name": c.name} for c in await session.scalars(ancestors_statement(category.id))]
+    data["children"] = [{"id": c.id, "name": c.name} for c in category.children]
+    return Reply(service.json(data))
+
+
+# Routes GET servies en asynchrone ; les autres méthodes et chemins vont à l'application Flask
+ROUTES = [
+    (re.compile(r'/api/products/'), get_products, False),
+    (re.compile(r'/api/products/(\d+)'), get_product, True),
+    (re.compile(r'/api/categories/'), get_categories, False),
+    (re.compile(r'/api/categories/(\d+)'), get_category, False),
+]
+
+
+class CatalogService:
+    """Application ASGI : lectures du catalogue sur le moteur asynchrone de SQLAlchemy.
+
+    Les routes GET du catalogue (ROUTES) sont servies sans bloquer de thread pendant les
+    lectures ; toute autre requête est confiée à l'application Flask, exécutée dans un pool
+    de threads. Les deux partagent la configuration, les modèles et les caches de réponses.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.snapshot = flask_app.extensions.get('stock_snapshot')
+        url = self.config['ASYNC_DATABASE_URL'] or async_database_url(self.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(url, pool_size=self.config['ASYNC_POOL_SIZE'])
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.wsgi = WSGIMiddleware(flask_app, workers=self.config['ASGI_WSGI_THREADS'])
+        self._flights = {}
+
+    def json(self, data):
+        """Corps JSON identique à celui de jsonify (même fournisseur, mêmes options)."""
+        return self.flask_app.json.response(data).get_data()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            if scope['path'] == '/api/products/stream' and await self.stream_stock(scope, receive, send):
+                return
+            for pattern, view, wants_encoding in ROUTES:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    served = await self.serve(scope, send, view, wants_encoding, [int(value) for value in match.groups()])
+                    if served:
+                        return
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def serve(self, scope, send, view, wants_encoding, path_args):
+        """Exécute une lecture asynchrone ; retourne False si la requête doit aller à l'application Flask."""
+        headers = {}
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').lower()
+            value = value.decode('latin-1')
+            headers[name] = f'{headers[name]},{value}' if name in headers else value
+        query_string = scope['query_string'].decode('latin-1')
+        args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        accept_encoding = parse_accept_header(headers.get('accept-encoding'))
+
+        async def execute():
+            async with self.sessions() as session:
+                extra = [accept_encoding] if wants_encoding else []
+                reply = await view(self, session, args, *extra, *path_args)
+            if reply is None:
+                return None
+            return self.finish(reply, accept_encoding, cacheable='authorization' not in headers)
+
+        if self.config['SINGLEFLIGHT_ENABLED']:
+            # Même clé que le décorateur coalesce des blueprints
+            key = (scope['path'], query_string, headers.get('accept-encoding', ''))
+            result = await self.coalesce(key, execute)
+        else:
+            result = await execute()
+        if result is None:
+            return False
+
+        status, response_headers, body = result
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response_headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return True
+
+    async def stream_stock(self, scope, receive, send):
+        """Flux SSE du stock servi sur la boucle asyncio : un client connecté n'occupe aucun thread.
+
+        Mêmes événements que la route Flask ; les paramètres invalides lui sont confiés (400).
+        """
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        try:
+            ids = set(int(product_id) for product_id in args.get('ids', '').split(',') if product_id.strip())
+        except ValueError:
+            return False
+        if not ids or len(ids) > self.config['STOCK_STREAM_MAX_IDS']:
+            return False
+
+        broker = self.flask_app.extensions['stock_broker']
+        broker.ensure_started(self.flask_app)
+        cursor, snapshot = await asyncio.to_thread(self._read_snapshot, ids)
+        subscriber = broker.subscribe(ids, snapshot, cursor, max_subscribers=self.config['STOCK_STREAM_ASYNC_MAX_CLIENTS'],
+                                      loop=asyncio.get_running_loop())
+        if subscriber is None:
+            body = self.json({"message": "Trop de flux ouverts sur ce serveur, réessayez plus tard"})
+            await send({'type': 'http.response.start', 'status': 503, 'headers': [
+                (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), (b'retry-after', b'5')
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+            return True
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            subscriber.close()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        keepalive = self.config['STOCK_STREAM_KEEPALIVE']
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no')
+            ]})
+            initial = ''.join(format_sse({'id': product_id, 'stock': stock, 'price': price}, event='stock', event_id=cursor)
+                              for product_id, (stock, price) in sorted(snapshot.items()))
+            await send({'type': 'http.response.body', 'body': initial.encode(), 'more_body': True})
+            while not subscriber.closed:
+                events = await subscriber.wait_async(keepalive)
+                if subscriber.closed:
+                    break
+                chunk = ''.join(format_sse(data, event='stock', event_id=event_id) for event_id, data in events)
+                await send({'type': 'http.response.body', 'body': (chunk or ': keepalive\n\n').encode(), 'more_body': True})
+        finally:
+            watcher.cancel()
+            broker.unsubscribe(subscriber)
+        return True
+
+    def _read_snapshot(self, ids):
+        with self.flask_app.app_context():
+            return read_snapshot(ids)
+
+    def finish(self, reply, accept_encoding, cacheable):
+        """Négocie la compression comme le hook after_request de l'application Flask."""
+        config = self.config
+        body, headers = reply.body, dict(reply.headers)
+        if config['COMPRESS_ENABLED'] and 'Content-Encoding' not in headers:
+            headers['Vary'] = 'Accept-Encoding'
+            encoding = accept_encoding.best_match(ENCODINGS)
+            if encoding is not None and len(body) >= config['COMPRESS_MIN_SIZE']:
+                cache = self.flask_app.extensions['compression_cache'] if cacheable else None
+                body = compress_cached(body, encoding, config['COMPRESS_LEVEL'], cache)
+                headers['Content-Encoding'] = encoding
+        headers['Content-Type'] = 'application/json'
+        headers['Content-Length'] = str(len(body))
+        return 200, list(headers.items()), body
+
+    async def coalesce(self, key, execute):
+        """Les lectures identiques simultanées attendent le résultat de la première (single-flight)."""
+        future = self._flights.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        try:
+            result = await execute()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception() # Exception remise aux requêtes en attente, sans avertissement si aucune
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._flights[key]
+        return result
+
+    async def lifespan(self, receive, send):
+        """Cycle de vie du serveur ASGI : préchauffage au démarrage, connexions du moteur asynchrone fermées à l'arrêt."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Préchauffage de l'application Flask avant d'accepter des connexions
+                await asyncio.to_thread(warm_worker, self.flask_app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_class=Config):
+    """Point d'entrée ASGI : lectures du catalogue en asynchrone, application Flask pour le reste."""
+    return CatalogService(create_app(config_class))
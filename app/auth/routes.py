@@ -1,33 +1,36 @@
 from flask import Blueprint, request, jsonify
-from ..models import User
+from ..models import User, UserOrderStats
 from ..extensions import db, bcrypt
 from flask_jwt_extended import create_access_token
+from ..validation import validate_json
+from .schemas import credentials_schema
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@validate_json(credentials_schema)
 def register():
     data = request.get_json()
-    email = data.get('email')
-    password = data.get('password')
-
-    if not email or not password:
-        return jsonify({'message': 'Email et mot de passe requis'}), 400
+    email = data['email']
+    password = data['password']
 
     if User.query.filter_by(email=email).first():
         return jsonify({'message': 'Cet utilisateur existe déjà. Veuillez vous connecter.'}), 409
 
     new_user = User(email=email, password=password)
+    # Ligne de statistiques créée avec le compte : les commandes n'ont plus qu'à l'incrémenter
+    new_user.order_stats = UserOrderStats()
     db.session.add(new_user)
     db.session.commit()
 
     return jsonify({'message': 'Nouvel utilisateur créé avec succès'}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@validate_json(credentials_schema)
 def login():
     data = request.get_json()
-    email = data.get('email')
-    password = data.get('password')
+    email = data['email']
+    password = data['password']
 
     user = User.query.filter_by(email=email).first()
 
@@ -0,0 +1,7 @@
+from ..validation import Schema, String
+
+# Bornes de longueur : bcrypt ne tient compte que des 72 premiers octets du mot de passe
+credentials_schema = Schema({
+    'email': String(required=True, min_length=3, max_length=120),
+    'password': String(required=True, min_length=1, max_length=128),
+}, max_bytes=4096)
@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Cache LRU de corps de réponse encodés, borné en mémoire (octets) pour le worker courant.
+
+    Chaque entrée est associée à une version (ex. `updated_at` de la ligne) : une entrée
+    dont la version ne correspond plus est ignorée puis remplacée. Une même entrée peut
+    contenir plusieurs variantes encodées du même corps ('identity', 'gzip'...).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # clé -> (version, {variante: octets})
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _entry_size(variants):
+        return sum(len(body) for body in variants.values())
+
+    def get(self, key, version, variant='identity'):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or variant not in entry[1]:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1][variant]
+
+    def put(self, key, version, variant, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= self._entry_size(entry[1])
+            # Une nouvelle version remplace toutes les variantes de l'ancienne
+            variants = dict(entry[1]) if entry is not None and entry[0] == version else {}
+            variants[variant] = body
+            self._entries[key] = (version, variants)
+            self._size += self._entry_size(variants)
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= self._entry_size(evicted)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, keys=None):
+        """Supprime les entrées données, ou tout le cache si `keys` vaut None."""
+        with self._lock:
+            if keys is None:
+                self.stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self._size = 0
+                return
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._size -= self._entry_size(entry[1])
+                    self.stats['invalidations'] += 1
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._size, max_bytes=self.max_bytes)
@@ -1,68 +1,116 @@
 from flask import Blueprint, jsonify, request
-from ..models import Category
+from sqlalchemy import select, update
+from ..models import Category, Product
 from ..extensions import db
+from ..changefeed import record_changes
+from .tree import ancestors_statement, is_in_subtree
 from ..decorators import admin_required
+from ..validation import validate_json
+from .schemas import category_schema, category_update_schema
+from ..singleflight import coalesce
+from ..signals import notify_products_changed
 
 categories_bp = Blueprint('categories', __name__)
 
+def serialize_category(category):
+    """Convertit un objet Category en dictionnaire."""
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+        "parent_id": category.parent_id
+    }
+
+def _parent_error(category, parent_id):
+    """Vérifie le parent demandé ; retourne un message d'erreur ou None."""
+    if parent_id is None:
+        return None
+    if not isinstance(parent_id, int) or isinstance(parent_id, bool) or not db.session.get(Category, parent_id):
+        return "Catégorie parente introuvable"
+    if category is not None and category.id is not None and is_in_subtree(db.session, parent_id, category.id):
+        return "Une catégorie ne peut pas être déplacée sous elle-même ou sous l'une de ses sous-catégories"
+    return None
+
 # --- Routes Publiques ---
 
 @categories_bp.route('/', methods=['GET'])
+@coalesce
 def get_categories():
     """Récupère la liste de toutes les catégories."""
     categories = Category.query.all()
-    return jsonify([
-        {
-            "id": category.id,
-            "name": category.name,
-            "description": category.description
-        } for category in categories
-    ]), 200
+    return jsonify([serialize_category(category) for category in categories]), 200
 
 @categories_bp.route('/<int:category_id>', methods=['GET'])
+@coalesce
 def get_category(category_id):
     """Récupère une catégorie spécifique par son ID."""
     category = db.get_or_404(Category, category_id)
-    return jsonify({
-        "id": category.id,
-        "name": category.name,
-        "description": category.description
-    }), 200
+    data = serialize_category(category)
+    # Fil d'Ariane depuis la racine et sous-catégories directes
+    data["path"] = [{"id": c.id, "name": c.name} for c in db.session.scalars(ancestors_statement(category.id))]
+    data["children"] = [{"id": c.id, "name": c.name} for c in category.children]
+    return jsonify(data), 200
 
 # --- Routes Protégées (Admin) ---
 
 @categories_bp.route('/', methods=['POST'])
 @admin_required()
+@validate_json(category_schema)
 def create_category():
     """Crée une nouvelle catégorie."""
     data = request.get_json()
-    if not data or 'name' not in data:
-        return jsonify({"message": "Le nom de la catégorie est requis"}), 400
-    
     if Category.query.filter_by(name=data['name']).first():
         return jsonify({"message": "Cette catégorie existe déjà"}), 409
 
-    new_category = Category(name=data['name'], description=data.get('description'))
+    error = _parent_error(None, data.get('parent_id'))
+    if error:
+        return jsonify({"message": error}), 400
+
+    new_category = Category(name=data['name'], description=data.get('description'), parent_id=data.get('parent_id'))
     db.session.add(new_category)
     db.session.commit()
-    return jsonify({"id": new_category.id, "name": new_category.name, "description": new_category.description}), 201
+    return jsonify(serialize_category(new_category)), 201
 
 @categories_bp.route('/<int:category_id>', methods=['PUT'])
 @admin_required()
+@validate_json(category_update_schema)
 def update_category(category_id):
     """Met à jour une catégorie existante."""
     category = db.get_or_404(Category, category_id)
     data = request.get_json()
+    if 'parent_id' in data:
+        # Déplacement du sous-arbre : la table de fermeture est mise à jour dans la même transaction
+        error = _parent_error(category, data['parent_id'])
+        if error:
+            return jsonify({"message": error}), 400
+        category.parent_id = data['parent_id']
     category.name = data.get('name', category.name)
     category.description = data.get('description', category.description)
     db.session.commit()
-    return jsonify({"id": category.id, "name": category.name, "description": category.description}), 200
+    # Le nom de la catégorie figure dans la représentation de ses produits
+    notify_products_changed()
+    return jsonify(serialize_category(category)), 200
 
 @categories_bp.route('/<int:category_id>', methods=['DELETE'])
 @admin_required()
 def delete_category(category_id):
     """Supprime une catégorie."""
     category = db.get_or_404(Category, category_id)
+    product_ids = db.session.scalars(select(Product.id).where(Product.category_id == category.id)).all()
+    if product_ids and category.parent_id is None:
+        return jsonify({"message": "Impossible de supprimer une catégorie racine qui contient des produits"}), 409
+
+    # Sous-catégories et produits remontent d'un niveau, sous le parent de la catégorie supprimée
+    for child in category.children:
+        child.parent_id = category.parent_id
+    if product_ids:
+        db.session.execute(
+            update(Product).where(Product.category_id == category.id).values(category_id=category.parent_id)
+        )
+        record_changes('product', product_ids)
+    db.session.flush()
+    db.session.expire(category, ['children', 'products'])
     db.session.delete(category)
     db.session.commit()
+    notify_products_changed()
     return jsonify({"message": "Catégorie supprimée avec succès"}), 200
\ No newline at end of file
@@ -0,0 +1,11 @@
+from ..validation import Integer, Schema, String
+
+category_fields = {
+    'name': String(min_length=1, max_length=100),
+    'description': String(max_length=10_000, nullable=True),
+    'parent_id': Integer(nullable=True), # null : catégorie racine
+}
+
+category_schema = Schema({**category_fields, 'name': String(required=True, min_length=1, max_length=100)})
+
+category_update_schema = Schema(category_fields)
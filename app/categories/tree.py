@@ -0,0 +1,70 @@
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import aliased
+from ..models import Category, CategoryClosure
+
+closure = CategoryClosure.__table__
+
+
+def subtree_ids(category_id):
+    """Sous-requête des IDs de la catégorie et de tous ses descendants (une lecture de la clé primaire)."""
+    return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+
+
+def ancestors_statement(category_id):
+    """Catégories de la racine jusqu'à `category_id` incluse (fil d'Ariane)."""
+    return (
+        select(Category)
+        .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+        .where(CategoryClosure.descendant_id == category_id)
+        .order_by(CategoryClosure.depth.desc())
+    )
+
+
+def is_in_subtree(session, category_id, ancestor_id):
+    """Indique si `category_id` est `ancestor_id` ou l'un de ses descendants."""
+    return session.execute(
+        select(CategoryClosure.depth)
+        .where(CategoryClosure.ancestor_id == ancestor_id, CategoryClosure.descendant_id == category_id)
+    ).first() is not None
+
+
+def _attach(connection, node_id, parent_id):
+    """Relie le sous-arbre de `node_id` à tous les ancêtres de `parent_id` (produit cartésien)."""
+    above = aliased(CategoryClosure)
+    below = aliased(CategoryClosure)
+    connection.execute(insert(closure).from_select(
+        ['ancestor_id', 'descendant_id', 'depth'],
+        select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+        .select_from(above)
+        .join(below, below.ancestor_id == node_id)
+        .where(above.descendant_id == parent_id)
+    ))
+
+
+@event.listens_for(Category, 'after_insert')
+def _insert_node(mapper, connection, category):
+    connection.execute(insert(closure).values(ancestor_id=category.id, descendant_id=category.id, depth=0))
+    if category.parent_id is not None:
+        _attach(connection, category.id, category.parent_id)
+
+
+@event.listens_for(Category, 'after_update')
+def _move_node(mapper, connection, category):
+    state = inspect(category)
+    if not (state.attrs.parent_id.history.has_changes() or state.attrs.parent.history.has_changes()):
+        return
+    # Détache le sous-arbre de ses anciens ancêtres, puis le rattache sous le nouveau parent
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == category.id)
+    connection.execute(delete(closure).where(
+        closure.c.descendant_id.in_(subtree),
+        closure.c.ancestor_id.not_in(subtree)
+    ))
+    if category.parent_id is not None:
+        _attach(connection, category.id, category.parent_id)
+
+
+@event.listens_for(Category, 'after_delete')
+def _delete_node(mapper, connection, category):
+    connection.execute(delete(closure).where(
+        (closure.c.ancestor_id == category.id) | (closure.c.descendant_id == category.id)
+    ))
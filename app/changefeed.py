@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+from .models import CatalogChange, Category, Product
+from .extensions import db
+
+# Entités suivies par le journal des changements
+TRACKED_ENTITIES = {Product: 'product', Category: 'category'}
+
+
+def _track_catalog_changes(session, flush_context, instances):
+    """Ajoute une entrée au journal pour chaque produit ou catégorie créé, modifié ou supprimé.
+
+    L'entrée est écrite dans la même transaction que la modification : elle n'est visible
+    qu'une fois celle-ci validée, et disparaît avec elle en cas de rollback.
+    """
+    changes = []
+    for obj in session.deleted:
+        entity = TRACKED_ENTITIES.get(type(obj))
+        if entity and obj.id is not None:
+            changes.append((entity, obj.id, 'delete'))
+
+    pending = [obj for obj in session.new if type(obj) in TRACKED_ENTITIES]
+    for obj in session.dirty:
+        entity = TRACKED_ENTITIES.get(type(obj))
+        if entity and session.is_modified(obj, include_collections=False):
+            changes.append((entity, obj.id, 'upsert'))
+
+    if pending:
+        # L'ID des nouveaux objets n'est connu qu'après l'INSERT : on journalise après le flush
+        session.info.setdefault('catalog_pending', []).extend(pending)
+    for entity, entity_id, op in changes:
+        session.add(CatalogChange(entity=entity, entity_id=entity_id, op=op))
+
+
+def _track_new_objects(session, flush_context):
+    pending = session.info.pop('catalog_pending', None)
+    if pending:
+        _insert_changes(session.connection(), [
+            (TRACKED_ENTITIES[type(obj)], obj.id, 'upsert') for obj in pending if obj.id is not None
+        ])
+
+
+def register_listeners():
+    """Branche le suivi des changements sur toutes les sessions SQLAlchemy (idempotent)."""
+    if not event.contains(Session, 'before_flush', _track_catalog_changes):
+        event.listen(Session, 'before_flush', _track_catalog_changes)
+        event.listen(Session, 'after_flush', _track_new_objects)
+
+
+def _insert_changes(connection, changes):
+    """Écrit des entrées (entité, ID, opération) dans le journal via un executemany."""
+    if changes:
+        now = datetime.now(timezone.utc)
+        connection.execute(insert(CatalogChange), [
+            {'entity': entity, 'entity_id': entity_id, 'op': op, 'changed_at': now}
+            for entity, entity_id, op in changes
+        ])
+
+
+def record_changes(entity, entity_ids, op='upsert'):
+    """Journalise explicitement des changements effectués hors ORM (INSERT/UPDATE en masse)."""
+    _insert_changes(db.session.connection(), [(entity, entity_id, op) for entity_id in entity_ids])
+
+
+def _gap_cutoff():
+    """Date avant laquelle un trou dans la suite des IDs est considéré comme définitif (UTC, sans fuseau)."""
+    timeout = current_app.config['CHANGE_FEED_GAP_TIMEOUT']
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=timeout)
+
+
+def _changed_at(change):
+    changed_at = change.changed_at
+    if changed_at is not None and changed_at.tzinfo is not None:
+        changed_at = changed_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return changed_at
+
+
+def read_changes(since=0, limit=100):
+    """Retourne les changements postérieurs au curseur `since`, dans l'ordre du journal, jusqu'à l'horizon sûr.
+
+    Les IDs sont attribués à l'insertion et non à la validation : sur PostgreSQL, une
+    transaction encore en cours peut détenir un ID inférieur à celui d'une entrée déjà
+    visible, qui apparaîtrait après qu'un lecteur a avancé son curseur au-delà. La lecture
+    s'arrête donc au premier trou dans la suite des IDs si l'entrée qui le suit date de moins
+    de CHANGE_FEED_GAP_TIMEOUT secondes ; un trou plus ancien (transaction annulée, entrées
+    purgées) est franchi. Sans `limit`, lit tout le reste du journal.
+    """
+    statement = select(CatalogChange).where(CatalogChange.id > since).order_by(CatalogChange.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    changes = db.session.execute(statement).scalars().all()
+
+    cutoff = _gap_cutoff()
+    expected = since + 1
+    for position, change in enumerate(changes):
+        if change.id != expected and (_changed_at(change) or cutoff) > cutoff:
+            # Une transaction plus ancienne peut encore valider l'ID manquant
+            return changes[:position]
+        expected = change.id + 1
+    return changes
+
+
+def current_cursor():
+    """Position actuelle de la fin du journal, limitée à l'horizon sûr (voir read_changes)."""
+    base = db.session.execute(
+        select(func.coalesce(func.max(CatalogChange.id), 0)).where(CatalogChange.changed_at <= _gap_cutoff())
+    ).scalar()
+    recent = read_changes(since=base, limit=None)
+    return recent[-1].id if recent else base
@@ -1,7 +1,10 @@
+import os
+from datetime import datetime, timedelta, timezone
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 from .extensions import db
-from .models import User, Category
+from .models import User, Category, CatalogChange, ArchivedOrder, Order
 
 @click.command(name='seed')
 @with_appcontext
@@ -26,8 +29,167 @@ def seed():
             Category(name='Moniteurs', description='Écrans de toutes tailles et résolutions.'),
             Category(name='Composants', description='Processeurs, cartes graphiques, mémoire, etc.')
         ]
-        db.session.bulk_save_objects(categories)
+        db.session.add_all(categories)
         print(f'{len(categories)} catégories créées.')
 
     db.session.commit()
-    print('Initialisation de la base de données terminée.')
\ No newline at end of file
+    print('Initialisation de la base de données terminée.')
+
+@click.command(name='import-products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['ndjson', 'csv']), default=None,
+              help="Format du fichier (déduit de l'extension par défaut).")
+@click.option('--chunk-size', type=int, default=None, help='Nombre de lignes par lot.')
+@with_appcontext
+def import_products_command(path, file_format, chunk_size):
+    """Importe des produits en masse depuis un fichier NDJSON ou CSV (upsert par SKU)."""
+    from .products.importer import import_products, read_rows
+
+    if file_format is None:
+        file_format = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson'
+    chunk_size = chunk_size or current_app.config['PRODUCT_IMPORT_CHUNK_SIZE']
+
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report = import_products(read_rows(f, file_format), chunk_size=chunk_size).to_dict()
+
+    print(f"{report['processed']} lignes traitées : {report['created']} créées, "
+          f"{report['updated']} mises à jour, {report['error_count']} en erreur.")
+    for error in report['errors']:
+        print(f"  ligne {error['line']} : {error['message']}")
+    if report['error_count'] > len(report['errors']):
+        print(f"  ... et {report['error_count'] - len(report['errors'])} autres erreurs.")
+    print(f"Durée : {report['elapsed_seconds']} s ({report['rows_per_second']} lignes/s).")
+
+@click.command(name='prune-catalog-changes')
+@click.option('--days', type=int, default=30, show_default=True, help='Âge minimal des entrées supprimées.')
+@with_appcontext
+def prune_catalog_changes(days):
+    """Supprime les entrées anciennes du journal des changements du catalogue."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    deleted = CatalogChange.query.filter(CatalogChange.changed_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    print(f'{deleted} entrées du journal supprimées.')
+
+@click.command(name='rebuild-related-products')
+@click.option('--chunk-size', type=int, default=10_000, show_default=True, help="Nombre de paires par lot d'écriture.")
+@with_appcontext
+def rebuild_related_products(chunk_size):
+    """Recalcule l'index « souvent achetés ensemble » à partir de toutes les commandes."""
+    from .products.related import rebuild_associations
+
+    stats = rebuild_associations(chunk_size=chunk_size)
+    print(f"{stats['lines']} lignes de commande, {stats['pairs']} paires de produits.")
+    print(f"Lecture : {stats['load_seconds']} s, comptage : {stats['count_seconds']} s, "
+          f"écriture : {stats['write_seconds']} s.")
+
+@click.command(name='rebuild-sales-rollups')
+@click.option('--chunk-size', type=int, default=10_000, show_default=True, help="Nombre de lignes d'agrégat par lot d'écriture.")
+@with_appcontext
+def rebuild_sales_rollups(chunk_size):
+    """Recalcule les agrégats de ventes (jour, produit) à partir de toutes les commandes."""
+    from .analytics.rollups import rebuild_rollups
+
+    stats = rebuild_rollups(chunk_size=chunk_size)
+    print(f"{stats['lines']} lignes de commande agrégées en {stats['rows']} lignes (jour, produit).")
+    print(f"Lecture : {stats['load_seconds']} s, agrégation : {stats['aggregate_seconds']} s, "
+          f"écriture : {stats['write_seconds']} s.")
+
+@click.command(name='reconcile-order-stats')
+@click.option('--chunk-size', type=int, default=10_000, show_default=True, help="Nombre d'utilisateurs par lot d'écriture.")
+@with_appcontext
+def reconcile_order_stats(chunk_size):
+    """Recalcule les statistiques de commandes de tous les utilisateurs à partir des commandes."""
+    from .orders.stats import rebuild_order_stats
+
+    stats = rebuild_order_stats(chunk_size=chunk_size)
+    print(f"{stats['users']} utilisateurs, dont {stats['with_orders']} avec des commandes.")
+    print(f"Lecture : {stats['load_seconds']} s, écriture : {stats['write_seconds']} s.")
+
+@click.command(name='archive-orders')
+@click.option('--days', type=int, default=None, help='Âge minimal des commandes archivées (ORDER_ARCHIVE_AFTER_DAYS par défaut).')
+@click.option('--chunk-size', type=int, default=None, help='Nombre de commandes par lot (ORDER_ARCHIVE_CHUNK_SIZE par défaut).')
+@with_appcontext
+def archive_orders_command(days, chunk_size):
+    """Déplace les commandes expédiées ou annulées anciennes vers les tables d'archive."""
+    from .orders.archive import archive_orders
+    from .orders.sharding import order_sessions
+
+    days = current_app.config['ORDER_ARCHIVE_AFTER_DAYS'] if days is None else days
+    chunk_size = chunk_size or current_app.config['ORDER_ARCHIVE_CHUNK_SIZE']
+    # Chaque shard archive ses propres commandes
+    for session in order_sessions():
+        result = archive_orders(days, chunk_size=chunk_size, session=session)
+        print(f"{session.get_bind().url.render_as_string(hide_password=True)} : "
+              f"{result['orders']} commandes ({result['items']} lignes) archivées.")
+
+@click.command(name='init-order-shards')
+@with_appcontext
+def init_order_shards():
+    """Crée les tables des commandes sur chaque shard déclaré dans ORDER_SHARD_URLS."""
+    from .orders.sharding import bind_key, create_shard_schema, shard_count
+
+    if not shard_count():
+        print("Aucun shard configuré (ORDER_SHARD_URLS) : les commandes sont dans la base principale.")
+        return
+    for index in range(shard_count()):
+        create_shard_schema(db.engines[bind_key(index)], index)
+        print(f"Shard {index} prêt.")
+    # Les commandes de la base principale ne sont plus lues une fois le partitionnement actif
+    remaining = db.session.scalar(db.select(db.func.count()).select_from(Order))
+    remaining += db.session.scalar(db.select(db.func.count()).select_from(ArchivedOrder))
+    if remaining:
+        print(f"Attention : {remaining} commandes restent dans la base principale et ne seront plus accessibles.")
+
+@click.command(name='process-order-queue')
+@click.option('--batch-size', type=int, default=None, help='Demandes réservées par lot (ORDER_QUEUE_BATCH_SIZE par défaut).')
+@click.option('--once', is_flag=True, help='Traite un seul lot puis s\'arrête.')
+@with_appcontext
+def process_order_queue(batch_size, once):
+    """Worker de la file des commandes asynchrones (plusieurs workers peuvent tourner en parallèle)."""
+    from .orders.queue import run_worker
+
+    config = current_app.config
+    run_worker(
+        batch_size or config['ORDER_QUEUE_BATCH_SIZE'],
+        lease_seconds=config['ORDER_QUEUE_LEASE_SECONDS'],
+        max_attempts=config['ORDER_QUEUE_MAX_ATTEMPTS'],
+        retry_delay=config['ORDER_QUEUE_RETRY_DELAY'],
+        poll_interval=config['ORDER_QUEUE_POLL_INTERVAL'],
+        once=once,
+    )
+
+@click.command(name='rebalance-stock-stripes')
+@click.option('--loop', is_flag=True, help='Rééquilibre en continu, toutes les STOCK_REBALANCE_INTERVAL secondes.')
+@with_appcontext
+def rebalance_stock_stripes(loop):
+    """Égalise les sous-compteurs des produits au stock réparti et met à jour leur stock affiché."""
+    import time
+    from .products.stripes import rebalance_stripes
+    from .signals import notify_products_changed
+
+    while True:
+        changed = rebalance_stripes()
+        db.session.commit()
+        if changed:
+            notify_products_changed(changed)
+            print(f"{len(changed)} produits au stock modifié depuis le dernier rééquilibrage.")
+        if not loop:
+            break
+        time.sleep(current_app.config['STOCK_REBALANCE_INTERVAL'])
+
+@click.command(name='stock-snapshot')
+@click.option('--verify', is_flag=True, help="Compare l'instantané à la base et corrige les écarts, sans tout reconstruire.")
+@with_appcontext
+def stock_snapshot_command(verify):
+    """Reconstruit (ou vérifie) l'instantané du stock partagé par les workers de cet hôte."""
+    from .products.availability import rebuild_snapshot, verify_snapshot
+
+    snapshot = current_app.extensions.get('stock_snapshot')
+    if snapshot is None:
+        raise click.ClickException("STOCK_SNAPSHOT_PATH n'est pas configuré.")
+    if verify:
+        repaired = verify_snapshot(snapshot)
+        print(f"{len(repaired)} produits corrigés dans l'instantané (génération {snapshot.generation}).")
+    else:
+        count = rebuild_snapshot(snapshot)
+        print(f"Instantané reconstruit : {count} produits, génération {snapshot.generation}.")
@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import zlib
+from flask import current_app, request
+from .cache import ResponseCache
+
+ENCODINGS = ('gzip', 'deflate')
+
+# Types de contenu compressés ; les flux SSE en sont exclus (chaque événement doit partir immédiatement)
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def negotiate_encoding():
+    """Retourne le meilleur encodage accepté par le client ('gzip', 'deflate') ou None."""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body, encoding, level=6):
+    """Compresse un corps complet. `mtime=0` rend la sortie gzip déterministe, donc réutilisable."""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return zlib.compress(body, level)
+
+
+def compress_stream(chunks, encoding, level=6):
+    """Compresse une réponse en flux, morceau par morceau, sans la charger en mémoire."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        # Z_SYNC_FLUSH : chaque morceau est envoyé au client sans attendre la fin du flux
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_cached(body, encoding, level, cache=None):
+    """Compresse un corps complet, en réutilisant le résultat gardé dans `cache` pour un corps identique."""
+    if cache is None:
+        return compress(body, encoding, level)
+    key = hashlib.blake2b(body, digest_size=16).digest()
+    variant = f'{encoding}:{level}'
+    compressed = cache.get(key, len(body), variant)
+    if compressed is None:
+        compressed = compress(body, encoding, level)
+        cache.put(key, len(body), variant, compressed)
+    return compressed
+
+
+def _is_cacheable():
+    # Réponses publiques en lecture : le même corps est servi à de nombreux clients
+    return request.method == 'GET' and 'Authorization' not in request.headers
+
+
+def compress_response(response):
+    """Hook after_request : négocie et applique la compression gzip/deflate."""
+    config = current_app.config
+    if (not config['COMPRESS_ENABLED']
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or not 200 <= response.status_code < 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+    level = config['COMPRESS_LEVEL']
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESS_MIN_SIZE']:
+            return response
+        # Corps identiques (ex. même page du catalogue) : compressés une seule fois
+        cache = current_app.extensions['compression_cache'] if _is_cacheable() else None
+        response.set_data(compress_cached(body, encoding, level, cache))
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    """Active la compression des réponses de l'application."""
+    app.extensions['compression_cache'] = ResponseCache(max_bytes=app.config['COMPRESS_CACHE_MAX_BYTES'])
+    app.after_request(compress_response)
@@ -1,5 +1,6 @@
 from .extensions import db, bcrypt
 from datetime import datetime, timezone
+from sqlalchemy import case, func, select
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,6 +11,7 @@ class User(db.Model):
 
     # Relation
     orders = db.relationship('Order', back_populates='user', cascade="all, delete-orphan")
+    order_stats = db.relationship('UserOrderStats', uselist=False, cascade="all, delete-orphan")
 
     def __init__(self, email, password, role='client'):
         self.email = email
@@ -31,9 +33,12 @@ class User(db.Model):
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    sku = db.Column(db.String(64), unique=True, nullable=True) # Référence fournisseur, clé naturelle des imports
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
     stock = db.Column(db.Integer, nullable=False, default=0)
+    # Nombre de sous-compteurs (stock_stripe) du stock ; 0 : stock dans la seule colonne `stock`
+    stock_stripes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -41,21 +46,95 @@ class Product(db.Model):
     # Relations
     category = db.relationship('Category', back_populates='products')
     order_items = db.relationship('OrderItem', back_populates='product')
+    stripes = db.relationship('StockStripe', cascade='all, delete-orphan', passive_deletes=True)
+
+    __table_args__ = (
+        # Filtre par catégorie et facettes (comptage par catégorie, tranches de prix)
+        db.Index('ix_product_category_id_price', 'category_id', 'price'),
+        # Tris de la liste de produits avec départage par ID (pagination par curseur)
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_created_at_id', 'created_at', 'id'),
+        db.Index('ix_product_name_id', 'name', 'id'),
+        db.Index('ix_product_category_id_created_at_id', 'category_id', 'created_at', 'id'),
+        db.Index('ix_product_category_id_name_id', 'category_id', 'name', 'id'),
+    )
 
     def __repr__(self):
         return f'<Product {self.name}>'
 
+class StockStripe(db.Model):
+    """Sous-compteur du stock d'un produit très demandé (Product.stock_stripes > 0).
+
+    Le stock disponible est la somme des sous-compteurs ; chaque commande en décrémente un,
+    de sorte que les commandes simultanées ne verrouillent pas toutes la même ligne.
+    `Product.stock` garde le total du dernier rééquilibrage.
+    """
+    __tablename__ = 'stock_stripe'
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    stripe = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<StockStripe {self.product_id}/{self.stripe} ({self.quantity})>'
+
+# Stock disponible : somme des sous-compteurs d'un produit réparti, colonne `stock` sinon. Source des
+# lectures (sérialisation, filtre « en stock », flux SSE) ; chargé à la demande, undefer() dans les listes.
+Product.available_stock = db.column_property(
+    case(
+        (Product.stock_stripes > 0,
+         select(func.coalesce(func.sum(StockStripe.quantity), 0))
+         .where(StockStripe.product_id == Product.id)
+         .correlate_except(StockStripe)
+         .scalar_subquery()),
+        else_=Product.stock
+    ),
+    deferred=True
+)
+
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
+    parent_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True, index=True) # None : catégorie racine
 
-    # Relation
+    # Relations
     products = db.relationship('Product', back_populates='category')
+    parent = db.relationship('Category', remote_side=[id], back_populates='children')
+    children = db.relationship('Category', back_populates='parent')
 
     def __repr__(self):
         return f'<Category {self.name}>'
 
+class CategoryClosure(db.Model):
+    """Table de fermeture de l'arborescence des catégories : une ligne par couple (ancêtre, descendant).
+
+    Chaque catégorie est sa propre ancêtre à la profondeur 0. Maintenue par app/categories/tree.py.
+    """
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete='CASCADE'), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # Remontée vers les ancêtres (fil d'Ariane, déplacements)
+        db.Index('ix_category_closure_descendant_id_depth', 'descendant_id', 'depth'),
+    )
+
+    def __repr__(self):
+        return f'<CategoryClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>'
+
+class UserOrderStats(db.Model):
+    """Statistiques de commandes d'un utilisateur (commandes passées, hors annulées), tenues à jour avec ses commandes.
+
+    Une ligne par utilisateur, à côté de `user` : les mises à jour ne verrouillent pas le compte.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_spent = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    last_order_date = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<UserOrderStats User {self.user_id}>'
+
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -72,6 +151,14 @@ class Order(db.Model):
     user = db.relationship('User', back_populates='orders')
     items = db.relationship('OrderItem', back_populates='order', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Commandes d'un utilisateur et de tous, les plus récentes d'abord (pagination par curseur) ;
+        # sélection des commandes à archiver
+        db.Index('ix_order_user_id_order_date_id', 'user_id', 'order_date', 'id'),
+        db.Index('ix_order_order_date_id', 'order_date', 'id'),
+        db.Index('ix_order_status_order_date', 'status', 'order_date'),
+    )
+
     def __repr__(self):
         return f'<Order {self.id} by User {self.user_id}>'
 
@@ -86,5 +173,122 @@ class OrderItem(db.Model):
     order = db.relationship('Order', back_populates='items')
     product = db.relationship('Product', back_populates='order_items')
 
+    __table_args__ = (
+        db.Index('ix_order_item_order_id', 'order_id'),
+    )
+
     def __repr__(self):
         return f'<OrderItem {self.id} Order {self.order_id} Product {self.product_id}>'
+
+class ArchivedOrder(db.Model):
+    """Commande archivée (expédiée ou annulée depuis longtemps), déplacée hors de la table `order`.
+
+    Mêmes colonnes et même ID que la commande d'origine ; en lecture seule.
+    """
+    __tablename__ = 'order_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    order_date = db.Column(db.DateTime, nullable=False)
+    total_amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+
+    shipping_address = db.Column(db.String(255), nullable=False)
+    shipping_city = db.Column(db.String(100), nullable=False)
+    shipping_postal_code = db.Column(db.String(20), nullable=False)
+    shipping_country = db.Column(db.String(100), nullable=False)
+    archived_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relation
+    items = db.relationship('ArchivedOrderItem', order_by='ArchivedOrderItem.id')
+
+    def __repr__(self):
+        return f'<ArchivedOrder {self.id} by User {self.user_id}>'
+
+class ArchivedOrderItem(db.Model):
+    """Ligne d'une commande archivée. Sans clé étrangère vers `product` : l'historique survit au produit."""
+    __tablename__ = 'order_item_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order_archive.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price_at_order = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivedOrderItem {self.id} Order {self.order_id} Product {self.product_id}>'
+
+class OrderJob(db.Model):
+    """Demande de commande en attente de traitement par un worker (mode asynchrone).
+
+    `status` : queued (à traiter), processing (réservée jusqu'à `locked_until`), done, dead
+    (abandonnée après `attempts` essais). Sans clé étrangère vers `order` : la commande peut
+    être sur un shard.
+    """
+    __tablename__ = 'order_job'
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False) # Articles demandés (JSON)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_by = db.Column(db.String(32), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('order_id', name='uq_order_job_order_id'),
+        # Prochaines demandes à réserver ; réservations expirées
+        db.Index('ix_order_job_status_available_at', 'status', 'available_at'),
+        db.Index('ix_order_job_status_locked_until', 'status', 'locked_until'),
+    )
+
+    def __repr__(self):
+        return f'<OrderJob {self.id} Order {self.order_id} ({self.status})>'
+
+class ProductAssociation(db.Model):
+    """Nombre de commandes contenant à la fois `product_id` et `related_id` (« souvent achetés ensemble »).
+
+    Chaque paire est stockée dans les deux sens ; les commandes annulées ne comptent pas.
+    """
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    related_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    orders = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # Les N produits les plus souvent associés à un produit : lecture ordonnée d'une plage d'index
+        db.Index('ix_product_association_product_id_orders', 'product_id', 'orders'),
+    )
+
+    def __repr__(self):
+        return f'<ProductAssociation {self.product_id} -> {self.related_id} ({self.orders})>'
+
+class SalesRollup(db.Model):
+    """Ventes agrégées par jour et par produit (commandes non annulées), source des rapports d'administration.
+
+    La catégorie est celle du produit au moment de la vente (sa catégorie actuelle après une reconstruction).
+    """
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True) # Sans clé étrangère : l'historique survit au produit
+    category_id = db.Column(db.Integer, nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # Rapports par produit ou par catégorie sur une période
+        db.Index('ix_sales_rollup_product_id_day', 'product_id', 'day'),
+        db.Index('ix_sales_rollup_category_id_day', 'category_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<SalesRollup {self.day} Product {self.product_id}>'
+
+class CatalogChange(db.Model):
+    """Journal des modifications du catalogue ; l'ID croissant sert de curseur au flux de changements."""
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False) # 'product' ou 'category'
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False) # 'upsert' ou 'delete'
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def __repr__(self):
+        return f'<CatalogChange {self.id} {self.op} {self.entity} {self.entity_id}>'
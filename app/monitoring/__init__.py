@@ -0,0 +1 @@
+# This file makes the 'monitoring' directory a Python package. It can be empty.
\ No newline at end of file
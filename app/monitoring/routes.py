@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify, current_app
+from ..decorators import admin_required
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+@monitoring_bp.route('/stats', methods=['GET'])
+@admin_required()
+def get_stats():
+    """Compteurs internes du worker courant (regroupement des requêtes, flux SSE...)."""
+    singleflight = dict(current_app.extensions['singleflight'].stats)
+    # Part des requêtes servies sans exécution propre : effet du regroupement
+    singleflight['suppression_ratio'] = round(singleflight['shared'] / singleflight['calls'], 4) if singleflight['calls'] else 0.0
+    snapshot = current_app.extensions.get('stock_snapshot')
+    return jsonify({
+        "singleflight": singleflight,
+        "product_cache": current_app.extensions['product_cache'].info(),
+        "stock_stream": current_app.extensions['stock_broker'].stats,
+        "stock_snapshot": snapshot.info() if snapshot else None,
+        "admission": current_app.extensions['admission'].info(),
+        "warmup": current_app.extensions['warmup'].info()
+    }), 200
+
+@monitoring_bp.route('/ready', methods=['GET'])
+def get_readiness():
+    """Disponibilité du worker pour l'équilibreur de charge : 200 une fois préchauffé, 503 sinon."""
+    warmup = current_app.extensions['warmup'].info()
+    return jsonify({"ready": warmup['status'] == 'ready', "warmup": warmup}), 200 if warmup['status'] == 'ready' else 503
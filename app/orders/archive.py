@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from ..models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from ..extensions import db
+
+# Statuts définitifs : une commande dans l'un de ces statuts ne change plus
+ARCHIVABLE_STATUSES = ('shipped', 'cancelled')
+
+ORDER_COLUMNS = ('id', 'user_id', 'order_date', 'total_amount', 'status', 'shipping_address',
+                 'shipping_city', 'shipping_postal_code', 'shipping_country')
+ITEM_COLUMNS = ('id', 'order_id', 'product_id', 'quantity', 'price_at_order')
+
+
+def _archivable_ids(session, cutoff, limit):
+    """IDs des prochaines commandes à archiver, par l'index (status, order_date)."""
+    # La commande la plus récente reste en place : SQLite réattribuerait son ID à la commande suivante
+    newest = select(func.max(Order.id)).scalar_subquery()
+    return session.execute(
+        select(Order.id)
+        .where(Order.status.in_(ARCHIVABLE_STATUSES), Order.order_date < cutoff, Order.id < newest)
+        .order_by(Order.id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def archive_orders(older_than_days, chunk_size=1000, session=None):
+    """Déplace les commandes expédiées ou annulées plus anciennes que `older_than_days` vers les tables d'archive.
+
+    Chaque lot (copie puis suppression de `chunk_size` commandes et de leurs lignes) est une
+    transaction : une interruption laisse chaque commande soit en place, soit archivée.
+    Retourne le nombre de commandes et de lignes archivées. `session` désigne la base des
+    commandes à traiter (un shard) ; par défaut, la base principale.
+    """
+    session = session or db.session
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    order_table, item_table = Order.__table__, OrderItem.__table__
+    archived_orders = archived_items = 0
+
+    while True:
+        ids = _archivable_ids(session, cutoff, chunk_size)
+        if not ids:
+            break
+        now = datetime.now(timezone.utc)
+        session.execute(insert(ArchivedOrder.__table__).from_select(
+            ORDER_COLUMNS + ('archived_at',),
+            select(*[order_table.c[name] for name in ORDER_COLUMNS], literal(now, ArchivedOrder.archived_at.type))
+            .where(order_table.c.id.in_(ids))
+        ))
+        items = session.execute(insert(ArchivedOrderItem.__table__).from_select(
+            ITEM_COLUMNS,
+            select(*[item_table.c[name] for name in ITEM_COLUMNS]).where(item_table.c.order_id.in_(ids))
+        )).rowcount
+        session.execute(delete(item_table).where(item_table.c.order_id.in_(ids)))
+        session.execute(delete(order_table).where(order_table.c.id.in_(ids)))
+        session.commit()
+        archived_orders += len(ids)
+        archived_items += items
+
+    return {'orders': archived_orders, 'items': archived_items}
+
+
+def find_order(order_id, user_id=None, session=None):
+    """Commande active ou archivée par ID (restreinte à `user_id` si donné), ou None."""
+    session = session or db.session
+    for model in (Order, ArchivedOrder):
+        query = select(model).where(model.id == order_id)
+        if user_id is not None:
+            query = query.where(model.user_id == user_id)
+        order = session.execute(query).scalar_one_or_none()
+        if order is not None:
+            return order
+    return None
+
+
+def order_lines():
+    """Sous-requête de toutes les lignes de commande, actives et archivées.
+
+    Colonnes : order_id, order_date, status, product_id, quantity, price_at_order. Sert aux
+    reconstructions (associations de produits, agrégats de ventes) qui couvrent tout l'historique.
+    """
+    def lines(order_model, item_model):
+        return (
+            select(order_model.id.label('order_id'), order_model.order_date, order_model.status,
+                   item_model.product_id, item_model.quantity, item_model.price_at_order)
+            .join(item_model, item_model.order_id == order_model.id)
+        )
+    return union_all(lines(Order, OrderItem), lines(ArchivedOrder, ArchivedOrderItem)).subquery()
+
+
+def order_headers():
+    """Sous-requête de toutes les commandes, actives et archivées (sans leurs lignes).
+
+    Colonnes : id, user_id, order_date, total_amount, status. Sert aux statistiques par utilisateur.
+    """
+    def headers(order_model):
+        return select(order_model.id, order_model.user_id, order_model.order_date, order_model.total_amount,
+                      order_model.status)
+    return union_all(headers(Order), headers(ArchivedOrder)).subquery()
@@ -0,0 +1,122 @@
+import threading
+from datetime import datetime, timezone
+from ..models import Order
+from ..extensions import db
+from ..signals import notify_products_changed
+from .service import OrderRejected, fill_order
+from .schemas import SHIPPING_FIELDS
+
+
+class _Request:
+    def __init__(self, user_id, data):
+        self.user_id = user_id
+        self.data = data
+        self.result = None # (statut HTTP, corps JSON)
+
+
+class _Batch:
+    def __init__(self):
+        self.requests = []
+        self.started = False # Lot pris en charge par le meneur : plus aucun retrait possible
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """Regroupe les créations de commandes simultanées dans une seule transaction (group commit).
+
+    La première requête d'un lot en est le meneur : elle attend `window` secondes (ou que le
+    lot atteigne `max_batch` commandes), puis traite tout le lot dans sa propre session. Les
+    autres requêtes attendent leur résultat, propre à chacune.
+    """
+
+    def __init__(self, window, max_batch):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._batch = None
+        self.stats = {'orders': 0, 'batches': 0, 'fallbacks': 0}
+
+    def submit(self, user_id, data, timeout=30):
+        """Place une commande ; retourne (statut HTTP, corps JSON)."""
+        request = _Request(user_id, data)
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            batch.requests.append(request)
+            if len(batch.requests) >= self.max_batch:
+                # Lot complet : les requêtes suivantes en ouvrent un nouveau
+                self._batch = None
+                batch.full.set()
+
+        if not leader:
+            if not batch.done.wait(timeout):
+                with self._lock:
+                    withdrawn = not batch.started
+                    if withdrawn:
+                        batch.requests.remove(request)
+                if withdrawn:
+                    return 503, {"message": "La commande n'a pas pu être traitée à temps, réessayez."}
+                # Le meneur traite déjà le lot : la commande peut être validée, on attend son résultat
+                # plutôt que d'inviter le client à la repasser (doublon)
+                batch.done.wait()
+            return request.result
+
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+            batch.started = True
+            requests = list(batch.requests)
+        try:
+            fallbacks = place_orders(requests)
+            with self._lock:
+                self.stats['orders'] += len(requests)
+                self.stats['batches'] += 1
+                self.stats['fallbacks'] += fallbacks
+        finally:
+            for pending in requests:
+                if pending.result is None:
+                    pending.result = (500, {"message": "Une erreur est survenue lors de la création de la commande."})
+            batch.done.set()
+        return request.result
+
+
+def place_orders(requests):
+    """Crée les commandes d'un lot dans une seule transaction ; fixe le résultat de chaque requête.
+
+    Une commande refusée (stock insuffisant, produit inconnu) est écartée avant toute
+    écriture et n'affecte pas les autres : chaque commande voit le stock laissé par les
+    précédentes du lot. Si la validation du lot échoue, chaque commande est rejouée seule.
+    Retourne le nombre de commandes rejouées ainsi.
+    """
+    placed, touched = [], set()
+    try:
+        for request in requests:
+            order = Order(user_id=request.user_id, order_date=datetime.now(timezone.utc),
+                          **{field: request.data[field] for field in SHIPPING_FIELDS})
+            try:
+                touched.update(fill_order(order, request.data['items']))
+            except OrderRejected as e:
+                request.result = (400, {"message": str(e)})
+                continue
+            db.session.add(order)
+            placed.append((request, order))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(requests) == 1:
+            requests[0].result = (500, {"message": "Une erreur est survenue lors de la création de la commande.", "error": str(e)})
+            return 0
+        for request in requests:
+            request.result = None
+            place_orders([request])
+        return len(requests)
+
+    for request, order in placed:
+        request.result = (201, {"message": "Commande créée avec succès", "order_id": order.id})
+    if touched:
+        notify_products_changed(list(touched))
+    return 0
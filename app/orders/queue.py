@@ -0,0 +1,192 @@
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_, select, update
+from ..models import Order, OrderJob
+from ..extensions import db
+from ..signals import notify_products_changed
+from .service import OrderRejected, fill_order
+from .sharding import commit_with_catalog, insert_sharded_order, session_for_order, session_for_user
+
+job_table = OrderJob.__table__
+
+
+def enqueue_order(order, items):
+    """Enregistre une commande en attente (statut 'queued', sans lignes) et sa demande dans la file.
+
+    La commande existe dès la réponse : son ID sert d'URL de suivi. Le stock n'est réservé
+    qu'au traitement par un worker.
+    """
+    order.status = 'queued'
+    order.total_amount = 0
+    session = session_for_user(order.user_id)
+    if session is db.session:
+        db.session.add(order)
+        db.session.flush()
+    else:
+        insert_sharded_order(session, order)
+    job = OrderJob(order_id=order.id, payload=json.dumps(items))
+    db.session.add(job)
+
+    def undo():
+        session.delete(order)
+    commit_with_catalog(session, undo)
+    return job
+
+
+def claim_jobs(batch_size, lease_seconds, max_attempts, worker_id):
+    """Réserve jusqu'à `batch_size` demandes pour `worker_id` pendant `lease_seconds` secondes.
+
+    Sont réservables les demandes en attente dont le délai de nouvel essai est écoulé, et les
+    demandes dont la réservation a expiré (worker arrêté en cours de traitement) : la livraison
+    est au moins une fois. Chaque réservation compte comme un essai.
+    """
+    now = datetime.now(timezone.utc)
+    claimable = or_(
+        and_(job_table.c.status == 'queued', job_table.c.available_at <= now),
+        and_(job_table.c.status == 'processing', job_table.c.locked_until < now),
+    )
+    candidates = (
+        select(job_table.c.id)
+        .where(claimable, job_table.c.attempts < max_attempts)
+        .order_by(job_table.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    # La condition est répétée dans l'UPDATE : deux workers ne peuvent pas réserver la même demande
+    db.session.execute(
+        update(job_table)
+        .where(job_table.c.id.in_(candidates.scalar_subquery()), claimable)
+        .values(status='processing', locked_by=worker_id, locked_until=now + timedelta(seconds=lease_seconds),
+                attempts=job_table.c.attempts + 1)
+    )
+    db.session.commit()
+    return db.session.execute(
+        select(OrderJob).where(OrderJob.locked_by == worker_id, OrderJob.status == 'processing').order_by(OrderJob.id)
+    ).scalars().all()
+
+
+def dead_letter_expired(max_attempts):
+    """Abandonne les demandes réservées dont la réservation a expiré après le dernier essai autorisé."""
+    now = datetime.now(timezone.utc)
+    jobs = db.session.execute(
+        select(OrderJob).where(OrderJob.status == 'processing', OrderJob.locked_until < now,
+                               OrderJob.attempts >= max_attempts)
+    ).scalars().all()
+    for job in jobs:
+        _dead_letter(job, "Réservation expirée après le dernier essai")
+    return len(jobs)
+
+
+def _update_held_job(job_id, worker_id, **values):
+    """Met à jour une demande si `worker_id` la détient encore ; retourne False si sa réservation
+    a expiré et qu'un autre worker l'a reprise (son état n'est alors pas écrasé)."""
+    result = db.session.execute(
+        update(job_table).where(job_table.c.id == job_id, job_table.c.locked_by == worker_id).values(**values)
+    )
+    return result.rowcount == 1
+
+
+def _dead_letter(job, error):
+    if not _update_held_job(job.id, job.locked_by, status='dead', last_error=error, locked_by=None):
+        db.session.rollback()
+        return
+    session = session_for_order(job.order_id)
+    failed = session.execute(
+        update(Order).where(Order.id == job.order_id, Order.status == 'queued').values(status='failed')
+    )
+    if failed.rowcount:
+        session.commit()
+    db.session.commit()
+
+
+def process_job(job):
+    """Traite une demande réservée : la commande passe à 'pending' (stock réservé) ou 'rejected'.
+
+    Idempotent : une commande qui n'est plus 'queued' (déjà traitée lors d'une livraison
+    précédente, ou annulée entre-temps) n'est pas modifiée. La commande est prise par un
+    UPDATE conditionnel : si la réservation de la demande a expiré et qu'un second worker la
+    traite en même temps, un seul des deux réserve le stock (l'autre attend le verrou de la
+    ligne, puis ne la trouve plus 'queued').
+    """
+    job_id, worker_id, payload = job.id, job.locked_by, job.payload
+    session = session_for_order(job.order_id)
+    claimed = session.execute(
+        update(Order).where(Order.id == job.order_id, Order.status == 'queued').values(status='processing')
+    )
+    if claimed.rowcount != 1:
+        session.rollback()
+        _update_held_job(job_id, worker_id, status='done', locked_by=None)
+        db.session.commit()
+        return None
+    order = session.get(Order, job.order_id, populate_existing=True)
+
+    products, error = {}, None
+    try:
+        products = fill_order(order, json.loads(payload))
+        order.status = 'pending'
+    except OrderRejected as e:
+        order.status = 'rejected'
+        error = str(e)
+    _update_held_job(job_id, worker_id, status='done', locked_by=None, last_error=error)
+
+    def undo():
+        order.items.clear()
+        order.status, order.total_amount = 'queued', 0
+    commit_with_catalog(session, undo)
+    if products:
+        notify_products_changed(list(products))
+    return order.status
+
+
+def fail_job(job_id, order_id, worker_id, error, max_attempts, retry_delay):
+    """Après une erreur : nouvel essai différé (délai doublé à chaque essai) ou abandon définitif.
+
+    Sans effet si la réservation de `worker_id` a expiré entre-temps : la demande appartient
+    alors à un autre worker.
+    """
+    db.session.rollback()
+    session_for_order(order_id).rollback()
+    job = db.session.get(OrderJob, job_id)
+    if job.locked_by != worker_id:
+        return 'lost'
+    if job.attempts >= max_attempts:
+        _dead_letter(job, error)
+        return 'dead'
+    available_at = datetime.now(timezone.utc) + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+    if not _update_held_job(job_id, worker_id, status='queued', locked_by=None, last_error=error, available_at=available_at):
+        db.session.rollback()
+        return 'lost'
+    db.session.commit()
+    return 'queued'
+
+
+def drain_queue(batch_size, lease_seconds, max_attempts, retry_delay, worker_id=None):
+    """Traite un lot de demandes ; retourne le nombre de demandes par issue (pending, rejected, queued, dead...)."""
+    worker_id = worker_id or uuid.uuid4().hex
+    outcomes = {}
+    dead = dead_letter_expired(max_attempts)
+    if dead:
+        outcomes['dead'] = dead
+    for job in claim_jobs(batch_size, lease_seconds, max_attempts, worker_id):
+        job_id, order_id = job.id, job.order_id
+        try:
+            outcome = process_job(job) or 'skipped'
+        except Exception as e:
+            outcome = fail_job(job_id, order_id, worker_id, f'{type(e).__name__}: {e}', max_attempts, retry_delay)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
+
+
+def run_worker(batch_size, lease_seconds, max_attempts, retry_delay, poll_interval, once=False, log=print):
+    """Boucle d'un worker : vide la file par lots, puis attend `poll_interval` secondes quand elle est vide."""
+    worker_id = uuid.uuid4().hex
+    while True:
+        outcomes = drain_queue(batch_size, lease_seconds, max_attempts, retry_delay, worker_id=worker_id)
+        if outcomes:
+            log(', '.join(f'{count} {outcome}' for outcome, count in sorted(outcomes.items())))
+        if once:
+            return outcomes
+        if not outcomes:
+            time.sleep(poll_interval)
@@ -1,8 +1,23 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime, timezone
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import Order, OrderItem, Product, User
+from ..models import ArchivedOrder, Order, OrderItem, Product, User
 from ..extensions import db
 from ..decorators import admin_required
+from ..validation import validate_json
+from .schemas import SHIPPING_FIELDS, order_schema, order_status_schema, quote_schema
+from .service import OrderRejected, fill_order, load_products, price_items
+from .queue import enqueue_order
+from sqlalchemy import select
+from .archive import find_order
+from .sharding import (commit_with_catalog, insert_sharded_order, order_sessions, page_orders, session_for_order,
+                       session_for_user)
+from ..signals import notify_products_changed
+from ..products.related import record_order_pairs
+from ..analytics.rollups import record_sales
+from .stats import UNCOUNTED_STATUSES, order_stats, record_order_stats
+from ..products.stripes import release_striped
+from ..products.availability import read_stock
 
 # Créer le Blueprint pour les commandes
 orders_bp = Blueprint('orders', __name__)
@@ -33,91 +48,151 @@ def get_orders():
     # Récupérer l'utilisateur actuel pour vérifier son rôle
     current_user_id_str = get_jwt_identity()
     current_user = db.session.get(User, int(current_user_id_str))
-    
-    if current_user and current_user.role == 'admin':
-        orders = Order.query.all() # Les administrateurs voient toutes les commandes
-    else:
-        orders = Order.query.filter_by(user_id=int(current_user_id_str)).all() # Les clients voient leurs propres commandes
+    is_admin = current_user and current_user.role == 'admin'
+
+    # Les administrateurs voient toutes les commandes (tous les shards), les clients les leurs (leur shard)
+    sessions = order_sessions() if is_admin else [session_for_user(current_user_id_str)]
+    owner_id = None if is_admin else int(current_user_id_str)
+
+    # Pagination par curseur (?cursor=, vide pour la première page) : les plus récentes d'abord
+    if 'cursor' in request.args:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), current_app.config['ORDERS_PAGE_MAX_SIZE'])
+        try:
+            orders, next_cursor = page_orders(sessions, limit, request.args['cursor'], user_id=owner_id)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return jsonify({"orders": [serialize_order(order) for order in orders], "next_cursor": next_cursor}), 200
+
+    # Les commandes archivées ne sont listées que sur demande (?include_archived=true)
+    models = [Order]
+    if request.args.get('include_archived', '').lower() in ('1', 'true', 'yes', 'oui'):
+        models.append(ArchivedOrder)
+
+    orders = []
+    for session in sessions:
+        for model in models:
+            statement = select(model)
+            if owner_id is not None:
+                statement = statement.where(model.user_id == owner_id)
+            orders += session.execute(statement).scalars().all()
     return jsonify([serialize_order(order) for order in orders]), 200
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
 def get_order(order_id):
     """Récupère une commande spécifique par son ID."""
+    order = _find_visible_order(order_id)
+    if order is None:
+        abort(404)
+
+    return jsonify(serialize_order(order)), 200
+
+def _find_visible_order(order_id):
+    """Commande (active ou archivée) visible par l'utilisateur du JWT, ou None.
+
+    L'admin peut voir n'importe quelle commande (shard désigné par l'ID), un client
+    seulement les siennes (son shard).
+    """
     current_user_id_str = get_jwt_identity()
     current_user = db.session.get(User, int(current_user_id_str))
-
     if current_user and current_user.role == 'admin':
-        # L'admin peut voir n'importe quelle commande
-        order = db.get_or_404(Order, order_id)
-    else:
-        # Un client ne peut voir que ses propres commandes
-        order = Order.query.filter_by(id=order_id, user_id=int(current_user_id_str)).first_or_404()
-    
-    return jsonify(serialize_order(order)), 200
+        return find_order(order_id, session=session_for_order(order_id))
+    return find_order(order_id, user_id=int(current_user_id_str), session=session_for_user(current_user_id_str))
 
 @orders_bp.route('/', methods=['POST'])
 @jwt_required()
+@validate_json(order_schema)
 def create_order():
     """Crée une nouvelle commande."""
     data = request.get_json()
     current_user_id = get_jwt_identity()
-    
-    required_fields = ['items', 'shipping_address', 'shipping_city', 'shipping_postal_code', 'shipping_country']
-    if not data or not all(field in data for field in required_fields):
-        return jsonify({"message": "Données de commande invalides"}), 400
-
-    total_amount = 0
-    order_items_to_create = []
 
     # Extraire les informations d'adresse
-    shipping_address = data['shipping_address']
-    shipping_city = data['shipping_city']
-    shipping_postal_code = data['shipping_postal_code']
-    shipping_country = data['shipping_country']
+    shipping = {field: data[field] for field in SHIPPING_FIELDS}
+    new_order = Order(user_id=current_user_id, order_date=datetime.now(timezone.utc), **shipping)
+
+    # Mode asynchrone : la demande est mise en file et traitée par un worker (flask process-order-queue)
+    if current_app.config['ORDER_QUEUE_ENABLED']:
+        try:
+            enqueue_order(new_order, data['items'])
+        except Exception as e:
+            db.session.rollback()
+            session_for_user(current_user_id).rollback()
+            return jsonify({"message": "Une erreur est survenue lors de la création de la commande.", "error": str(e)}), 500
+        status_url = url_for('orders.get_order', order_id=new_order.id)
+        response = jsonify({"message": "Commande en attente de traitement", "order_id": new_order.id,
+                            "status": new_order.status, "status_url": status_url})
+        response.headers['Location'] = status_url
+        return response, 202
+
+    # Group commit : les commandes simultanées partagent une transaction (base principale uniquement)
+    if current_app.config['ORDER_GROUP_COMMIT_ENABLED'] and session_for_user(current_user_id) is db.session:
+        status, body = current_app.extensions['order_committer'].submit(current_user_id, data)
+        return jsonify(body), status
 
     try:
-        for item_data in data['items']:
-            product = db.session.get(Product, item_data['product_id'])
-            quantity_requested = item_data.get('quantity', 1)
-            if not product or product.stock < quantity_requested:
-                # Un rollback n'est pas nécessaire ici car aucune modification n'a été faite à la session
-                return jsonify({"message": f"Produit {item_data['product_id']} non disponible ou stock insuffisant"}), 400
-            
-            total_amount += product.price * quantity_requested
-            product.stock -= quantity_requested # Décrémenter le stock
-            order_items_to_create.append(OrderItem(product_id=product.id, quantity=quantity_requested, price_at_order=product.price))
-
-        new_order = Order(
-            user_id=current_user_id, 
-            total_amount=total_amount,
-            shipping_address=shipping_address,
-            shipping_city=shipping_city,
-            shipping_postal_code=shipping_postal_code,
-            shipping_country=shipping_country
-        )
-        new_order.items.extend(order_items_to_create)
-
-        db.session.add(new_order)
-        db.session.commit()
+        try:
+            products = fill_order(new_order, data['items'])
+        except OrderRejected as e:
+            # Un rollback n'est pas nécessaire ici car aucune modification n'a été faite à la session
+            return jsonify({"message": str(e)}), 400
+
+        # La commande est écrite sur le shard de l'utilisateur (la base principale sans partitionnement)
+        session = session_for_user(current_user_id)
+        if session is db.session:
+            db.session.add(new_order)
+        else:
+            insert_sharded_order(session, new_order)
+
+        def undo():
+            session.delete(new_order)
+        commit_with_catalog(session, undo)
+        notify_products_changed(list(products))
 
         return jsonify({"message": "Commande créée avec succès", "order_id": new_order.id}), 201
     except Exception as e:
         db.session.rollback()
+        session_for_user(current_user_id).rollback()
         return jsonify({"message": "Une erreur est survenue lors de la création de la commande.", "error": str(e)}), 500
 
+@orders_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def get_orders_summary():
+    """Statistiques de commandes de l'utilisateur connecté (ou de `user_id` pour un administrateur)."""
+    current_user_id = int(get_jwt_identity())
+    user_id = request.args.get('user_id', current_user_id, type=int)
+    if user_id != current_user_id:
+        current_user = db.session.get(User, current_user_id)
+        if not current_user or current_user.role != 'admin':
+            return jsonify({"message": "Accès réservé aux administrateurs"}), 403
+        db.get_or_404(User, user_id)
+    return jsonify(order_stats(user_id)), 200
+
+@orders_bp.route('/quote', methods=['POST'])
+@jwt_required()
+@validate_json(quote_schema)
+def quote_order():
+    """Calcule un devis pour un panier sans rien modifier (prix, disponibilité par ligne)."""
+    data = request.get_json()
+    products = load_products(item_data['product_id'] for item_data in data['items'])
+    # Disponibilité indicative : instantané du stock partagé (la commande relit la base sous verrou)
+    stock, _ = read_stock(list(products))
+    lines = price_items(data['items'], products, stock)
+
+    return jsonify({
+        "lines": lines,
+        "total_amount": sum(line['line_total'] for line in lines if line['available']),
+        "orderable": all(line['available'] for line in lines)
+    }), 200
+
 @orders_bp.route('/<int:order_id>/lignes', methods=['GET'])
 @jwt_required()
 def get_order_items(order_id):
     """Consulte les lignes d'une commande spécifique."""
-    current_user_id_str = get_jwt_identity()
-    current_user = db.session.get(User, int(current_user_id_str))
+    order = _find_visible_order(order_id)
+    if order is None:
+        abort(404)
 
-    if current_user and current_user.role == 'admin':
-        order = db.get_or_404(Order, order_id)
-    else:
-        order = Order.query.filter_by(id=order_id, user_id=int(current_user_id_str)).first_or_404()
-    
     items = [{
         'product_id': item.product_id,
         'quantity': item.quantity,
@@ -128,28 +203,46 @@ def get_order_items(order_id):
 
 @orders_bp.route('/<int:order_id>', methods=['PATCH'])
 @admin_required()
+@validate_json(order_status_schema)
 def update_order_status(order_id):
     """Met à jour le statut d'une commande (Admin uniquement)."""
-    order = db.get_or_404(Order, order_id)
-    data = request.get_json()
-
-    if not data or 'status' not in data:
-        return jsonify({"message": "Le statut est requis"}), 400
-
-    new_status = data['status']
-    allowed_statuses = ['pending', 'validated', 'shipped', 'cancelled']
-
-    if new_status not in allowed_statuses:
-        return jsonify({"message": f"Statut invalide. Les statuts autorisés sont : {', '.join(allowed_statuses)}"}), 400
-
-    # Si la commande est annulée, réintégrer le stock
-    if new_status == 'cancelled' and order.status != 'cancelled':
+    session = session_for_order(order_id)
+    order = session.get(Order, order_id)
+    if order is None:
+        abort(404)
+    new_status = request.get_json()['status']
+
+    # Une commande qui n'a jamais compté (aucun stock réservé) ne peut pas devenir active : la repasser
+    # en attente puis l'annuler rendrait un stock jamais pris. Seule l'annulation d'une commande en file
+    # reste possible ; une commande en cours de traitement appartient au worker
+    if order.status != new_status and (order.status == 'processing' or (
+            order.status in UNCOUNTED_STATUSES and (order.status, new_status) != ('queued', 'cancelled'))):
+        return jsonify({"message": f"Impossible de passer une commande '{order.status}' au statut '{new_status}'"}), 409
+
+    # Si la commande est annulée, réintégrer le stock. Une commande qui n'a jamais compté (en file,
+    # refusée, échouée : aucun stock réservé) n'a rien à rendre ni à retirer des statistiques
+    restocked_ids = []
+    if new_status == 'cancelled' and order.status not in UNCOUNTED_STATUSES:
         for item in order.items:
             product = db.session.get(Product, item.product_id)
-            if product:
+            if product and product.stock_stripes:
+                release_striped(product.id, item.quantity, product.stock_stripes)
+            elif product:
                 product.stock += item.quantity
+            if product:
+                restocked_ids.append(product.id)
+        # Une commande annulée ne compte plus dans les associations de produits, les ventes ni les statistiques
+        record_order_pairs([item.product_id for item in order.items], delta=-1)
+        record_sales(order, sign=-1)
+        record_order_stats(order, sign=-1, session=session)
 
+    previous_status = order.status
     order.status = new_status
-    db.session.commit()
+
+    def undo():
+        order.status = previous_status
+    commit_with_catalog(session, undo)
+    if restocked_ids:
+        notify_products_changed(restocked_ids)
 
     return jsonify(serialize_order(order)), 200
@@ -0,0 +1,27 @@
+from ..validation import Integer, List, Object, Schema, String
+
+SHIPPING_FIELDS = ('shipping_address', 'shipping_city', 'shipping_postal_code', 'shipping_country')
+
+# Statuts qu'un administrateur peut donner à une commande
+ORDER_STATUSES = ('pending', 'validated', 'shipped', 'cancelled')
+
+order_item = Object({
+    'product_id': Integer(required=True, minimum=1),
+    'quantity': Integer(minimum=1),
+})
+
+order_schema = Schema({
+    'items': List(order_item, required=True, min_items=1, max_items='ORDER_MAX_ITEMS'),
+    'shipping_address': String(required=True, min_length=1, max_length=255),
+    'shipping_city': String(required=True, min_length=1, max_length=100),
+    'shipping_postal_code': String(required=True, min_length=1, max_length=20),
+    'shipping_country': String(required=True, min_length=1, max_length=100),
+})
+
+quote_schema = Schema({
+    'items': List(order_item, required=True, min_items=1, max_items='ORDER_MAX_ITEMS'),
+})
+
+order_status_schema = Schema({
+    'status': String(required=True, choices=ORDER_STATUSES),
+})
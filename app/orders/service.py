@@ -0,0 +1,99 @@
+from ..models import OrderItem, Product
+from ..products.related import record_order_pairs
+from ..analytics.rollups import record_sales
+from .stats import record_order_stats
+from ..products.stripes import available_stock, release_striped, reserve_striped
+
+
+def load_products(product_ids, lock=False):
+    """Charge en une seule requête tous les produits d'un panier, indexés par ID."""
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    query = Product.query.filter(Product.id.in_(ids))
+    if not lock:
+        return {product.id: product for product in query}
+    # Verrouille les lignes de stock jusqu'au commit (sans effet sous SQLite) ; un produit au
+    # stock réparti n'est pas verrouillé, ses sous-compteurs le sont au prélèvement
+    products = {product.id: product for product in query.filter(Product.stock_stripes == 0).with_for_update()}
+    if len(products) < len(ids):
+        products.update({product.id: product for product in query.filter(Product.stock_stripes > 0)})
+    return products
+
+
+def price_items(items, products, stock=None):
+    """Applique les règles de tarification et de disponibilité d'une commande.
+
+    Retourne une ligne par article demandé. Le stock restant est décompté au fil des
+    lignes, de sorte qu'un même produit présent deux fois est vérifié sur le cumul.
+    Ces règles sont partagées par `create_order` et le devis `POST /api/orders/quote`.
+    `stock` (par ID) remplace le stock des produits, voir `available_stock`.
+    """
+    if stock is None:
+        stock = {product_id: product.stock for product_id, product in products.items()}
+    remaining_stock = dict(stock)
+    lines = []
+    for item_data in items:
+        product_id = item_data['product_id']
+        quantity = item_data.get('quantity', 1)
+        product = products.get(product_id)
+        available = product is not None and remaining_stock[product_id] >= quantity
+        if available:
+            remaining_stock[product_id] -= quantity
+        lines.append({
+            'product_id': product_id,
+            'quantity': quantity,
+            'unit_price': product.price if product else None,
+            'line_total': product.price * quantity if available else None,
+            'available': available,
+            'stock': stock[product_id] if product else 0
+        })
+    return lines
+
+
+class OrderRejected(Exception):
+    """Commande refusée : produit inconnu ou stock insuffisant."""
+
+
+def fill_order(order, items):
+    """Réserve le stock des articles demandés et ajoute les lignes à `order`, dans la transaction en cours.
+
+    Met aussi à jour l'index « souvent achetés ensemble », les agrégats de ventes et les
+    statistiques de l'utilisateur. Lève
+    OrderRejected, sans rien modifier, si un article n'est pas disponible. Retourne les
+    produits touchés, indexés par ID. Partagé par `create_order` et le worker de la file.
+    """
+    # Une seule requête pour tous les produits du panier
+    products = load_products((item_data['product_id'] for item_data in items), lock=True)
+    lines = price_items(items, products, available_stock(products))
+    for line in lines:
+        if not line['available']:
+            raise OrderRejected(f"Produit {line['product_id']} non disponible ou stock insuffisant")
+
+    # Stock réparti : prélèvements conditionnels, qui peuvent échouer face à une commande
+    # concurrente ; ils passent en premier et sont rendus en cas d'échec
+    reserved = []
+    for line in lines:
+        product = products[line['product_id']]
+        if not product.stock_stripes:
+            continue
+        if not reserve_striped(product.id, line['quantity']):
+            for product_id, quantity, count in reserved:
+                release_striped(product_id, quantity, count)
+            raise OrderRejected(f"Produit {product.id} non disponible ou stock insuffisant")
+        reserved.append((product.id, line['quantity'], product.stock_stripes))
+
+    total_amount = 0
+    for line in lines:
+        product = products[line['product_id']]
+        total_amount += line['line_total']
+        if not product.stock_stripes:
+            product.stock -= line['quantity'] # Décrémenter le stock
+        order.items.append(OrderItem(product_id=product.id, quantity=line['quantity'], price_at_order=line['unit_price']))
+    order.total_amount = total_amount
+
+    # Index « souvent achetés ensemble », agrégats de ventes et statistiques de l'utilisateur mis à jour avec le stock
+    record_order_pairs(products)
+    record_sales(order)
+    record_order_stats(order)
+    return products
@@ -0,0 +1,185 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from flask import current_app, g
+from sqlalchemy import Column, Integer, MetaData, Table, func, insert, inspect, select, tuple_, union_all, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.schema import CreateIndex, CreateTable
+from ..models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from ..extensions import db
+
+# Tables du sous-système des commandes : présentes sur chaque shard quand le partitionnement est actif
+ORDER_TABLES = tuple(model.__table__ for model in (Order, OrderItem, ArchivedOrder, ArchivedOrderItem))
+
+# Dernier ID de commande attribué par un shard : une ligne, sur le shard lui-même (hors de la base principale)
+order_id_counter = Table(
+    'order_id_counter', MetaData(),
+    Column('shard', Integer, primary_key=True),
+    Column('last_id', Integer, nullable=False),
+)
+
+
+def bind_key(index):
+    return f'order_shard_{index}'
+
+
+def configure_shards(app):
+    """Déclare un bind SQLAlchemy par shard de commandes (ORDER_SHARDS) ; à appeler avant db.init_app."""
+    shards = app.config['ORDER_SHARDS']
+    if shards:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.update({bind_key(index): url for index, url in enumerate(shards)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+    app.teardown_appcontext(close_shard_sessions)
+
+
+def shard_count():
+    """Nombre de shards de commandes ; 0 si les commandes sont dans la base principale."""
+    return len(current_app.config['ORDER_SHARDS'])
+
+
+def shard_for_user(user_id):
+    """Shard d'un utilisateur : toutes ses commandes et leurs lignes y sont stockées."""
+    return int(user_id) % shard_count()
+
+
+def shard_for_order(order_id):
+    """Shard d'une commande : les IDs sont attribués par pas de N, donc `order_id % N` désigne son shard."""
+    return int(order_id) % shard_count()
+
+
+def shard_session(index):
+    """Session du shard `index`, une par contexte d'application (fermée en fin de requête)."""
+    sessions = g.setdefault('order_shard_sessions', {})
+    if index not in sessions:
+        sessions[index] = Session(bind=db.engines[bind_key(index)])
+    return sessions[index]
+
+
+def close_shard_sessions(exception=None):
+    for session in g.pop('order_shard_sessions', {}).values():
+        session.close()
+
+
+def session_for_user(user_id):
+    """Session où lire et écrire les commandes d'un utilisateur."""
+    return shard_session(shard_for_user(user_id)) if shard_count() else db.session
+
+
+def session_for_order(order_id):
+    """Session où se trouve la commande `order_id`."""
+    return shard_session(shard_for_order(order_id)) if shard_count() else db.session
+
+
+def order_sessions():
+    """Toutes les sessions qui contiennent des commandes (la base principale ou chaque shard)."""
+    if not shard_count():
+        return [db.session]
+    return [shard_session(index) for index in range(shard_count())]
+
+
+def next_order_id(session, user_id):
+    """Prochain ID de commande du shard de l'utilisateur : IDs congrus au numéro du shard modulo N.
+
+    Les IDs restent uniques sur l'ensemble des shards, et l'ID suffit à retrouver le shard.
+    Le compteur du shard est incrémenté dans la transaction de la commande : sa ligne reste
+    verrouillée jusqu'au commit, et deux insertions concurrentes obtiennent des IDs distincts.
+    """
+    count, shard = shard_count(), shard_for_user(user_id)
+    result = session.execute(
+        update(order_id_counter).where(order_id_counter.c.shard == shard).values(last_id=order_id_counter.c.last_id + count)
+    )
+    if result.rowcount != 1:
+        raise RuntimeError(f"Compteur d'IDs absent du shard {shard} : lancez `flask init-order-shards`")
+    return session.execute(select(order_id_counter.c.last_id).where(order_id_counter.c.shard == shard)).scalar_one()
+
+
+def insert_sharded_order(session, order):
+    """Insère `order` (et ses lignes) dans la session de son shard avec un ID de la séquence du shard."""
+    order.id = next_order_id(session, order.user_id)
+    session.add(order)
+    session.flush()
+
+
+def create_shard_schema(engine, shard):
+    """Crée les tables des commandes sur le shard `shard` (sans les clés étrangères vers la base principale).
+
+    Le compteur d'IDs part du numéro du shard (premier ID attribué : `shard + N`, jamais 0) ou,
+    si la base contient déjà des commandes, de la première valeur congrue au shard modulo N
+    qui n'est pas inférieure au plus grand ID présent.
+    """
+    names = {table.name for table in ORDER_TABLES}
+    with engine.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        for table in ORDER_TABLES:
+            if table.name in existing:
+                continue
+            local_keys = [fk for fk in table.foreign_key_constraints if fk.referred_table.name in names]
+            connection.execute(CreateTable(table, include_foreign_key_constraints=local_keys))
+            for index in table.indexes:
+                connection.execute(CreateIndex(index))
+
+        order_id_counter.create(connection, checkfirst=True)
+        if connection.execute(select(order_id_counter.c.shard).where(order_id_counter.c.shard == shard)).first() is None:
+            latest = union_all(select(func.max(Order.id)), select(func.max(ArchivedOrder.id))).subquery()
+            current = connection.execute(select(func.max(latest.c[0]))).scalar()
+            last_id = shard if current is None else current + (shard - current) % shard_count()
+            connection.execute(insert(order_id_counter).values(shard=shard, last_id=last_id))
+
+
+def commit_with_catalog(session, undo):
+    """Valide une écriture de commandes et les écritures liées de la base principale (stock, agrégats).
+
+    Sans partitionnement, tout tient dans une seule transaction. Avec, il y en a deux : le shard
+    d'abord, puis la base principale ; si la seconde échoue, `undo()` compense la première
+    dans le shard avant que l'erreur ne soit propagée.
+    """
+    if session is db.session:
+        db.session.commit()
+        return
+    session.commit()
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        undo()
+        session.commit()
+        raise
+
+
+def encode_order_cursor(order):
+    return base64.urlsafe_b64encode(json.dumps([order.order_date.isoformat(), order.id]).encode()).decode().rstrip('=')
+
+
+def decode_order_cursor(cursor):
+    try:
+        order_date, order_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(order_date), int(order_id)
+    except (ValueError, TypeError):
+        raise ValueError("Curseur de pagination invalide")
+
+
+def page_orders(sessions, limit, cursor=None, user_id=None):
+    """Une page de commandes, les plus récentes d'abord, rassemblée depuis plusieurs sessions (shards).
+
+    Chaque shard renvoie au plus `limit + 1` commandes après le curseur, lues dans l'ordre de
+    l'index (order_date, id) ; la fusion de ces listes triées garde les `limit` premières.
+    Retourne (commandes, curseur suivant ou None).
+    """
+    statement = (
+        select(Order)
+        .options(selectinload(Order.items))
+        .order_by(Order.order_date.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
+    if user_id is not None:
+        statement = statement.where(Order.user_id == user_id)
+    if cursor:
+        statement = statement.where(tuple_(Order.order_date, Order.id) < decode_order_cursor(cursor))
+
+    pages = [session.execute(statement).scalars().all() for session in sessions]
+    merged = list(islice(heapq.merge(*pages, key=lambda order: (order.order_date, order.id), reverse=True), limit + 1))
+    orders = merged[:limit]
+    return orders, encode_order_cursor(orders[-1]) if len(merged) > limit else None
@@ -0,0 +1,99 @@
+import time
+from sqlalchemy import case, delete, func, insert, select, update
+from ..models import User, UserOrderStats
+from ..extensions import db
+from ..bulk import chunked
+from .archive import order_headers
+from .sharding import order_sessions
+
+stats_table = UserOrderStats.__table__
+
+# Commandes qui ne comptent pas : annulées, ou jamais passées (en file, refusées, échouées)
+UNCOUNTED_STATUSES = ('cancelled', 'queued', 'rejected', 'failed')
+
+
+def _last_order_date(session, user_id, excluded_id):
+    """Date de la dernière commande comptée de l'utilisateur, hors `excluded_id` (index (user_id, order_date))."""
+    headers = order_headers()
+    return session.connection().execute(
+        select(func.max(headers.c.order_date))
+        .where(headers.c.user_id == user_id, headers.c.id != excluded_id, headers.c.status.not_in(UNCOUNTED_STATUSES))
+    ).scalar()
+
+
+def record_order_stats(order, sign=1, session=None):
+    """Reporte une commande dans les statistiques de son utilisateur, dans la transaction en cours.
+
+    `sign=-1` retire une commande annulée ; `session` est alors celle de la base de la commande
+    (son shard), pour retrouver la date de la dernière commande restante.
+    """
+    if order.order_date is None:
+        db.session.flush() # La date de commande est fixée à l'insertion
+    user_id = int(order.user_id)
+    values = {
+        'order_count': stats_table.c.order_count + sign,
+        'total_spent': stats_table.c.total_spent + sign * order.total_amount,
+    }
+    last = stats_table.c.last_order_date
+    if sign > 0:
+        values['last_order_date'] = case((last.is_(None) | (last < order.order_date), order.order_date), else_=last)
+    else:
+        current = db.session.execute(select(last).where(stats_table.c.user_id == user_id)).scalar()
+        if current is not None and current <= order.order_date.replace(tzinfo=None):
+            values['last_order_date'] = _last_order_date(session or db.session, user_id, order.id)
+
+    updated = db.session.execute(update(stats_table).where(stats_table.c.user_id == user_id).values(**values)).rowcount
+    if not updated and sign > 0:
+        # Utilisateur antérieur aux statistiques (sa ligne est créée à l'inscription ou par la réconciliation)
+        db.session.execute(insert(stats_table).values(user_id=user_id, order_count=1, total_spent=order.total_amount,
+                                                      last_order_date=order.order_date))
+
+
+def order_stats(user_id):
+    """Statistiques de commandes d'un utilisateur (zéro commande s'il n'a pas encore de ligne)."""
+    stats = db.session.get(UserOrderStats, user_id)
+    return {
+        'user_id': user_id,
+        'order_count': stats.order_count if stats else 0,
+        'total_spent': round(stats.total_spent, 2) if stats else 0.0,
+        'last_order_date': stats.last_order_date.isoformat() if stats and stats.last_order_date else None,
+    }
+
+
+def rebuild_order_stats(chunk_size=10_000):
+    """Recalcule les statistiques de tous les utilisateurs à partir des commandes, archives comprises.
+
+    Une seule requête groupée par base de commandes (un shard ne contient que ses utilisateurs) ;
+    les utilisateurs sans commande reçoivent une ligne à zéro.
+    """
+    started = time.perf_counter()
+    headers = order_headers()
+    statement = (
+        select(headers.c.user_id, func.count(), func.sum(headers.c.total_amount), func.max(headers.c.order_date))
+        .where(headers.c.status.not_in(UNCOUNTED_STATUSES))
+        .group_by(headers.c.user_id)
+    )
+    totals = {}
+    for session in order_sessions():
+        for user_id, count, spent, last in session.connection().execute(statement):
+            totals[user_id] = (count, spent or 0.0, last)
+    loaded = time.perf_counter()
+
+    # Les commandes d'un utilisateur supprimé sont écartées, comme par une jointure
+    user_ids = db.session.execute(select(User.id)).scalars().all()
+    db.session.execute(delete(stats_table))
+
+    def rows():
+        for user_id in user_ids:
+            count, spent, last = totals.get(user_id, (0, 0.0, None))
+            yield {'user_id': user_id, 'order_count': count, 'total_spent': spent, 'last_order_date': last}
+    for chunk in chunked(rows(), chunk_size):
+        db.session.execute(insert(stats_table), chunk)
+    db.session.commit()
+
+    return {
+        'users': len(user_ids),
+        'with_orders': sum(1 for user_id in user_ids if user_id in totals),
+        'load_seconds': round(loaded - started, 3),
+        'write_seconds': round(time.perf_counter() - loaded, 3),
+    }
@@ -0,0 +1,94 @@
+from flask import current_app
+from sqlalchemy import select
+from ..models import Product
+from ..extensions import db
+from ..signals import products_changed
+from .stripes import stripe_totals
+
+
+def load_stock(product_ids=None):
+    """Stock disponible lu en base : {id: stock}, pour les produits demandés ou tout le catalogue (None).
+
+    Le stock d'un produit réparti est la somme de ses sous-compteurs.
+    """
+    statement = select(Product.id, Product.stock, Product.stock_stripes)
+    if product_ids is not None:
+        statement = statement.where(Product.id.in_(set(product_ids)))
+    stock, striped = {}, []
+    for product_id, quantity, stripes in db.session.execute(statement):
+        stock[product_id] = quantity
+        if stripes:
+            striped.append(product_id)
+    if striped:
+        totals = stripe_totals(striped)
+        stock.update({product_id: totals.get(product_id, 0) for product_id in striped})
+    return stock
+
+
+def rebuild_snapshot(snapshot):
+    """Reconstruit tout l'instantané depuis la base ; retourne le nombre de produits écrits."""
+    import numpy as np
+
+    stock = load_stock()
+    ids = np.fromiter(stock.keys(), dtype=np.int64, count=len(stock))
+    stocks = np.fromiter(stock.values(), dtype=np.int64, count=len(stock))
+    return snapshot.rebuild(ids, stocks)
+
+
+def verify_snapshot(snapshot, chunk_size=10_000):
+    """Compare l'instantané à la base et corrige les écarts ; retourne les IDs corrigés."""
+    ids = [product_id for (product_id,) in db.session.execute(select(Product.id).order_by(Product.id))]
+    repaired = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        expected = load_stock(chunk)
+        current = snapshot.get(chunk) or {}
+        diff = {product_id: quantity for product_id, quantity in expected.items() if current.get(product_id) != quantity}
+        snapshot.set(diff)
+        repaired.extend(diff)
+    return repaired
+
+
+def snapshot_stock(snapshot, product_ids):
+    """Stock des produits trouvés dans l'instantané ({id: stock}), sans jamais lire la base.
+
+    Retourne {} sans instantané (`snapshot` None), tant qu'il n'a pas été construit, ou si une
+    écriture concurrente empêche une lecture cohérente : l'appelant garde alors le stock lu en base.
+    """
+    if snapshot is None or not product_ids or snapshot.generation == 0:
+        return {}
+    return snapshot.get(product_ids) or {}
+
+
+def read_stock(product_ids):
+    """Stock des produits demandés ({id: stock}, sans les produits inconnus) et génération de l'instantané.
+
+    Sans instantané configuré ou construit, tout est lu en base (génération None). Les produits
+    absents de l'instantané, ou une lecture perturbée par une écriture concurrente, sont lus en
+    base et l'instantané est complété au passage.
+    """
+    snapshot = current_app.extensions.get('stock_snapshot')
+    # L'instantané est construit par le préchauffage ou `flask stock-snapshot`, jamais pendant une requête
+    if snapshot is None or snapshot.generation == 0:
+        return load_stock(product_ids), None
+    stock = snapshot.get(product_ids)
+    if stock is None:
+        return load_stock(product_ids), snapshot.generation
+    missing = [product_id for product_id in product_ids if product_id not in stock]
+    if missing:
+        loaded = load_stock(missing)
+        snapshot.set(loaded)
+        stock.update(loaded)
+    return stock, snapshot.generation
+
+
+@products_changed.connect
+def update_stock_snapshot(app, product_ids=None, **extra):
+    """Reporte dans l'instantané partagé le stock des produits modifiés par ce processus."""
+    snapshot = app.extensions.get('stock_snapshot')
+    # None : changement de catégorie, sans effet sur le stock
+    if snapshot is None or not product_ids:
+        return
+    stock = load_stock(product_ids)
+    # Produit supprimé : retiré de l'instantané
+    snapshot.set({product_id: stock.get(product_id) for product_id in product_ids})
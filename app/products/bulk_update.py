@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, select, update
+from werkzeug.http import parse_date
+from ..models import Product
+from ..extensions import db
+from ..bulk import chunked
+from ..changefeed import record_changes
+from .stripes import rebalance_stripes, spread_stock
+
+UPDATE_MODES = ('absolute', 'delta')
+UPDATE_FIELDS = ('stock', 'price')
+
+# Taille des lots pour les SELECT ... IN (limite du nombre de paramètres de SQLite)
+SELECT_CHUNK_SIZE = 500
+
+
+def _to_naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_version(value):
+    """Analyse un `updated_at` fourni par le client (ISO 8601 ou format HTTP renvoyé par l'API)."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = parse_date(value)
+    return _to_naive_utc(parsed) if parsed else None
+
+
+def same_version(current, expected):
+    """Compare deux versions ; la précision est réduite à la seconde si le client n'a pas de microsecondes."""
+    if current is None:
+        return False
+    current = _to_naive_utc(current)
+    if expected.microsecond == 0:
+        current = current.replace(microsecond=0)
+    return current == expected
+
+
+def _validate_entry(entry):
+    if not isinstance(entry, dict) or isinstance(entry.get('id'), bool) or not isinstance(entry.get('id'), int):
+        raise ValueError("Chaque mise à jour doit contenir un 'id' entier")
+    fields = [field for field in UPDATE_FIELDS if field in entry]
+    if not fields:
+        raise ValueError("Au moins un des champs 'stock' ou 'price' est requis")
+    if 'stock' in entry and (isinstance(entry['stock'], bool) or not isinstance(entry['stock'], int)):
+        raise ValueError("Le champ 'stock' doit être un entier")
+    if 'price' in entry and (isinstance(entry['price'], bool) or not isinstance(entry['price'], (int, float))):
+        raise ValueError("Le champ 'price' doit être numérique")
+    expected = None
+    if entry.get('updated_at') is not None:
+        expected = parse_version(entry['updated_at'])
+        if expected is None:
+            raise ValueError("Le champ 'updated_at' n'est pas une date valide")
+    return fields, expected
+
+
+def _load_current(ids):
+    """Charge et verrouille (SELECT ... FOR UPDATE) les lignes concernées."""
+    table = Product.__table__
+    current = {}
+    for chunk in chunked(ids, SELECT_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(table.c.id, table.c.stock, table.c.price, table.c.updated_at)
+            .where(table.c.id.in_(chunk))
+            .with_for_update()
+        ).all()
+        current.update({row.id: row for row in rows})
+    return current
+
+
+def apply_bulk_updates(entries, mode='absolute'):
+    """Applique des mises à jour de stock et de prix en quelques requêtes ensemblistes.
+
+    Toutes les lignes valides sont écrites dans une seule transaction ; les conflits de
+    version (`updated_at`) et les erreurs sont signalés ligne par ligne.
+    """
+    errors, conflicts, accepted, seen = [], [], [], set()
+
+    for index, entry in enumerate(entries):
+        try:
+            fields, expected = _validate_entry(entry)
+        except ValueError as e:
+            errors.append({'index': index, 'id': entry.get('id') if isinstance(entry, dict) else None, 'message': str(e)})
+            continue
+        if entry['id'] in seen:
+            errors.append({'index': index, 'id': entry['id'], 'message': "Produit présent plusieurs fois dans la requête"})
+            continue
+        seen.add(entry['id'])
+        accepted.append((index, entry, fields, expected))
+
+    # Stock réparti : la colonne `stock` reçoit d'abord le total des sous-compteurs (base du mode delta)
+    rebalance_stripes([entry['id'] for _, entry, fields, _ in accepted if 'stock' in fields])
+    current = _load_current([entry['id'] for _, entry, _, _ in accepted])
+
+    # Regroupement par ensemble de champs modifiés : une requête executemany par groupe
+    groups = {}
+    for index, entry, fields, expected in accepted:
+        row = current.get(entry['id'])
+        if row is None:
+            errors.append({'index': index, 'id': entry['id'], 'message': "Produit introuvable"})
+            continue
+        if expected is not None and not same_version(row.updated_at, expected):
+            conflicts.append({'index': index, 'id': entry['id'], 'updated_at': row.updated_at})
+            continue
+
+        new_stock = entry.get('stock', 0) + (row.stock if mode == 'delta' else 0)
+        new_price = entry.get('price', 0) + (row.price if mode == 'delta' else 0)
+        if 'stock' in fields and new_stock < 0:
+            errors.append({'index': index, 'id': entry['id'], 'message': "Le stock ne peut pas devenir négatif"})
+            continue
+        if 'price' in fields and new_price < 0:
+            errors.append({'index': index, 'id': entry['id'], 'message': "Le prix ne peut pas devenir négatif"})
+            continue
+
+        params = {'b_id': entry['id']}
+        params.update({f'b_{field}': entry[field] for field in fields})
+        groups.setdefault(tuple(fields), []).append(params)
+
+    table = Product.__table__
+    now = datetime.now(timezone.utc)
+    updated = 0
+    for fields, params in groups.items():
+        if mode == 'delta':
+            values = {field: table.c[field] + bindparam(f'b_{field}') for field in fields}
+        else:
+            values = {field: bindparam(f'b_{field}') for field in fields}
+        values['updated_at'] = now
+        db.session.execute(update(table).where(table.c.id == bindparam('b_id')).values(**values), params)
+        updated += len(params)
+    changed_ids = [row['b_id'] for params in groups.values() for row in params]
+    spread_stock(row['b_id'] for fields, params in groups.items() if 'stock' in fields for row in params)
+    record_changes('product', changed_ids)
+    db.session.commit()
+
+    return {'updated': updated, 'conflicts': conflicts, 'errors': errors, 'changed_ids': changed_ids}
@@ -0,0 +1,98 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import case, func, select
+from ..models import Product, Category
+from ..extensions import db
+from ..signals import products_changed
+
+FACETS = ('category', 'price')
+
+
+def category_facet(conditions):
+    """Nombre de produits par catégorie pour le filtre courant (GROUP BY sur l'index category_id)."""
+    # Agrégation sur la seule table product, puis jointure sur les quelques lignes obtenues
+    counts = (
+        select(Product.category_id, func.count(Product.id).label('total'))
+        .where(*conditions)
+        .group_by(Product.category_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(counts.c.category_id, Category.name, counts.c.total)
+        .join(Category, Category.id == counts.c.category_id)
+        .order_by(counts.c.total.desc(), counts.c.category_id)
+    ).all()
+    return [{"id": category_id, "name": name, "count": total} for category_id, name, total in rows]
+
+
+def price_facet(conditions, boundaries):
+    """Nombre de produits par tranche de prix, en une seule agrégation."""
+    bucket = case(
+        *[(Product.price < upper, index) for index, upper in enumerate(boundaries[1:])],
+        else_=len(boundaries) - 1
+    ).label('bucket')
+    counts = dict(db.session.execute(
+        select(bucket, func.count(Product.id)).where(*conditions).group_by(bucket)
+    ).all())
+    return [{
+        "min": lower,
+        "max": boundaries[index + 1] if index + 1 < len(boundaries) else None,
+        "count": counts.get(index, 0)
+    } for index, lower in enumerate(boundaries)]
+
+
+class FacetCache:
+    """Cache à durée de vie limitée des facettes sans filtre (les plus demandées, les plus coûteuses)."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._values.get(name)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def put(self, name, value):
+        with self._lock:
+            self._values[name] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+@products_changed.connect
+def invalidate_facet_cache(app, **extra):
+    app.extensions['facet_cache'].clear()
+
+
+def compute_facets(names, conditions):
+    """Calcule les facettes demandées pour les conditions de filtre de la liste de produits.
+
+    Chaque facette est chronométrée ; un dépassement du budget de latence configuré
+    (FACET_LATENCY_BUDGETS_MS) est journalisé.
+    """
+    config = current_app.config
+    cache = current_app.extensions['facet_cache']
+    budgets = config['FACET_LATENCY_BUDGETS_MS']
+    facets = {}
+    for name in names:
+        value = cache.get(name) if not conditions else None
+        if value is None:
+            start = time.perf_counter()
+            if name == 'category':
+                value = category_facet(conditions)
+            else:
+                value = price_facet(conditions, config['PRICE_FACET_BOUNDARIES'])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms > budgets.get(name, float('inf')):
+                current_app.logger.warning('Facette %s : %.1f ms (budget %s ms)', name, elapsed_ms, budgets[name])
+            if not conditions:
+                cache.put(name, value)
+        facets[name] = value
+    return facets
@@ -0,0 +1,234 @@
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from ..models import Product, Category
+from ..extensions import db
+from ..bulk import chunked
+from ..changefeed import record_changes
+from .stripes import spread_stock
+
+# Nombre maximal d'erreurs détaillées conservées dans le rapport (les suivantes sont seulement comptées)
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+
+def read_ndjson(lines):
+    """Lit un flux NDJSON ligne par ligne et produit des tuples (numéro de ligne, données, erreur).
+
+    Un flux qui n'est pas de l'UTF-8 valide arrête la lecture : l'erreur est signalée sur la
+    ligne illisible, et les lignes déjà lues sont importées.
+    """
+    lines = iter(lines)
+    line_number = 0
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as e:
+            yield line_number + 1, None, f"Encodage invalide (UTF-8 attendu), import interrompu : {e.reason}"
+            return
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"JSON invalide : {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Chaque ligne doit être un objet JSON"
+            continue
+        yield line_number, row, None
+
+
+def read_csv(lines):
+    """Lit un flux CSV avec en-tête et produit des tuples (numéro de ligne, données, erreur).
+
+    Comme pour le NDJSON, un encodage invalide ou un CSV illisible (champ trop long, par
+    exemple) arrête la lecture avec une erreur sur la ligne en cours.
+    """
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as e:
+            yield reader.line_num + 1, None, f"Encodage invalide (UTF-8 attendu), import interrompu : {e.reason}"
+            return
+        except csv.Error as e:
+            yield reader.line_num + 1, None, f"CSV invalide, import interrompu : {e}"
+            return
+        yield reader.line_num, row, None
+
+
+def read_rows(lines, file_format):
+    """Retourne le lecteur correspondant au format demandé ('ndjson' ou 'csv')."""
+    if file_format == 'csv':
+        return read_csv(lines)
+    return read_ndjson(lines)
+
+
+def _parse_number(value, cast, field):
+    if value is None or value == '' or isinstance(value, bool):
+        raise ValueError(f"Le champ '{field}' est requis")
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Le champ '{field}' doit être numérique")
+    if number < 0:
+        raise ValueError(f"Le champ '{field}' doit être positif")
+    return number
+
+
+def _parse_int(value):
+    # Les valeurs CSV arrivent sous forme de texte : '12' et 12 sont acceptés, '12.5' non
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError
+    return int(value)
+
+
+def normalize_row(row, category_ids):
+    """Valide une ligne brute et retourne les colonnes du produit, ou lève ValueError."""
+    name = row.get('name')
+    name = name.strip() if isinstance(name, str) else ''
+    if not name:
+        raise ValueError("Le champ 'name' est requis")
+    if len(name) > 100:
+        raise ValueError("Le champ 'name' dépasse 100 caractères")
+
+    sku = row.get('sku')
+    if sku is not None and not isinstance(sku, str):
+        sku = str(sku)
+    sku = sku.strip() if sku else None
+    if sku and len(sku) > 64:
+        raise ValueError("Le champ 'sku' dépasse 64 caractères")
+
+    category_id = _parse_number(row.get('category_id'), _parse_int, 'category_id')
+    if category_id not in category_ids:
+        raise ValueError(f"La catégorie avec l'ID {category_id} n'existe pas")
+
+    return {
+        'name': name,
+        'sku': sku or None,
+        'description': row.get('description') or None,
+        'price': _parse_number(row.get('price'), float, 'price'),
+        'stock': _parse_number(row.get('stock'), _parse_int, 'stock'),
+        'category_id': category_id,
+    }
+
+
+class ImportReport:
+    """Accumule les compteurs et les erreurs d'un import en masse."""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.changed_ids = []
+        self.started_at = time.perf_counter()
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'message': message})
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.processed / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def _upsert_chunk(rows, report):
+    """Insère ou met à jour un lot de lignes valides dans une seule transaction.
+
+    Un SKU répété dans le lot est signalé en erreur sur chaque ligne après la première. Si la
+    base rejette le lot, il est rejoué ligne par ligne : seules les lignes fautives sont en erreur.
+    """
+    by_sku = {}
+    without_sku = []
+    for line, values in rows:
+        if not values['sku']:
+            without_sku.append((line, values))
+        elif values['sku'] in by_sku:
+            report.add_error(line, f"Le SKU '{values['sku']}' figure déjà à la ligne {by_sku[values['sku']][0]}")
+        else:
+            by_sku[values['sku']] = (line, values)
+
+    existing = {}
+    if by_sku:
+        existing = dict(db.session.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_(list(by_sku)))
+        ).all())
+
+    now = datetime.now(timezone.utc)
+    to_insert = [values for _, values in without_sku]
+    to_update = []
+    for sku, (line, values) in by_sku.items():
+        if sku in existing:
+            to_update.append(dict(values, id=existing[sku], updated_at=now))
+        else:
+            to_insert.append(values)
+
+    try:
+        created_ids = []
+        if to_insert:
+            created_ids = db.session.execute(insert(Product).returning(Product.id), to_insert).scalars().all()
+        if to_update:
+            db.session.execute(update(Product), to_update)
+            spread_stock([values['id'] for values in to_update])
+        record_changes('product', created_ids + [values['id'] for values in to_update])
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        unique_rows = sorted(without_sku + list(by_sku.values()), key=lambda row: row[0])
+        if len(unique_rows) == 1:
+            report.add_error(unique_rows[0][0], f"Ligne rejetée par la base de données : {e.__class__.__name__}")
+            return
+        for row in unique_rows:
+            _upsert_chunk([row], report)
+        return
+
+    report.changed_ids.extend(created_ids + [values['id'] for values in to_update])
+    report.created += len(to_insert)
+    report.updated += len(to_update)
+
+
+def import_products(parsed_rows, chunk_size=1000):
+    """Importe un flux de lignes (numéro, données, erreur) par lots et retourne le rapport.
+
+    Les catégories sont chargées une seule fois ; une ligne invalide est signalée
+    dans le rapport sans interrompre le reste de l'import.
+    """
+    report = ImportReport()
+    category_ids = set(db.session.execute(select(Category.id)).scalars())
+
+    for chunk in chunked(parsed_rows, chunk_size):
+        valid_rows = []
+        for line, row, error in chunk:
+            report.processed += 1
+            if error:
+                report.add_error(line, error)
+                continue
+            try:
+                valid_rows.append((line, normalize_row(row, category_ids)))
+            except ValueError as e:
+                report.add_error(line, str(e) or 'Valeur invalide')
+        if valid_rows:
+            _upsert_chunk(valid_rows, report)
+
+    return report
@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import joinedload, undefer
+from ..models import Product
+from ..extensions import db
+from ..categories.tree import subtree_ids
+
+# Tris disponibles : (colonne, décroissant). L'ID départage les égalités et sert à la pagination par curseur.
+# Chaque tri est couvert par un index (colonne, id), et (category_id, colonne, id) quand on filtre par catégorie.
+SORTS = {
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'created_at': (Product.created_at, False),
+    'name': (Product.name, False),
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'oui')
+
+
+def product_filters(args, category_ids=None):
+    """Traduit les paramètres de filtre de la liste de produits en conditions SQL.
+
+    `category_ids` : sous-arbre de la catégorie demandée déjà résolu par l'appelant (lecture
+    asynchrone) ; sinon lu par la session. Lève ValueError si un paramètre est invalide.
+    """
+    conditions = []
+
+    # Filtre de recherche par nom (paramètre 'q')
+    search_term = args.get('q')
+    if search_term:
+        conditions.append(Product.name.ilike(f'%{search_term}%'))
+
+    # Filtre par catégorie, sous-catégories comprises (paramètre 'category_id')
+    category_id = args.get('category_id', type=int)
+    if category_id:
+        # Le sous-arbre est résolu d'abord (lecture de la clé primaire de la table de fermeture) :
+        # pour une feuille, l'égalité garde le tri servi par l'index (category_id, colonne, id)
+        if category_ids is None:
+            category_ids = db.session.scalars(subtree_ids(category_id)).all()
+        if len(category_ids) == 1:
+            conditions.append(Product.category_id == category_ids[0])
+        else:
+            conditions.append(Product.category_id.in_(category_ids))
+
+    # Fourchette de prix (paramètres 'min_price' et 'max_price')
+    for name, compare in (('min_price', Product.price.__ge__), ('max_price', Product.price.__le__)):
+        if args.get(name):
+            value = args.get(name, type=float)
+            if value is None:
+                raise ValueError(f"Le paramètre '{name}' doit être numérique")
+            conditions.append(compare(value))
+
+    # Produits disponibles uniquement (paramètre 'in_stock'), sous-compteurs compris
+    if args.get('in_stock', '').lower() in TRUE_VALUES:
+        conditions.append(Product.available_stock > 0)
+
+    return conditions
+
+
+def sort_columns(sort):
+    """Retourne (colonne de tri ou None, décroissant) ; lève ValueError pour un tri inconnu."""
+    if not sort:
+        return None, False
+    if sort not in SORTS:
+        raise ValueError(f"Tri invalide. Tris disponibles : {', '.join(SORTS)}")
+    return SORTS[sort]
+
+
+def listing_statement(conditions, sort=None):
+    """Requête de la liste de produits : filtres, tri indexé et départage par ID."""
+    column, descending = sort_columns(sort)
+    order_by = [column, Product.id] if column is not None else [Product.id]
+    if descending:
+        order_by = [expression.desc() for expression in order_by]
+    return (
+        select(Product)
+        .options(joinedload(Product.category), undefer(Product.available_stock))
+        .where(*conditions)
+        .order_by(*order_by)
+    )
+
+
+def encode_cursor(product, sort=None):
+    """Curseur opaque désignant la position juste après `product` dans l'ordre de tri."""
+    column, _ = sort_columns(sort)
+    values = [product.id]
+    if column is not None:
+        value = getattr(product, column.key)
+        values.insert(0, value.isoformat() if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def keyset_condition(cursor, sort=None):
+    """Condition « après le curseur » compatible avec l'index du tri (comparaison de tuples)."""
+    column, descending = sort_columns(sort)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if column is not None and column.key == 'created_at':
+            values[0] = datetime.fromisoformat(values[0])
+        expected_length = 1 if column is None else 2
+        if not isinstance(values, list) or len(values) != expected_length:
+            raise ValueError
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise ValueError("Curseur de pagination invalide")
+
+    if column is None:
+        return Product.id < values[0] if descending else Product.id > values[0]
+    key = tuple_(column, Product.id)
+    return key < tuple(values) if descending else key > tuple(values)
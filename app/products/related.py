@@ -0,0 +1,158 @@
+import threading
+import time
+from itertools import chain, permutations
+from sqlalchemy import bindparam, delete, insert, select, update
+from ..models import Product, ProductAssociation
+from ..extensions import db
+from ..bulk import chunked
+from ..signals import products_changed
+from ..orders.archive import order_lines
+from ..orders.sharding import order_sessions
+
+association = ProductAssociation.__table__
+
+
+def count_pairs(order_ids, product_ids):
+    """Compte les co-occurrences à partir de deux tableaux alignés (commande, produit), sans boucle Python.
+
+    Retourne trois tableaux numpy (product_id, related_id, nombre de commandes), chaque paire
+    dans les deux sens. Un produit présent sur plusieurs lignes d'une commande compte une fois.
+    """
+    import numpy as np
+
+    orders = np.asarray(order_ids, dtype=np.int64)
+    products = np.asarray(product_ids, dtype=np.int64)
+    empty = np.empty(0, dtype=np.int64)
+    if len(orders) == 0:
+        return empty, empty, empty
+
+    # Une clé entière par (commande, produit) : np.unique dédoublonne et trie par commande
+    span = int(products.max()) + 1
+    keys = np.unique(orders * span + products)
+    orders, products = keys // span, keys % span
+
+    # Début et taille de la commande de chaque ligne
+    starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    sizes = np.diff(np.r_[starts, len(orders)])
+    line_sizes = np.repeat(sizes, sizes)
+    line_starts = np.repeat(starts, sizes)
+
+    # Chaque ligne est appariée à toutes les lignes de sa commande (elle-même exclue)
+    left = np.repeat(np.arange(len(orders)), line_sizes)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(line_sizes) - line_sizes, line_sizes)
+    right = np.repeat(line_starts, line_sizes) + offsets
+    keep = left != right
+
+    pair_keys, counts = np.unique(products[left[keep]] * span + products[right[keep]], return_counts=True)
+    return pair_keys // span, pair_keys % span, counts
+
+
+def rebuild_associations(chunk_size=10_000):
+    """Recalcule toute la table des associations à partir des lignes de commande non annulées, archives comprises."""
+    import numpy as np
+
+    started = time.perf_counter()
+    # Lecture par la connexion (sans passer par l'ORM), aplatie directement dans un tableau numpy ;
+    # les IDs de commande sont uniques sur l'ensemble des shards, les lectures se concatènent
+    lines = order_lines()
+    statement = select(lines.c.order_id, lines.c.product_id).where(lines.c.status != 'cancelled')
+    lines = np.concatenate([
+        np.fromiter(chain.from_iterable(session.connection().execute(statement)), dtype=np.int64).reshape(-1, 2)
+        for session in order_sessions()
+    ])
+    if len(order_sessions()) > 1:
+        # Sans clé étrangère entre shards et catalogue : les produits supprimés sont écartés ici
+        existing = np.fromiter(db.session.execute(select(Product.id)).scalars(), dtype=np.int64)
+        lines = lines[np.isin(lines[:, 1], existing)]
+    loaded = time.perf_counter()
+
+    product_ids, related_ids, counts = count_pairs(lines[:, 0], lines[:, 1])
+    counted = time.perf_counter()
+
+    db.session.execute(delete(association))
+    rows = (
+        {'product_id': product_id, 'related_id': related_id, 'orders': count}
+        for product_id, related_id, count in zip(product_ids.tolist(), related_ids.tolist(), counts.tolist())
+    )
+    for chunk in chunked(rows, chunk_size):
+        db.session.execute(insert(association), chunk)
+    db.session.commit()
+
+    return {
+        'lines': len(lines),
+        'pairs': len(counts),
+        'load_seconds': round(loaded - started, 3),
+        'count_seconds': round(counted - loaded, 3),
+        'write_seconds': round(time.perf_counter() - counted, 3),
+    }
+
+
+def record_order_pairs(product_ids, delta=1):
+    """Met à jour les paires d'une commande dans la transaction en cours (delta=-1 à l'annulation)."""
+    product_ids = sorted(set(product_ids))
+    if len(product_ids) < 2:
+        return
+    existing = set(db.session.execute(
+        select(association.c.product_id, association.c.related_id)
+        .where(association.c.product_id.in_(product_ids), association.c.related_id.in_(product_ids))
+    ).all())
+    pairs = list(permutations(product_ids, 2))
+
+    to_update = [{'b_product_id': a, 'b_related_id': b} for a, b in pairs if (a, b) in existing]
+    if to_update:
+        db.session.execute(
+            update(association)
+            .where(association.c.product_id == bindparam('b_product_id'),
+                   association.c.related_id == bindparam('b_related_id'))
+            .values(orders=association.c.orders + delta),
+            to_update
+        )
+    to_insert = [{'product_id': a, 'related_id': b, 'orders': delta} for a, b in pairs if (a, b) not in existing]
+    if to_insert and delta > 0:
+        db.session.execute(insert(association), to_insert)
+
+
+def top_related(product_id, limit):
+    """Les `limit` produits le plus souvent commandés avec `product_id` (plage de l'index product_id, orders)."""
+    rows = db.session.execute(
+        select(Product.id, Product.name, Product.price, association.c.orders)
+        .join(association, association.c.related_id == Product.id)
+        .where(association.c.product_id == product_id, association.c.orders > 0)
+        .order_by(association.c.orders.desc(), Product.id)
+        .limit(limit)
+    ).all()
+    return [{"id": id, "name": name, "price": price, "orders": orders} for id, name, price, orders in rows]
+
+
+class RelatedCache:
+    """Recommandations par produit, prêtes à servir, gardées `ttl` secondes par worker."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, product_id):
+        with self._lock:
+            entry = self._values.get(product_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def put(self, product_id, value):
+        with self._lock:
+            self._values[product_id] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, product_ids=None):
+        with self._lock:
+            if product_ids is None:
+                self._values.clear()
+            else:
+                for product_id in product_ids:
+                    self._values.pop(product_id, None)
+
+
+@products_changed.connect
+def invalidate_related_cache(app, product_ids=None, **extra):
+    # Une commande notifie tous ses produits : leurs listes de recommandations ont changé
+    app.extensions['related_cache'].invalidate(product_ids)
@@ -1,88 +1,301 @@
-from flask import Blueprint, jsonify, request
+import codecs
+import io
+from flask import Blueprint, Response, abort, jsonify, request, current_app
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, undefer
 from ..models import Product, Category
 from ..extensions import db
 from ..decorators import admin_required
+from ..validation import validate_json
+from .schemas import bulk_update_schema, product_schema, product_update_schema
+from ..singleflight import coalesce
+from ..signals import products_changed, notify_products_changed
+from ..compression import compress
+from .importer import IMPORT_FORMATS, import_products, read_rows
+from .bulk_update import apply_bulk_updates
+from ..changefeed import read_changes
+from .facets import FACETS, compute_facets
+from .related import top_related
+from .stripes import configure_stripes, spread_stock
+from .availability import read_stock, snapshot_stock
+from .listing import product_filters, listing_statement, keyset_condition, encode_cursor
+from ..streaming import format_sse, read_snapshot
 
 # Créer le Blueprint pour les produits
 products_bp = Blueprint('products', __name__)
 
+def serialize_product(product, stock=None):
+    """Fonction d'aide pour sérialiser un objet Product en dictionnaire.
+
+    `stock` remplace le stock lu en base (valeur de l'instantané du stock partagé).
+    """
+    return {
+        "id": product.id,
+        "name": product.name,
+        "sku": product.sku,
+        "description": product.description,
+        "price": product.price,
+        "stock": product.available_stock if stock is None else stock,
+        "stock_stripes": product.stock_stripes,
+        "category_id": product.category_id,
+        "category_name": product.category.name,
+        "created_at": product.created_at,
+        "updated_at": product.updated_at
+    }
+
+def serialize_products(products, snapshot):
+    """Sérialise des produits ; le stock vient de l'instantané partagé pour ceux qui y figurent, de la base sinon."""
+    stock = snapshot_stock(snapshot, [product.id for product in products])
+    return [serialize_product(product, stock.get(product.id)) for product in products]
+
 # --- Routes Publiques ---
 
 @products_bp.route('/', methods=['GET'])
+@coalesce
 def get_products():
     """Récupère la liste de tous les produits."""
-    # Base de la requête
-    query = Product.query
+    # Récupération groupée par IDs (paramètre 'ids', ex. ?ids=1,2,3)
+    if request.args.get('ids'):
+        return get_products_by_ids(request.args['ids'])
 
-    # Filtre de recherche par nom (paramètre 'q')
-    search_term = request.args.get('q')
-    if search_term:
-        query = query.filter(Product.name.ilike(f'%{search_term}%'))
+    # Facettes demandées (paramètre 'facets', ex. ?facets=category,price)
+    facet_names = [name for name in request.args.get('facets', '').split(',') if name]
+    unknown_facets = set(facet_names) - set(FACETS)
+    if unknown_facets:
+        return jsonify({"message": f"Facette invalide. Facettes disponibles : {', '.join(FACETS)}"}), 400
 
-    # Filtre par catégorie (paramètre 'category_id')
-    category_id = request.args.get('category_id', type=int)
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
+    try:
+        conditions = product_filters(request.args)
+        sort = request.args.get('sort')
+        statement = listing_statement(conditions, sort)
+        # Pagination par curseur si le paramètre 'cursor' est présent (vide pour la première page)
+        cursor = request.args.get('cursor')
+        if cursor:
+            statement = statement.where(keyset_condition(cursor, sort))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    # Pagination
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    products = pagination.items
+    if cursor is not None:
+        per_page = max(per_page, 1)
+        # Une ligne de plus que demandé indique s'il existe une page suivante, sans COUNT(*)
+        products = db.session.execute(statement.limit(per_page + 1)).scalars().all()
+        has_more = len(products) > per_page
+        products = products[:per_page]
+        response = {
+            "products": serialize_products(products, current_app.extensions.get('stock_snapshot')),
+            "next_cursor": encode_cursor(products[-1], sort) if has_more else None
+        }
+    else:
+        # Pagination
+        page = request.args.get('page', 1, type=int)
+        pagination = db.paginate(statement, page=page, per_page=per_page, error_out=False)
+        products = pagination.items
+
+        response = {
+            "products": serialize_products(products, current_app.extensions.get('stock_snapshot')),
+            "total": pagination.total,
+            "pages": pagination.pages,
+            "current_page": pagination.page,
+            "next_page": pagination.next_num,
+            "prev_page": pagination.prev_num
+        }
+    if facet_names:
+        response["facets"] = compute_facets(dict.fromkeys(facet_names), conditions)
+    return jsonify(response), 200
 
+def get_products_by_ids(raw_ids):
+    """Retourne plusieurs produits en une seule requête indexée, dans l'ordre demandé."""
+    try:
+        ids = list(dict.fromkeys(int(product_id) for product_id in raw_ids.split(',') if product_id.strip()))
+    except ValueError:
+        return jsonify({"message": "Le paramètre 'ids' doit être une liste d'entiers séparés par des virgules"}), 400
+
+    max_ids = current_app.config['PRODUCT_MULTI_GET_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({"message": f"Trop d'identifiants (maximum {max_ids} par requête)"}), 400
+
+    products = {
+        product.id: product
+        for product in Product.query.options(joinedload(Product.category), undefer(Product.available_stock)).filter(Product.id.in_(ids))
+    }
     return jsonify({
-        "products": [{
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "price": product.price,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "category_name": product.category.name,
-            "created_at": product.created_at,
-            "updated_at": product.updated_at
-        } for product in products],
-        "total": pagination.total,
-        "pages": pagination.pages,
-        "current_page": pagination.page,
-        "next_page": pagination.next_num,
-        "prev_page": pagination.prev_num
+        "products": serialize_products([products[product_id] for product_id in ids if product_id in products],
+                                       current_app.extensions.get('stock_snapshot')),
+        "missing": [product_id for product_id in ids if product_id not in products]
     }), 200
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@coalesce
 def get_product(product_id):
     """Récupère un produit spécifique par son ID."""
-    product = db.get_or_404(Product, product_id)
+    cache = current_app.extensions['product_cache']
+    # Version de la ligne : une lecture par clé primaire, sans hydrater l'objet ni sérialiser. Le stock
+    # disponible en fait partie : les prélèvements sur les sous-compteurs ne modifient pas `updated_at`
+    version = db.session.execute(
+        select(Product.updated_at, Category.name, Product.available_stock)
+        .join(Product.category).where(Product.id == product_id)
+    ).first()
+    if version is None:
+        abort(404)
+    # Stock de l'instantané partagé s'il y figure : il fait partie de la version du cache
+    stock = snapshot_stock(current_app.extensions.get('stock_snapshot'), [product_id]).get(product_id, version[2])
+    version = (version[0], version[1], stock)
+
+    encoding = 'gzip' if request.accept_encodings['gzip'] else 'identity'
+    body = cache.get(product_id, version, encoding)
+    if body is None:
+        identity = cache.get(product_id, version, 'identity')
+        if identity is None:
+            product = db.get_or_404(Product, product_id)
+            identity = current_app.json.response(serialize_product(product, stock)).get_data()
+            cache.put(product_id, version, 'identity', identity)
+        body = identity
+        if encoding == 'gzip':
+            body = compress(identity, 'gzip', current_app.config['COMPRESS_LEVEL'])
+            cache.put(product_id, version, 'gzip', body)
+
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    if encoding == 'gzip':
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@products_changed.connect
+def invalidate_product_cache(app, product_ids=None, **extra):
+    """Retire du cache de réponses les produits modifiés par une écriture de ce worker."""
+    app.extensions['product_cache'].invalidate(product_ids)
+
+@products_bp.route('/<int:product_id>/related', methods=['GET'])
+def get_related_products(product_id):
+    """Produits souvent achetés avec ce produit (« souvent achetés ensemble »)."""
+    max_results = current_app.config['RELATED_MAX_RESULTS']
+    limit = min(max(request.args.get('limit', max_results, type=int), 1), max_results)
+    cache = current_app.extensions['related_cache']
+    related = cache.get(product_id)
+    if related is None:
+        db.get_or_404(Product, product_id)
+        related = top_related(product_id, max_results)
+        cache.put(product_id, related)
+    return jsonify({"product_id": product_id, "related": related[:limit]}), 200
+
+@products_bp.route('/suggest', methods=['GET'])
+def suggest_products():
+    """Suggestions de produits pour la saisie en cours (paramètre 'prefix'), servies par l'index en mémoire."""
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', type=int)
+    index = current_app.extensions['suggest_index']
+    index.sync(current_app.config['SUGGEST_SYNC_INTERVAL'])
     return jsonify({
-        "id": product.id,
-        "name": product.name,
-        "description": product.description,
-        "price": product.price,
-        "stock": product.stock,
-        "category_id": product.category_id,
-        "category_name": product.category.name,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at
+        "prefix": prefix,
+        "suggestions": index.suggest(prefix, max(limit, 1) if limit else None)
+    }), 200
+
+@products_bp.route('/changes', methods=['GET'])
+def get_catalog_changes():
+    """Flux incrémental des changements du catalogue à partir d'un curseur (paramètre 'since')."""
+    since = request.args.get('since', 0, type=int)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), current_app.config['CHANGE_FEED_MAX_LIMIT'])
+
+    # Une entrée de plus que demandé permet de savoir s'il reste des changements à lire
+    changes = read_changes(since=since, limit=limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return jsonify({
+        "changes": [{
+            "cursor": change.id,
+            "entity": change.entity,
+            "id": change.entity_id,
+            "op": change.op,
+            "changed_at": change.changed_at
+        } for change in changes],
+        "next_cursor": changes[-1].id if changes else since,
+        "has_more": has_more
     }), 200
 
+@products_bp.route('/availability', methods=['GET'])
+def get_availability():
+    """Disponibilité des produits demandés ('ids'), lue dans l'instantané du stock partagé par les workers."""
+    try:
+        ids = list(dict.fromkeys(int(product_id) for product_id in request.args.get('ids', '').split(',') if product_id.strip()))
+    except ValueError:
+        return jsonify({"message": "Le paramètre 'ids' doit être une liste d'entiers séparés par des virgules"}), 400
+    if not ids:
+        return jsonify({"message": "Le paramètre 'ids' est requis"}), 400
+    max_ids = current_app.config['STOCK_AVAILABILITY_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({"message": f"Trop d'identifiants (maximum {max_ids} par requête)"}), 400
+
+    stock, generation = read_stock(ids)
+    return jsonify({
+        "products": [
+            {"id": product_id, "stock": stock[product_id], "available": stock[product_id] > 0}
+            for product_id in ids if product_id in stock
+        ],
+        "missing": [product_id for product_id in ids if product_id not in stock],
+        "generation": generation
+    }), 200
+
+@products_bp.route('/stream', methods=['GET'])
+def stream_stock():
+    """Pousse en Server-Sent Events les changements de stock et de prix des produits demandés ('ids')."""
+    try:
+        ids = set(int(product_id) for product_id in request.args.get('ids', '').split(',') if product_id.strip())
+    except ValueError:
+        return jsonify({"message": "Le paramètre 'ids' doit être une liste d'entiers séparés par des virgules"}), 400
+    if not ids:
+        return jsonify({"message": "Le paramètre 'ids' est requis"}), 400
+    max_ids = current_app.config['STOCK_STREAM_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({"message": f"Trop d'identifiants (maximum {max_ids} par flux)"}), 400
+
+    broker = current_app.extensions['stock_broker']
+    broker.ensure_started(current_app._get_current_object())
+
+    cursor, snapshot = read_snapshot(ids)
+    # Chaque flux occupe un thread du worker jusqu'à la déconnexion du client
+    subscriber = broker.subscribe(ids, snapshot, cursor, max_subscribers=current_app.config['STOCK_STREAM_MAX_CLIENTS'])
+    if subscriber is None:
+        return jsonify({"message": "Trop de flux ouverts sur ce serveur, réessayez plus tard"}), 503, {'Retry-After': '5'}
+    keepalive = current_app.config['STOCK_STREAM_KEEPALIVE']
+
+    def generate():
+        try:
+            for product_id, (stock, price) in sorted(snapshot.items()):
+                yield format_sse({'id': product_id, 'stock': stock, 'price': price}, event='stock', event_id=cursor)
+            while not subscriber.closed:
+                events = subscriber.wait(keepalive)
+                if not events:
+                    yield ': keepalive\n\n'
+                for event_id, data in events:
+                    yield format_sse(data, event='stock', event_id=event_id)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # --- Routes Protégées (Admin/Vendeur) ---
 
 @products_bp.route('/', methods=['POST'])
 @admin_required()
+@validate_json(product_schema)
 def create_product():
     """Crée un nouveau produit."""
     data = request.get_json()
-    required_fields = ['name', 'price', 'stock', 'category_id']
-    if not data or not all(key in data for key in required_fields):
-        return jsonify({"message": f"Données manquantes ou invalides. Champs requis: {', '.join(required_fields)}"}), 400
-    
     category_id = data['category_id']
     if not db.session.get(Category, category_id):
         return jsonify({"message": f"La catégorie avec l'ID {category_id} n'existe pas"}), 404
+
+    if data.get('sku') and Product.query.filter_by(sku=data['sku']).first():
+        return jsonify({"message": "Un produit avec ce SKU existe déjà"}), 409
     
     new_product = Product(
         name=data['name'],
+        sku=data.get('sku'),
         description=data.get('description'),
         price=data['price'],
         stock=data['stock'],
@@ -90,30 +303,38 @@ def create_product():
     )
     db.session.add(new_product)
     db.session.commit()
-    return jsonify({
-        "id": new_product.id,
-        "name": new_product.name,
-        "description": new_product.description,
-        "price": new_product.price,
-        "stock": new_product.stock,
-        "category_id": new_product.category_id,
-        "category_name": new_product.category.name,
-        "created_at": new_product.created_at,
-        "updated_at": new_product.updated_at
-    }), 201
+    notify_products_changed([new_product.id])
+    return jsonify(serialize_product(new_product)), 201
 
 @products_bp.route('/<int:product_id>', methods=['PUT'])
 @admin_required()
+@validate_json(product_update_schema)
 def update_product(product_id):
     """Met à jour un produit existant."""
     product = db.get_or_404(Product, product_id)
     
     data = request.get_json()
+    if data.get('sku') and data['sku'] != product.sku and Product.query.filter_by(sku=data['sku']).first():
+        return jsonify({"message": "Un produit avec ce SKU existe déjà"}), 409
+
     product.name = data.get('name', product.name)
+    product.sku = data.get('sku', product.sku)
     product.description = data.get('description', product.description)
     product.price = data.get('price', product.price)
     product.stock = data.get('stock', product.stock)
 
+    # Stock réparti (produits très demandés) : nombre de sous-compteurs, 0 pour revenir à la seule colonne
+    if 'stock_stripes' in data:
+        count = data['stock_stripes']
+        if count > current_app.config['STOCK_STRIPES_MAX']:
+            return jsonify({"message": f"'stock_stripes' doit être un entier entre 0 et {current_app.config['STOCK_STRIPES_MAX']}"}), 400
+        if 'stock' in data:
+            product.stock_stripes = 0 # Le stock fourni remplace celui des sous-compteurs
+        configure_stripes(product, count)
+    elif 'stock' in data and product.stock_stripes:
+        db.session.flush()
+        spread_stock([product.id])
+
     if 'category_id' in data:
         category_id = data['category_id']
         if not db.session.get(Category, category_id):
@@ -121,17 +342,8 @@ def update_product(product_id):
         product.category_id = category_id
 
     db.session.commit()
-    return jsonify({
-        "id": product.id,
-        "name": product.name,
-        "description": product.description,
-        "price": product.price,
-        "stock": product.stock,
-        "category_id": product.category_id,
-        "category_name": product.category.name,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at
-    }), 200
+    notify_products_changed([product.id])
+    return jsonify(serialize_product(product)), 200
 
 @products_bp.route('/<int:product_id>', methods=['DELETE'])
 @admin_required()
@@ -140,4 +352,34 @@ def delete_product(product_id):
     product = db.get_or_404(Product, product_id)
     db.session.delete(product)
     db.session.commit()
-    return jsonify({"message": "Produit supprimé avec succès"}), 200
\ No newline at end of file
+    notify_products_changed([product_id])
+    return jsonify({"message": "Produit supprimé avec succès"}), 200
+
+@products_bp.route('/import', methods=['POST'])
+@admin_required()
+def import_products_route():
+    """Importe des produits en masse depuis un flux NDJSON ou CSV (upsert par SKU)."""
+    file_format = request.args.get('format')
+    if not file_format:
+        file_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    if file_format not in IMPORT_FORMATS:
+        return jsonify({"message": f"Format invalide. Formats acceptés : {', '.join(IMPORT_FORMATS)}"}), 400
+
+    # Le corps est lu en flux, ligne par ligne, sans être chargé entièrement en mémoire ;
+    # le décodage se fait ligne à ligne pour situer précisément une erreur d'encodage
+    lines = codecs.iterdecode(io.BufferedReader(request.stream), 'utf-8-sig')
+    chunk_size = request.args.get('chunk_size', current_app.config['PRODUCT_IMPORT_CHUNK_SIZE'], type=int)
+    report = import_products(read_rows(lines, file_format), chunk_size=max(chunk_size, 1))
+    notify_products_changed(report.changed_ids)
+    return jsonify(report.to_dict()), 200
+
+
+@products_bp.route('/bulk', methods=['PATCH'])
+@admin_required()
+@validate_json(bulk_update_schema)
+def bulk_update_products():
+    """Met à jour le stock et/ou le prix de nombreux produits dans une seule transaction."""
+    data = request.get_json()
+    result = apply_bulk_updates(data['updates'], mode=data.get('mode', 'absolute'))
+    notify_products_changed(result.pop('changed_ids'))
+    return jsonify(result), 200
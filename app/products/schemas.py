@@ -0,0 +1,30 @@
+from ..validation import Integer, List, Number, Schema, String
+from .bulk_update import UPDATE_MODES
+
+product_fields = {
+    'name': String(min_length=1, max_length=100),
+    'sku': String(max_length=64, nullable=True),
+    'description': String(max_length=10_000, nullable=True),
+    'price': Number(minimum=0),
+    'stock': Integer(minimum=0),
+    'category_id': Integer(),
+}
+
+product_schema = Schema({
+    **product_fields,
+    'name': String(required=True, min_length=1, max_length=100),
+    'price': Number(required=True, minimum=0),
+    'stock': Integer(required=True, minimum=0),
+    'category_id': Integer(required=True),
+})
+
+product_update_schema = Schema({
+    **product_fields,
+    'stock_stripes': Integer(minimum=0), # Maximum (STOCK_STRIPES_MAX) vérifié par la route
+})
+
+# Les lignes sont vérifiées une à une par la mise à jour en masse (erreurs rapportées par ligne)
+bulk_update_schema = Schema({
+    'mode': String(choices=UPDATE_MODES),
+    'updates': List(required=True, max_items='PRODUCT_BULK_UPDATE_MAX_ITEMS'),
+}, max_bytes='PRODUCT_BULK_UPDATE_MAX_BYTES')
@@ -0,0 +1,173 @@
+import random
+from sqlalchemy import bindparam, delete, insert, select, update
+from ..models import Product, StockStripe
+from ..extensions import db
+from ..changefeed import record_changes
+
+stripe_table = StockStripe.__table__
+
+
+def split(total, count):
+    """Répartit `total` en `count` parts entières aussi égales que possible."""
+    base, extra = divmod(max(total, 0), count)
+    return [base + (1 if index < extra else 0) for index in range(count)]
+
+
+def stripe_totals(product_ids, lock=False):
+    """Somme des sous-compteurs par produit réparti (les produits non répartis sont absents)."""
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    statement = select(stripe_table.c.product_id, stripe_table.c.quantity).where(stripe_table.c.product_id.in_(ids))
+    if lock:
+        statement = statement.with_for_update()
+    totals = {}
+    for product_id, quantity in db.session.execute(statement):
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    return totals
+
+
+def available_stock(products):
+    """Stock disponible de chaque produit (dict indexé par ID) : somme des sous-compteurs pour un produit réparti."""
+    stock = {product_id: product.stock for product_id, product in products.items()}
+    striped = [product_id for product_id, product in products.items() if product.stock_stripes]
+    if striped:
+        totals = stripe_totals(striped)
+        stock.update({product_id: totals.get(product_id, 0) for product_id in striped})
+    return stock
+
+
+def reserve_striped(product_id, quantity):
+    """Prélève `quantity` unités sur les sous-compteurs d'un produit, dans la transaction en cours.
+
+    Les sous-compteurs sont parcourus dans un ordre aléatoire, en commençant par ceux qui
+    couvrent toute la quantité : des commandes simultanées verrouillent en général des lignes
+    différentes. Chaque prélèvement est un UPDATE conditionnel (quantity >= prélèvement).
+    Retourne False, après avoir rendu les prélèvements partiels, si le stock ne suffit pas.
+    """
+    rows = db.session.execute(
+        select(stripe_table.c.stripe, stripe_table.c.quantity)
+        .where(stripe_table.c.product_id == product_id, stripe_table.c.quantity > 0)
+    ).all()
+    random.shuffle(rows)
+    rows.sort(key=lambda row: row.quantity < quantity)
+
+    taken, remaining = [], quantity
+    for stripe, available in rows:
+        take = min(available, remaining)
+        result = db.session.execute(
+            update(stripe_table)
+            .where(stripe_table.c.product_id == product_id, stripe_table.c.stripe == stripe,
+                   stripe_table.c.quantity >= take)
+            .values(quantity=stripe_table.c.quantity - take)
+        )
+        if result.rowcount:
+            taken.append((stripe, take))
+            remaining -= take
+            if not remaining:
+                # La ligne du produit n'est pas modifiée : le changement de stock est journalisé ici
+                record_changes('product', [product_id])
+                return True
+    for stripe, take in taken:
+        _add(product_id, stripe, take)
+    return False
+
+
+def release_striped(product_id, quantity, count):
+    """Remet `quantity` unités dans un sous-compteur tiré au hasard (annulation d'une commande)."""
+    _add(product_id, random.randrange(count), quantity)
+    record_changes('product', [product_id])
+
+
+def _add(product_id, stripe, quantity):
+    db.session.execute(
+        update(stripe_table)
+        .where(stripe_table.c.product_id == product_id, stripe_table.c.stripe == stripe)
+        .values(quantity=stripe_table.c.quantity + quantity)
+    )
+
+
+def write_stripes(product_id, total, count):
+    """Fixe les sous-compteurs d'un produit à `count` parts égales de `total` (aucun si count vaut 0).
+
+    Les lignes existantes sont mises à jour sur place : une commande en attente de leur verrou
+    les retrouve après la validation.
+    """
+    db.session.execute(
+        delete(stripe_table).where(stripe_table.c.product_id == product_id, stripe_table.c.stripe >= count)
+    )
+    if not count:
+        return
+    existing = set(db.session.execute(
+        select(stripe_table.c.stripe).where(stripe_table.c.product_id == product_id)
+    ).scalars())
+    quantities = list(enumerate(split(total, count)))
+    to_update = [{'b_stripe': stripe, 'b_quantity': quantity} for stripe, quantity in quantities if stripe in existing]
+    if to_update:
+        db.session.execute(
+            update(stripe_table)
+            .where(stripe_table.c.product_id == product_id, stripe_table.c.stripe == bindparam('b_stripe'))
+            .values(quantity=bindparam('b_quantity')),
+            to_update
+        )
+    to_insert = [
+        {'product_id': product_id, 'stripe': stripe, 'quantity': quantity}
+        for stripe, quantity in quantities if stripe not in existing
+    ]
+    if to_insert:
+        db.session.execute(insert(stripe_table), to_insert)
+
+
+def configure_stripes(product, count):
+    """Active (count > 0), modifie ou désactive (count = 0) la répartition du stock d'un produit.
+
+    Le stock courant (somme des sous-compteurs, ou colonne `stock`) est conservé.
+    """
+    if product.stock_stripes:
+        product.stock = stripe_totals([product.id], lock=True).get(product.id, 0)
+    product.stock_stripes = count
+    db.session.flush()
+    write_stripes(product.id, product.stock, count)
+
+
+def spread_stock(product_ids):
+    """Après une écriture directe de `Product.stock` (admin, import), la répartit sur les sous-compteurs."""
+    ids = set(product_ids)
+    if not ids:
+        return
+    rows = db.session.execute(
+        select(Product.id, Product.stock, Product.stock_stripes)
+        .where(Product.id.in_(ids), Product.stock_stripes > 0)
+    ).all()
+    for product_id, stock, count in rows:
+        write_stripes(product_id, stock, count)
+
+
+def rebalance_stripes(product_ids=None):
+    """Égalise les sous-compteurs de chaque produit réparti et reporte leur total dans `Product.stock`.
+
+    Un sous-compteur vide ne sert plus aux commandes ; l'égalisation rend leur chance à tous.
+    Dans la transaction en cours ; retourne les IDs des produits dont le total a changé.
+    """
+    statement = select(Product.id, Product.stock, Product.stock_stripes).where(Product.stock_stripes > 0)
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        if not product_ids:
+            return []
+        statement = statement.where(Product.id.in_(product_ids))
+    products = db.session.execute(statement).all()
+
+    totals = stripe_totals([row.id for row in products], lock=True)
+    changed = []
+    for product_id, stock, count in products:
+        total = totals.get(product_id, 0)
+        write_stripes(product_id, total, count)
+        if total != stock:
+            # Le stock affiché (somme des sous-compteurs) ne change pas : la version de la ligne
+            # (`updated_at`, vérifiée par les mises à jour en masse) est conservée
+            db.session.execute(
+                update(Product).where(Product.id == product_id).values(stock=total, updated_at=Product.updated_at)
+            )
+            changed.append(product_id)
+    record_changes('product', changed)
+    return changed
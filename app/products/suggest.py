@@ -0,0 +1,218 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from sqlalchemy import func, select
+from ..models import Product, SalesRollup
+from ..extensions import db
+from ..signals import products_changed
+from ..changefeed import current_cursor, read_changes
+
+# Au-delà de ce nombre de produits modifiés depuis la dernière synchronisation, l'index est reconstruit
+REBUILD_THRESHOLD = 10_000
+
+# Préfixes courts (un ou deux caractères) : beaucoup de candidats, résultats mémorisés
+MEMO_PREFIX_LENGTH = 2
+
+
+def normalize(text):
+    """Minuscules sans accents : « Écran » et « ecran » désignent le même mot."""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [word for word in re.split(r'\W+', normalize(text)) if word]
+
+
+def _popularity_statement(product_ids=None):
+    """(ID, nom, quantité totale vendue) de chaque produit, ou des seuls produits `product_ids`.
+
+    Lue dans les agrégats de ventes (SalesRollup), tenus à jour à chaque commande quel que soit
+    le shard qui la stocke, et qui conservent les ventes des commandes archivées. Le filtre est
+    appliqué dans l'agrégation : une mise à jour ne lit que les agrégats des produits modifiés.
+    """
+    sold = select(SalesRollup.product_id, func.sum(SalesRollup.units).label('units'))
+    statement = select(Product.id, Product.name)
+    if product_ids is not None:
+        sold = sold.where(SalesRollup.product_id.in_(product_ids))
+        statement = statement.where(Product.id.in_(product_ids))
+    sold = sold.group_by(SalesRollup.product_id).subquery()
+    return (
+        statement.add_columns(func.coalesce(sold.c.units, 0))
+        .outerjoin(sold, sold.c.product_id == Product.id)
+    )
+
+
+class SuggestIndex:
+    """Index en mémoire des mots des noms de produits pour l'autocomplétion.
+
+    Les mots distincts sont gardés triés : les mots commençant par un préfixe forment une
+    plage contiguë trouvée par dichotomie. Chaque mot renvoie à la liste de ses produits déjà
+    triée par rang (quantité commandée décroissante, puis nom) : il suffit de lire le début de
+    chaque liste de la plage, quel que soit le nombre de produits du catalogue.
+    """
+
+    def __init__(self, max_results=10):
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._terms = []
+        self._postings = {}
+        self._products = {}
+        self._memo = {}
+        # Position du journal des changements jusqu'à laquelle l'index est à jour (None : pas encore construit)
+        self.cursor = None
+        self.next_sync = 0.0
+
+    # --- Modification ---
+
+    def _add(self, product_id, name, popularity):
+        self._remove(product_id)
+        rank = (-popularity, name, product_id)
+        words = frozenset(tokenize(name))
+        self._products[product_id] = (rank, words)
+        for word in words:
+            ranks = self._postings.get(word)
+            if ranks is None:
+                ranks = self._postings[word] = []
+                bisect.insort(self._terms, word)
+            bisect.insort(ranks, rank)
+
+    def _remove(self, product_id):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        rank, words = entry
+        for word in words:
+            ranks = self._postings[word]
+            del ranks[bisect.bisect_left(ranks, rank)]
+            if not ranks:
+                del self._postings[word]
+                del self._terms[bisect.bisect_left(self._terms, word)]
+
+    def load(self, rows, cursor=None):
+        """Remplace tout le contenu de l'index par les lignes (ID, nom, popularité)."""
+        products, postings = {}, {}
+        for product_id, name, popularity in rows:
+            rank = (-popularity, name, product_id)
+            words = frozenset(tokenize(name))
+            products[product_id] = (rank, words)
+            for word in words:
+                postings.setdefault(word, []).append(rank)
+        for ranks in postings.values():
+            ranks.sort()
+        terms = sorted(postings)
+        with self._lock:
+            self._products, self._postings, self._terms = products, postings, terms
+            self._memo = {}
+            self.cursor = cursor
+
+    def update(self, rows, removed_ids=()):
+        """Applique des ajouts/modifications (ID, nom, popularité) et des suppressions."""
+        with self._lock:
+            for product_id in removed_ids:
+                self._remove(product_id)
+            for product_id, name, popularity in rows:
+                self._add(product_id, name, popularity)
+            self._memo = {}
+
+    # --- Synchronisation avec la base ---
+
+    def build(self):
+        """Construit l'index à partir de tous les produits de la base."""
+        cursor = current_cursor()
+        self.load(db.session.execute(_popularity_statement()).all(), cursor)
+
+    def refresh(self, product_ids):
+        """Relit les produits donnés (nom et popularité) ; ceux qui n'existent plus sont retirés."""
+        product_ids = set(product_ids)
+        rows = db.session.execute(_popularity_statement(product_ids)).all()
+        self.update(rows, removed_ids=product_ids - {row[0] for row in rows})
+
+    def sync(self, interval):
+        """Met l'index à jour d'après le journal des changements, au plus une fois par `interval` secondes.
+
+        Le journal couvre les créations, modifications et suppressions de produits, ainsi que
+        les variations de stock des commandes, donc aussi les changements de popularité,
+        y compris ceux faits par les autres workers.
+        """
+        now = time.monotonic()
+        if self.cursor is not None and now < self.next_sync:
+            return
+        # Une seule synchronisation à la fois ; les autres requêtes répondent avec l'index courant
+        if not self._sync_lock.acquire(blocking=self.cursor is None):
+            return
+        try:
+            if self.cursor is None:
+                self.build()
+            else:
+                changes = read_changes(since=self.cursor, limit=None)
+                product_ids = {change.entity_id for change in changes if change.entity == 'product'}
+                if len(product_ids) > REBUILD_THRESHOLD:
+                    self.build()
+                elif changes:
+                    self.refresh(product_ids)
+                    self.cursor = changes[-1].id
+            self.next_sync = now + interval
+        finally:
+            self._sync_lock.release()
+
+    # --- Lecture ---
+
+    def suggest(self, text, limit=None):
+        """Produits dont le nom contient, pour chaque mot saisi, un mot qui commence par celui-ci.
+
+        Les plus commandés d'abord, puis par nom.
+        """
+        words = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not words:
+            return []
+        limit = min(limit or self.max_results, self.max_results)
+        memo_key = words[0] if len(words) == 1 and len(words[0]) <= MEMO_PREFIX_LENGTH else None
+        wanted = self.max_results if memo_key is not None else limit
+
+        with self._lock:
+            if memo_key is not None and memo_key in self._memo:
+                return self._memo[memo_key][:limit]
+            # Le mot le plus long est en général le plus sélectif : il fournit la plage de mots à lire
+            start = bisect.bisect_left(self._terms, words[0])
+            end = bisect.bisect_left(self._terms, words[0] + '\uffff', start)
+            others = words[1:]
+            ranks = []
+            for index in range(start, end):
+                term_ranks = self._postings[self._terms[index]]
+                if not others:
+                    # Les `wanted` premiers de chaque mot contiennent forcément les `wanted` premiers de la plage
+                    ranks.extend(term_ranks[:wanted])
+                    continue
+                found = 0
+                for rank in term_ranks:
+                    product_words = self._products[rank[2]][1]
+                    if all(any(word.startswith(prefix) for word in product_words) for prefix in others):
+                        ranks.append(rank)
+                        found += 1
+                        if found == wanted:
+                            break
+
+            suggestions, seen = [], set()
+            for popularity, name, product_id in sorted(ranks):
+                if product_id not in seen:
+                    seen.add(product_id)
+                    suggestions.append({"id": product_id, "name": name, "popularity": -popularity})
+                    if len(suggestions) == wanted:
+                        break
+            if memo_key is not None:
+                self._memo[memo_key] = suggestions
+        return suggestions[:limit]
+
+    def info(self):
+        with self._lock:
+            return {"products": len(self._products), "terms": len(self._terms), "cursor": self.cursor}
+
+
+@products_changed.connect
+def schedule_suggest_sync(app, **extra):
+    # Les changements faits par ce worker sont pris en compte dès la prochaine suggestion
+    app.extensions['suggest_index'].next_sync = 0.0
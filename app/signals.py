@@ -0,0 +1,13 @@
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+# Émis après le commit d'une écriture qui modifie des produits (catalogue ou stock).
+# Argument `product_ids` : liste des IDs concernés, ou None si tout le catalogue peut être touché.
+products_changed = _signals.signal('products-changed')
+
+
+def notify_products_changed(product_ids=None):
+    """Signale, après commit, que des produits ont changé (None : potentiellement tous)."""
+    products_changed.send(current_app._get_current_object(), product_ids=product_ids)
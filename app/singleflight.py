@@ -0,0 +1,75 @@
+import threading
+from functools import wraps
+from flask import current_app, request
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Regroupe les appels concurrents identiques : un seul s'exécute, les autres partagent son résultat."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'executions': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['shared'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # Les requêtes arrivées après cet instant déclencheront une nouvelle exécution
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def coalesce(view):
+    """Décorateur de route GET : les requêtes identiques simultanées partagent une seule exécution.
+
+    La réponse est matérialisée (corps encodé, statut, en-têtes) par la première requête
+    puis recopiée pour les suivantes. La clé est le chemin complet, paramètres compris,
+    et l'en-tête Accept-Encoding.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config['SINGLEFLIGHT_ENABLED']:
+            return view(*args, **kwargs)
+
+        def execute():
+            response = current_app.make_response(view(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+
+        flight = current_app.extensions['singleflight']
+        # L'encodage accepté fait partie de la clé : les variantes compressées ne sont pas partagées
+        key = (request.method, request.full_path, request.headers.get('Accept-Encoding', ''))
+        body, status, headers = flight.do(key, execute)
+        return current_app.response_class(body, status=status, headers=headers)
+    return wrapper
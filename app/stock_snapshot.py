@@ -0,0 +1,143 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+# En-tête : signature, version du format, capacité (nombre de produits), génération (incrémentée
+# à chaque reconstruction complète) ; puis un compteur de séquence par bloc de produits, puis le
+# stock de chaque produit (int32, stock + 1 : 0 signifie « absent de l'instantané »).
+MAGIC = b'DMSTOCK1'
+HEADER = struct.Struct('<8sIIQ')
+BLOCK_SIZE = 64
+MAX_READ_ATTEMPTS = 3
+
+
+class StockSnapshot:
+    """Instantané du stock par ID de produit, dans un fichier mappé en mémoire partagé par les workers d'un hôte.
+
+    4 octets par produit (plus 4 par bloc de 64 produits). Les écrivains (processus qui modifient
+    le stock) se succèdent sous un verrou de fichier ; les lecteurs ne verrouillent rien : chaque
+    bloc a un compteur de séquence, impair pendant une écriture (seqlock). Une lecture qui voit
+    un compteur impair ou modifié est recommencée, puis abandonnée (None : lire la base).
+    Le fichier est ouvert au premier accès de chaque processus (après le fork des workers).
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self.blocks = -(-capacity // BLOCK_SIZE)
+        self._pid = None
+        self._open_lock = threading.Lock()
+        # flock n'exclut pas les threads d'un même processus (descripteur partagé)
+        self._write_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'retries': 0, 'writes': 0}
+
+    def _open(self):
+        import numpy as np
+
+        if self._pid == os.getpid():
+            return
+        with self._open_lock:
+            if self._pid == os.getpid():
+                return
+            size = HEADER.size + 4 * self.blocks + 4 * self.capacity
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, HEADER.size, 0)
+                if len(header) < HEADER.size or HEADER.unpack(header)[:3] != (MAGIC, 1, self.capacity):
+                    # Fichier nouveau ou d'un autre format : recréé vide (creux sur disque)
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, HEADER.pack(MAGIC, 1, self.capacity, 0), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._map = mmap.mmap(fd, size)
+            self._sequences = np.frombuffer(self._map, dtype=np.uint32, count=self.blocks, offset=HEADER.size)
+            self._stock = np.frombuffer(self._map, dtype=np.int32, count=self.capacity,
+                                        offset=HEADER.size + 4 * self.blocks)
+            self._pid = os.getpid()
+
+    @property
+    def generation(self):
+        """Numéro de la dernière reconstruction complète (0 : jamais construit)."""
+        self._open()
+        return HEADER.unpack_from(self._map, 0)[3]
+
+    def get(self, product_ids):
+        """Stock des produits demandés : {id: stock}, sans les produits absents de l'instantané.
+
+        Retourne None si une écriture concurrente empêche une lecture cohérente.
+        """
+        import numpy as np
+
+        self._open()
+        product_ids = list(product_ids)
+        ids = np.asarray([product_id for product_id in product_ids if 0 <= product_id < self.capacity], dtype=np.int64)
+        blocks = ids // BLOCK_SIZE
+        for _ in range(MAX_READ_ATTEMPTS):
+            before = self._sequences[blocks].copy()
+            values = self._stock[ids].copy()
+            if not (before & 1).any() and np.array_equal(before, self._sequences[blocks]):
+                found = values > 0
+                self.stats['hits'] += int(found.sum())
+                self.stats['misses'] += len(product_ids) - int(found.sum())
+                return dict(zip(ids[found].tolist(), (values[found] - 1).tolist()))
+            self.stats['retries'] += 1
+        return None
+
+    def set(self, stock_by_id):
+        """Écrit le stock de produits ({id: stock}, None pour retirer un produit de l'instantané)."""
+        import numpy as np
+
+        self._open()
+        items = [(product_id, stock) for product_id, stock in stock_by_id.items() if 0 <= product_id < self.capacity]
+        if not items:
+            return
+        ids = np.fromiter((product_id for product_id, _ in items), dtype=np.int64, count=len(items))
+        values = np.fromiter((0 if stock is None else min(max(stock, 0), 2**31 - 2) + 1 for _, stock in items),
+                             dtype=np.int32, count=len(items))
+        blocks = np.unique(ids // BLOCK_SIZE)
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._sequences[blocks] += 1 # Impair : écriture en cours
+                self._stock[ids] = values
+                self._sequences[blocks] += 1
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.stats['writes'] += len(items)
+
+    def rebuild(self, ids, stocks):
+        """Remplace tout l'instantané par le stock des produits `ids` (tableaux alignés) et incrémente la génération."""
+        import numpy as np
+
+        self._open()
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = (ids >= 0) & (ids < self.capacity)
+        ids = ids[keep]
+        values = np.clip(np.asarray(stocks, dtype=np.int64)[keep], 0, 2**31 - 2).astype(np.int32) + 1
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._sequences += 1
+                self._stock[:] = 0
+                self._stock[ids] = values
+                self._sequences += 1
+                HEADER.pack_into(self._map, 0, MAGIC, 1, self.capacity, self.generation + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return len(ids)
+
+    def info(self):
+        """Description de l'instantané et compteurs du worker courant."""
+        self._open()
+        return {
+            'path': self.path,
+            'capacity': self.capacity,
+            'generation': self.generation,
+            'bytes': len(self._map),
+            'stats': dict(self.stats),
+        }
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from sqlalchemy import select
+from .models import Product
+from .extensions import db
+from .changefeed import current_cursor, read_changes
+
+# Nombre maximal d'entrées du journal lues par tour de scrutation
+POLL_BATCH_SIZE = 1000
+
+
+def format_sse(data, event=None, event_id=None):
+    """Encode un événement au format Server-Sent Events."""
+    message = ''
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    if event:
+        message += f'event: {event}\n'
+    return message + f'data: {json.dumps(data)}\n\n'
+
+
+class Subscriber:
+    """Abonné au flux : tampon borné, les événements les plus anciens sont abandonnés en cas de retard.
+
+    Avec une boucle asyncio (`loop`), l'abonné est aussi attendu par `wait_async`, sans thread.
+    """
+
+    def __init__(self, product_ids, buffer_size, loop=None):
+        self.product_ids = frozenset(product_ids)
+        self.events = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+        self._condition = threading.Condition()
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else None
+
+    def push(self, event):
+        with self._condition:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._condition.notify()
+        self._wake()
+
+    def wait(self, timeout):
+        """Attend des événements (au plus `timeout` secondes) et vide le tampon."""
+        with self._condition:
+            if not self.events and not self.closed:
+                self._condition.wait(timeout)
+            return self._drain()
+
+    async def wait_async(self, timeout):
+        """Comme wait, depuis la boucle asyncio de l'abonné : l'attente n'occupe aucun thread."""
+        with self._condition:
+            pending = bool(self.events) or self.closed
+        if not pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        with self._condition:
+            return self._drain()
+
+    def _drain(self):
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def _wake(self):
+        # push et close sont appelés par le thread de scrutation : réveil via la boucle de l'abonné
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        self._wake()
+
+
+def read_snapshot(product_ids):
+    """Position du journal puis état actuel {id: (stock, price)} des produits, lu après cette position
+    pour ne manquer aucun changement."""
+    cursor = current_cursor()
+    snapshot = {
+        row.id: (row.stock, row.price)
+        for row in db.session.execute(
+            select(Product.id, Product.available_stock.label('stock'), Product.price).where(Product.id.in_(product_ids))
+        )
+    }
+    return cursor, snapshot
+
+
+class StockBroker:
+    """Diffusion des changements de stock et de prix aux abonnés SSE d'un processus.
+
+    Un seul thread par worker scrute le journal des changements du catalogue
+    (`catalog_change`), qui sert de transport entre les workers gunicorn : une écriture
+    faite par n'importe quel worker y est visible après son commit. Seuls les produits
+    suivis par au moins un abonné sont relus, en une requête par tour.
+    """
+
+    def __init__(self, buffer_size=100, poll_interval=1.0):
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._subscribers = {} # product_id -> set(Subscriber)
+        self._last_known = {} # product_id -> (stock, price)
+        self._cursor = None
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+        self.stats = {'subscribers': 0, 'events_published': 0, 'events_dropped': 0, 'polls': 0}
+
+    # --- Abonnements ---
+
+    def subscribe(self, product_ids, snapshot, cursor, max_subscribers=None, loop=None):
+        """Enregistre un abonné, ou retourne None si le processus en compte déjà `max_subscribers`.
+
+        `snapshot` contient l'état initial {id: (stock, price)} envoyé au client et `cursor`
+        la position du journal lue juste avant ce snapshot.
+        """
+        subscriber = Subscriber(product_ids, self.buffer_size, loop)
+        with self._lock:
+            if max_subscribers is not None and self.stats['subscribers'] >= max_subscribers:
+                return None
+            if self._cursor is None:
+                self._cursor = cursor
+            for product_id in subscriber.product_ids:
+                self._subscribers.setdefault(product_id, set()).add(subscriber)
+                if product_id in snapshot:
+                    self._last_known.setdefault(product_id, snapshot[product_id])
+            self.stats['subscribers'] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            for product_id in subscriber.product_ids:
+                subscribers = self._subscribers.get(product_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[product_id]
+                    self._last_known.pop(product_id, None)
+            self.stats['subscribers'] -= 1
+            self.stats['events_dropped'] += subscriber.dropped
+
+    def publish(self, product_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(product_id, ()))
+        for subscriber in subscribers:
+            subscriber.push(event)
+        self.stats['events_published'] += len(subscribers)
+
+    # --- Scrutation du journal ---
+
+    def poll_once(self):
+        """Lit les nouveaux changements et publie ceux qui modifient le stock ou le prix."""
+        with self._lock:
+            watched = set(self._subscribers)
+        if not watched:
+            # Personne n'écoute : on repartira de la fin du journal au prochain abonné
+            self._cursor = None
+            return 0
+        if self._cursor is None:
+            self._cursor = current_cursor()
+            return 0
+
+        self.stats['polls'] += 1
+        changed = set()
+        while True:
+            changes = read_changes(since=self._cursor, limit=POLL_BATCH_SIZE)
+            if not changes:
+                break
+            self._cursor = changes[-1].id
+            changed.update(c.entity_id for c in changes if c.entity == 'product' and c.entity_id in watched)
+            if len(changes) < POLL_BATCH_SIZE:
+                break
+        if not changed:
+            return 0
+
+        rows = {
+            row.id: (row.stock, row.price)
+            for row in db.session.execute(
+                select(Product.id, Product.available_stock.label('stock'), Product.price).where(Product.id.in_(changed))
+            )
+        }
+        # Libère la connexion : le thread ne garde pas de transaction ouverte entre deux tours
+        db.session.rollback()
+
+        published = 0
+        for product_id in sorted(changed):
+            state = rows.get(product_id)
+            if state == self._last_known.get(product_id):
+                continue
+            if state is None:
+                event = {'id': product_id, 'deleted': True}
+            else:
+                event = {'id': product_id, 'stock': state[0], 'price': state[1]}
+            self._last_known[product_id] = state
+            self.publish(product_id, (self._cursor, event))
+            published += 1
+        return published
+
+    def ensure_started(self, app):
+        """Démarre le thread de scrutation de ce processus (une seule fois, et de nouveau après un fork)."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._cursor = None
+            self._thread = threading.Thread(target=self._run, args=(app,), name='stock-stream-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self, app):
+        while not self._stopped.wait(self.poll_interval):
+            with app.app_context():
+                try:
+                    self.poll_once()
+                except Exception:
+                    app.logger.exception('Échec de la scrutation du journal des changements')
+                    db.session.rollback()
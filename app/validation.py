@@ -0,0 +1,231 @@
+import math
+from abc import ABC, abstractmethod
+from functools import wraps
+from flask import current_app, jsonify, request
+
+# Nombre maximal d'erreurs rapportées : un très gros corps invalide n'est pas parcouru en entier
+MAX_ERRORS = 20
+
+_MISSING = object()
+
+
+def _limit(value):
+    """Limite fixe, ou lue dans la configuration de l'application si c'est un nom de clé."""
+    if isinstance(value, str):
+        return lambda: current_app.config[value]
+    return lambda: value
+
+
+class Field(ABC):
+    """Champ d'un schéma, compilé une seule fois en fonction de vérification.
+
+    Champ simple (`nested` faux) : check(value) retourne None ou une erreur (code, message).
+    Conteneur (liste, objet) : check(value, path, errors) ajoute ses erreurs à `errors`, le chemin
+    n'étant construit que pour les éléments.
+    """
+
+    nested = False
+
+    def __init__(self, required=False, nullable=False):
+        self.required = required
+        self.nullable = nullable
+
+    @abstractmethod
+    def compile(self):
+        """Retourne la fonction de vérification du champ."""
+
+
+class String(Field):
+    def __init__(self, min_length=None, max_length=None, choices=None, **kwargs):
+        super().__init__(**kwargs)
+        self.min_length, self.max_length, self.choices = min_length, max_length, choices
+
+    def compile(self):
+        min_length, max_length = self.min_length, self.max_length
+        choices = frozenset(self.choices) if self.choices else None
+        listed = ', '.join(self.choices) if self.choices else ''
+
+        def check(value):
+            if not isinstance(value, str):
+                return 'type', 'Une chaîne est attendue'
+            if min_length is not None and len(value) < min_length:
+                return 'min_length', f'Au moins {min_length} caractères'
+            if max_length is not None and len(value) > max_length:
+                return 'max_length', f'Au plus {max_length} caractères'
+            if choices is not None and value not in choices:
+                return 'choices', f'Valeurs acceptées : {listed}'
+            return None
+        return check
+
+
+class Number(Field):
+    type_name = 'nombre'
+    types = (int, float)
+
+    def __init__(self, minimum=None, maximum=None, **kwargs):
+        super().__init__(**kwargs)
+        self.minimum, self.maximum = minimum, maximum
+
+    def compile(self):
+        minimum, maximum, types = self.minimum, self.maximum, self.types
+        message = f'Un {self.type_name} est attendu'
+
+        def check(value):
+            # bool est une sous-classe de int en Python, pas en JSON
+            if value.__class__ not in types and (not isinstance(value, types) or isinstance(value, bool)):
+                return 'type', message
+            if value.__class__ is float and not math.isfinite(value):
+                return 'type', message
+            if minimum is not None and value < minimum:
+                return 'minimum', f'Valeur minimale : {minimum}'
+            if maximum is not None and value > maximum:
+                return 'maximum', f'Valeur maximale : {maximum}'
+            return None
+        return check
+
+
+class Integer(Number):
+    type_name = 'entier'
+    types = (int,)
+
+
+class List(Field):
+    """Liste d'éléments validés par `items` (None : éléments non vérifiés, laissés à la route).
+
+    `max_items` peut être un nom de clé de configuration.
+    """
+
+    nested = True
+
+    def __init__(self, items=None, min_items=None, max_items=None, **kwargs):
+        super().__init__(**kwargs)
+        self.items, self.min_items, self.max_items = items, min_items, max_items
+
+    def compile(self):
+        check_item = self.items.compile() if self.items is not None else None
+        nested_items = self.items is not None and self.items.nested
+        min_items = self.min_items
+        max_items = _limit(self.max_items) if self.max_items is not None else None
+
+        def check(value, path, errors):
+            if not isinstance(value, list):
+                errors.append({'field': path, 'code': 'type', 'message': 'Une liste est attendue'})
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append({'field': path, 'code': 'min_items', 'message': f'Au moins {min_items} éléments'})
+                return
+            if max_items is not None:
+                limit = max_items()
+                if len(value) > limit:
+                    # Vérifié avant de parcourir les éléments
+                    errors.append({'field': path, 'code': 'max_items', 'message': f'Au plus {limit} éléments'})
+                    return
+            if check_item is None:
+                return
+            for index, item in enumerate(value):
+                if nested_items:
+                    check_item(item, f'{path}[{index}]', errors)
+                    if len(errors) >= MAX_ERRORS:
+                        return
+                    continue
+                error = check_item(item)
+                if error is not None:
+                    errors.append({'field': f'{path}[{index}]', 'code': error[0], 'message': error[1]})
+                    if len(errors) >= MAX_ERRORS:
+                        return
+        return check
+
+
+class Object(Field):
+    """Objet JSON aux champs déclarés ; les champs inconnus sont ignorés."""
+
+    nested = True
+
+    def __init__(self, fields, **kwargs):
+        super().__init__(**kwargs)
+        self.fields = fields
+
+    def compile(self):
+        compiled = [
+            (name, field.required, field.nullable, field.nested, field.compile())
+            for name, field in self.fields.items()
+        ]
+
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append({'field': path or '(corps)', 'code': 'type', 'message': 'Un objet est attendu'})
+                return
+            prefix = f'{path}.' if path else ''
+            for name, required, nullable, nested, check_field in compiled:
+                field_value = value.get(name, _MISSING)
+                if field_value is _MISSING:
+                    if required:
+                        errors.append({'field': prefix + name, 'code': 'required', 'message': 'Champ requis'})
+                    continue
+                if field_value is None:
+                    if not nullable:
+                        errors.append({'field': prefix + name, 'code': 'null', 'message': 'Valeur nulle non autorisée'})
+                    continue
+                if nested:
+                    check_field(field_value, prefix + name, errors)
+                else:
+                    error = check_field(field_value)
+                    if error is None:
+                        continue
+                    errors.append({'field': prefix + name, 'code': error[0], 'message': error[1]})
+                if len(errors) >= MAX_ERRORS:
+                    return
+        return check
+
+
+class Schema:
+    """Schéma d'un corps de requête JSON, compilé une seule fois (à l'import du module qui le déclare).
+
+    `max_bytes` borne la taille du corps (nombre ou nom de clé de configuration), vérifiée
+    avant sa lecture.
+    """
+
+    def __init__(self, fields, max_bytes='REQUEST_MAX_BYTES'):
+        self.fields = fields
+        self.max_bytes = _limit(max_bytes)
+        self._check = Object(fields).compile()
+
+    def validate(self, data):
+        """Retourne la liste des erreurs (vide si `data` est valide)."""
+        errors = []
+        self._check(data, '', errors)
+        return errors[:MAX_ERRORS]
+
+
+def _error(message, status, errors=None):
+    body = {"message": message}
+    if errors is not None:
+        body["errors"] = errors
+    return jsonify(body), status
+
+
+def validate_json(schema):
+    """Décorateur de route : refuse un corps trop gros (413) ou invalide (400, erreurs détaillées) avant la route.
+
+    La route lit ensuite le corps validé avec `request.get_json()` (analysé une seule fois).
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            max_bytes = schema.max_bytes()
+            if request.content_length is not None and request.content_length > max_bytes:
+                return _error(f"Corps de requête trop volumineux (maximum {max_bytes} octets)", 413)
+            # Corps sans Content-Length (transfert en morceaux) : lecture bornée
+            request.max_content_length = max_bytes
+            data = request.get_json(silent=True)
+            if data is None:
+                if len(request.get_data()) >= max_bytes:
+                    return _error(f"Corps de requête trop volumineux (maximum {max_bytes} octets)", 413)
+                return _error("Le corps de la requête doit être un objet JSON valide", 400)
+            errors = schema.validate(data)
+            if errors:
+                status = 413 if any(error['code'] == 'max_items' for error in errors) else 400
+                return _error("Données invalides", status, errors)
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
@@ -0,0 +1,145 @@
+import os
+import time
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import configure_mappers
+from .extensions import db
+from .models import SalesRollup
+
+# Période des ventes retenue pour choisir les produits dont le détail est préchauffé
+TOP_PRODUCTS_DAYS = 30
+
+
+class WarmupState:
+    """État du préchauffage d'un worker ('cold', 'warming', 'ready' ou 'failed'), exposé par /api/monitoring/ready.
+
+    Avec le préchargement gunicorn, l'état est celui du maître, hérité au fork avec les caches préchauffés.
+    """
+
+    def __init__(self):
+        self.status = 'cold'
+        self.steps = {}
+        self.error = None
+        self.warmed_by = None
+
+    def info(self):
+        return {
+            'status': self.status,
+            'steps_ms': dict(self.steps),
+            'error': self.error,
+            'warmed_by_pid': self.warmed_by,
+            'pid': os.getpid(),
+        }
+
+
+def _step(state, name, fn):
+    start = time.perf_counter()
+    fn()
+    state.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def dispose_engines(app, close=True):
+    """Vide les pools de connexions de toutes les bases (principale et shards).
+
+    Dans un worker forké, `close=False` abandonne les connexions héritées du maître sans les
+    fermer : elles appartiennent au maître, le worker ouvre les siennes.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def prime_pools(app):
+    """Ouvre d'avance WARMUP_CONNECTIONS connexions par base, rendues aussitôt au pool."""
+    count = app.config['WARMUP_CONNECTIONS']
+    with app.app_context():
+        for engine in db.engines.values():
+            connections = [engine.connect() for _ in range(count)]
+            for connection in connections:
+                connection.close()
+
+
+def top_product_ids(limit):
+    """Produits les plus vendus sur TOP_PRODUCTS_DAYS jours, d'après les agrégats de ventes."""
+    since = date.today() - timedelta(days=TOP_PRODUCTS_DAYS)
+    return db.session.scalars(
+        select(SalesRollup.product_id)
+        .where(SalesRollup.day >= since)
+        .group_by(SalesRollup.product_id)
+        .order_by(func.sum(SalesRollup.units).desc())
+        .limit(limit)
+    ).all()
+
+
+def _get_paths(app, paths):
+    # Requêtes internes : routage, compilation des requêtes SQL, caches de réponses et compression
+    client = app.test_client()
+    for path in paths:
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} : statut {response.status_code}')
+
+
+def _build_stock_snapshot(app):
+    # Instantané du stock de l'hôte : construit une fois, ici ou par `flask stock-snapshot`
+    from .products.availability import rebuild_snapshot
+
+    snapshot = app.extensions['stock_snapshot']
+    if snapshot.generation == 0:
+        with app.app_context():
+            rebuild_snapshot(snapshot)
+
+
+def _get_top_products(app):
+    with app.app_context():
+        product_ids = top_product_ids(app.config['WARMUP_TOP_PRODUCTS'])
+    client = app.test_client()
+    for product_id in product_ids:
+        # Un produit supprimé depuis ses ventes répond 404 : il est simplement ignoré
+        client.get(f'/api/products/{product_id}', headers={'Accept-Encoding': 'gzip'})
+
+
+def warm_up(app, pools=True):
+    """Préchauffe l'application avant qu'elle serve ; retourne son état.
+
+    Configure les mappers, construit l'instantané du stock s'il n'existe pas encore, exécute les
+    lectures du catalogue de WARMUP_PATHS, met en cache le détail des produits les plus vendus
+    et, si `pools`, ouvre les connexions d'avance. Un échec
+    est journalisé et laisse l'état 'failed' : le worker sert quand même, mais n'est pas prêt.
+    """
+    state = app.extensions['warmup']
+    state.status, state.steps, state.error = 'warming', {}, None
+    try:
+        _step(state, 'mappers', configure_mappers)
+        if app.extensions.get('stock_snapshot') is not None:
+            _step(state, 'stock_snapshot', lambda: _build_stock_snapshot(app))
+        _step(state, 'paths', lambda: _get_paths(app, app.config['WARMUP_PATHS']))
+        _step(state, 'top_products', lambda: _get_top_products(app))
+        if pools:
+            _step(state, 'connections', lambda: prime_pools(app))
+    except Exception as e:
+        app.logger.exception('Échec du préchauffage')
+        state.status, state.error = 'failed', str(e)
+        return state
+    state.status, state.warmed_by = 'ready', os.getpid()
+    return state
+
+
+def warm_worker(app):
+    """Préchauffage d'un worker avant qu'il accepte des connexions.
+
+    Si le maître a déjà préchauffé l'application (préchargement), seules les connexions du
+    worker sont ouvertes ; sinon le préchauffage est complet.
+    """
+    state = app.extensions['warmup']
+    if not app.config['WARMUP_ENABLED']:
+        state.status = 'ready'
+        return state
+    if state.status == 'ready':
+        try:
+            _step(state, 'connections', lambda: prime_pools(app))
+        except Exception as e:
+            app.logger.exception('Échec de l\'ouverture des connexions')
+            state.status, state.error = 'failed', str(e)
+        return state
+    return warm_up(app)
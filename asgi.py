@@ -0,0 +1,7 @@
+from app.asgi import create_asgi_app
+from dotenv import load_dotenv
+
+load_dotenv() # Charge les variables d'environnement du fichier .env
+
+# Lectures du catalogue en asynchrone, le reste par l'application Flask : uvicorn asgi:app
+app = create_asgi_app()
@@ -0,0 +1,146 @@
+"""Débit des lectures du catalogue : service ASGI (asgi.py) contre application WSGI (run.py).
+
+Peuple une base SQLite temporaire (réutilisable avec --db), démarre tour à tour gunicorn
+(workers gthread) et uvicorn sur la même base, puis envoie pendant --duration secondes des
+lectures du catalogue (liste, page suivante par curseur, détail, catégories) sur --concurrency
+connexions persistantes. Affiche le débit, les percentiles de latence et les erreurs.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_asgi --products 100000 --concurrency 50 500 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def populate(db, Product, Category, count, categories=20, chunk=50_000):
+    from sqlalchemy import insert
+    db.session.execute(insert(Category), [{'name': f'Catégorie {i}'} for i in range(categories)])
+    rng = random.Random(42)
+    for start in range(0, count, chunk):
+        db.session.execute(insert(Product), [{
+            'name': f'Produit {i}',
+            'description': 'Description du produit ' * 8,
+            'price': round(rng.lognormvariate(4.5, 1.2), 2),
+            'stock': rng.randint(0, 500),
+            'category_id': rng.randint(1, categories)
+        } for i in range(start, min(start + chunk, count))])
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Le serveur ne répond pas sur le port {port}')
+
+
+async def fetch(reader, writer, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port, paths, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=1 << 20)
+        try:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                status = await fetch(reader, writer, rng.choice(paths)(rng))
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(seed) for seed in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2, help='Processus par serveur.')
+    parser.add_argument('--threads', type=int, default=8, help='Threads par worker gunicorn.')
+    parser.add_argument('--db', help='Fichier SQLite à réutiliser (créé et peuplé s\'il n\'existe pas).')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_asgi.db')
+    must_populate = not os.path.exists(path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    if must_populate:
+        from app import create_app
+        from app.extensions import db
+        from app.models import Product, Category
+        with create_app().app_context():
+            db.create_all()
+            populate(db, Product, Category, args.products)
+        print(f'{args.products} produits insérés ({path})')
+
+    count = args.products
+    paths = [
+        lambda rng: f'/api/products/?page={rng.randint(1, 50)}',
+        lambda rng: '/api/products/?cursor=&per_page=20&sort=price',
+        lambda rng: f'/api/products/{rng.randint(1, count)}',
+        lambda rng: f'/api/products/?ids={",".join(str(rng.randint(1, count)) for _ in range(10))}',
+        lambda rng: f'/api/categories/{rng.randint(1, 20)}',
+    ]
+    servers = {
+        'wsgi (gunicorn)': lambda port: [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-k', 'gthread',
+                                         '--threads', str(args.threads), '-b', f'127.0.0.1:{port}', 'run:app'],
+        'asgi (uvicorn)': lambda port: [sys.executable, '-m', 'uvicorn', '--workers', str(args.workers),
+                                        '--port', str(port), '--log-level', 'warning', 'asgi:app'],
+    }
+
+    print(f"{'serveur':>16} {'connexions':>10} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+    for name, command in servers.items():
+        port = free_port()
+        server = subprocess.Popen(command(port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(load(port, paths, concurrency, args.duration))
+                latencies.sort()
+                p50 = latencies[len(latencies) // 2] * 1000
+                p99 = latencies[int(len(latencies) * 0.99)] * 1000
+                print(f'{name:>16} {concurrency:>10} {len(latencies) / elapsed:>9.0f} {p50:>8.1f} {p99:>8.1f} {errors:>8}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
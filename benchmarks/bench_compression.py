@@ -0,0 +1,66 @@
+"""Coût CPU de la compression des réponses contre les octets économisés.
+
+Génère des réponses JSON représentatives (liste de produits paginée, liste de
+commandes admin) et mesure, pour gzip et deflate à plusieurs niveaux, le temps
+de compression, la taille obtenue et le débit.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_compression --products 100 1000 --repeat 50
+"""
+import argparse
+import json
+import random
+import time
+from app.compression import compress
+
+LEVELS = (1, 3, 6, 9)
+
+
+def products_payload(count):
+    rng = random.Random(42)
+    return json.dumps({
+        "products": [{
+            "id": i,
+            "name": f"Produit {i} {rng.choice(['Pro', 'Gamer', 'Ultra', 'Mini'])}",
+            "sku": f"SKU-{i:07d}",
+            "description": "Description détaillée du produit, caractéristiques et garanties. " * 2,
+            "price": round(rng.uniform(5, 2500), 2),
+            "stock": rng.randint(0, 500),
+            "category_id": rng.randint(1, 20),
+            "category_name": "Composants",
+            "created_at": "Thu, 23 Oct 2025 10:35:15 GMT",
+            "updated_at": "Thu, 23 Oct 2025 10:35:15 GMT"
+        } for i in range(count)],
+        "total": count, "pages": 1, "current_page": 1, "next_page": None, "prev_page": None
+    }).encode('utf-8')
+
+
+def bench(body, encoding, level, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress(body, encoding, level)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, len(compressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'produits':>9} {'encodage':>8} {'niveau':>6} {'brut (o)':>10} {'compressé':>10} "
+          f"{'gain':>6} {'ms/réponse':>10} {'Mo/s':>7} {'o gagnés/µs':>11}")
+    for count in args.products:
+        body = products_payload(count)
+        for encoding in ('gzip', 'deflate'):
+            for level in LEVELS:
+                elapsed, size = bench(body, encoding, level, args.repeat)
+                saved = len(body) - size
+                print(f"{count:>9} {encoding:>8} {level:>6} {len(body):>10} {size:>10} "
+                      f"{saved / len(body):>6.1%} {elapsed * 1000:>10.3f} "
+                      f"{len(body) / elapsed / 1e6:>7.1f} {saved / (elapsed * 1e6):>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
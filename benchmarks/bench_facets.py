@@ -0,0 +1,92 @@
+"""Latence des facettes de la liste de produits face à leur budget.
+
+Peuple une base SQLite temporaire (1 million de produits par défaut, réutilisable
+avec --db) puis mesure chaque facette sans filtre, filtrée par catégorie et filtrée
+par recherche textuelle. Les percentiles sont comparés aux budgets
+FACET_LATENCY_BUDGETS_MS ; le code de sortie vaut 1 si un budget est dépassé (p95).
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_facets --products 1000000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def populate(db, Product, Category, count, categories=20, chunk=50_000):
+    from sqlalchemy import insert
+    db.session.execute(insert(Category), [{'name': f'Catégorie {i}'} for i in range(categories)])
+    rng = random.Random(42)
+    words = ['Pro', 'Gamer', 'Ultra', 'Mini', 'Max', 'Slim', 'RGB', 'Wireless']
+    for start in range(0, count, chunk):
+        db.session.execute(insert(Product), [{
+            'name': f'Produit {i} {rng.choice(words)}',
+            'price': round(rng.lognormvariate(4.5, 1.2), 2),
+            'stock': rng.randint(0, 500),
+            'category_id': rng.randint(1, categories)
+        } for i in range(start, min(start + chunk, count))])
+        db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', help='Fichier SQLite à réutiliser (créé et peuplé s\'il n\'existe pas).')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_facets.db')
+    must_populate = not os.path.exists(path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Product, Category
+    from app.products.facets import category_facet, price_facet
+
+    app = create_app()
+    failed = False
+    with app.app_context():
+        if must_populate:
+            db.create_all()
+            start = time.perf_counter()
+            populate(db, Product, Category, args.products)
+            print(f'{args.products} produits insérés en {time.perf_counter() - start:.1f} s ({path})')
+
+        boundaries = app.config['PRICE_FACET_BOUNDARIES']
+        budgets = app.config['FACET_LATENCY_BUDGETS_MS']
+        scenarios = {
+            'sans filtre': [],
+            'category_id=3': [Product.category_id == 3],
+            'q=Gamer': [Product.name.ilike('%Gamer%')],
+        }
+        facets = {
+            'category': lambda conditions: category_facet(conditions),
+            'price': lambda conditions: price_facet(conditions, boundaries),
+        }
+
+        print(f"{'facette':>9} {'filtre':>14} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'budget':>7}")
+        for scenario, conditions in scenarios.items():
+            for name, facet in facets.items():
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    facet(conditions)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                over = p95 > budgets[name]
+                failed |= over and scenario != 'sans filtre' # sans filtre : servi par le cache en production
+                print(f"{name:>9} {scenario:>14} {statistics.median(timings):>8.1f} {p95:>8.1f} "
+                      f"{timings[-1]:>8.1f} {budgets[name]:>6}{'!' if over else ' '}")
+
+    print('Les facettes sans filtre sont mises en cache (FACETS_CACHE_TTL) : leur coût n\'est payé qu\'une fois par worker et par période.')
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Débit et latence de la création de commandes, avec et sans group commit.
+
+Des clients parallèles (threads) créent des commandes en boucle par POST /api/orders/ pendant
+--duration secondes, d'abord avec une transaction par commande, puis avec le group commit pour
+chaque fenêtre de --windows (ms). Chaque transaction validée coûte une synchronisation disque ;
+le group commit la partage entre les commandes d'un lot. Le débit et les percentiles de
+latence (p50, p99, p99.9) sont affichés pour chaque configuration.
+
+SQLite est utilisé en mode WAL (synchronous=FULL) ; PostgreSQL avec --database-url.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_group_commit --clients 32 --windows 2 5
+    python -m benchmarks.bench_group_commit --database-url postgresql://localhost/bench
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(app, clients, duration, products, headers):
+    latencies = [[] for _ in range(clients)]
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        http = app.test_client()
+        body = json.dumps({
+            'items': [{'product_id': products[index % len(products)], 'quantity': 1}],
+            'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+            'shipping_postal_code': '75001', 'shipping_country': 'France'
+        })
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            res = http.post('/api/orders/', data=body, headers=headers, content_type='application/json')
+            if res.status_code != 201:
+                raise RuntimeError(res.get_data(as_text=True))
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(value for values in latencies for value in values), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--products', type=int, default=100, help='Produits commandés (répartis entre les clients).')
+    parser.add_argument('--duration', type=float, default=5.0, help='Durée de chaque mesure (s).')
+    parser.add_argument('--windows', type=float, nargs='+', default=[2, 5], help='Fenêtres de regroupement (ms).')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--database-url', help='Base de test (vidée) ; SQLite temporaire en mode WAL par défaut.')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_group_commit.db')}"
+    sqlite = os.environ['DATABASE_URL'].startswith('sqlite')
+
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event, insert
+    from app import create_app
+    from app.extensions import db
+    from app.models import Category, Product, User
+    from config import Config
+
+    class BenchConfig(Config):
+        # Un thread par client : une connexion chacun ; SQLite attend le verrou au lieu d'échouer
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {'connect_args': {'timeout': 60, 'check_same_thread': False}} if sqlite
+            else {'pool_size': args.clients + 2}
+        )
+
+    configurations = [('une transaction par commande', False, 0)]
+    configurations += [(f'group commit {window:g} ms', True, window) for window in args.windows]
+
+    print(f"{args.clients} clients, {args.duration} s par mesure")
+    for index, (label, enabled, window) in enumerate(configurations):
+        BenchConfig.ORDER_GROUP_COMMIT_ENABLED = enabled
+        BenchConfig.ORDER_GROUP_COMMIT_WINDOW_MS = window
+        BenchConfig.ORDER_GROUP_COMMIT_MAX_BATCH = args.max_batch
+        app = create_app(BenchConfig)
+        with app.app_context():
+            if sqlite:
+                @event.listens_for(db.engine, 'connect')
+                def wal(connection, record):
+                    connection.execute('PRAGMA journal_mode=WAL')
+                    connection.execute('PRAGMA synchronous=FULL')
+            if index == 0:
+                db.drop_all()
+                db.create_all()
+                db.session.execute(insert(User), [{'email': 'bench@example.com', 'password_hash': 'x', 'role': 'client'}])
+                db.session.execute(insert(Category), [{'name': "Banc d'essai"}])
+                db.session.execute(insert(Product), [
+                    {'name': f'Produit {i}', 'price': 10.0, 'stock': 10_000_000, 'category_id': 1}
+                    for i in range(args.products)
+                ])
+                db.session.commit()
+            headers = {'Authorization': f"Bearer {create_access_token(identity='1')}"}
+            product_ids = list(range(1, args.products + 1))
+            db.session.remove()
+
+        latencies, elapsed = run(app, args.clients, args.duration, product_ids, headers)
+        batches = app.extensions['order_committer'].stats['batches']
+        per_batch = f", {len(latencies) / batches:.1f} commandes par lot" if enabled and batches else ''
+        print(f"{label:>30} : {len(latencies) / elapsed:7.0f} commandes/s, p50 {percentile(latencies, 0.5):6.1f} ms, "
+              f"p99 {percentile(latencies, 0.99):6.1f} ms, p99.9 {percentile(latencies, 0.999):6.1f} ms{per_batch}")
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
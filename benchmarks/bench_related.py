@@ -0,0 +1,99 @@
+"""Reconstruction complète de l'index « souvent achetés ensemble » (flask rebuild-related-products).
+
+Peuple une base SQLite temporaire (3 millions de lignes de commande par défaut, réutilisable
+avec --db) : des paniers de 1 à 8 produits tirés selon une popularité de Zipf. Mesure ensuite
+la reconstruction (lecture des lignes, comptage vectorisé, écriture des paires) et la lecture
+des N produits associés à un produit, par l'index puis par le cache du worker.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_related --lines 3000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def populate(db, lines, products, chunk=50_000):
+    import numpy as np
+    from sqlalchemy import insert
+    from app.models import Category, Order, OrderItem, Product, User
+
+    rng = np.random.default_rng(42)
+    db.session.execute(insert(User), [{'email': 'bench@example.com', 'password_hash': 'x', 'role': 'client'}])
+    db.session.execute(insert(Category), [{'name': 'Banc d\'essai'}])
+    db.session.execute(insert(Product), [
+        {'name': f'Produit {i}', 'price': 10.0, 'stock': 1000, 'category_id': 1} for i in range(products)
+    ])
+
+    sizes = rng.integers(1, 9, size=lines // 2)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), lines) + 1]
+    order_ids = np.repeat(np.arange(1, len(sizes) + 1), sizes)[:lines]
+    product_ids = np.minimum(rng.zipf(1.3, size=len(order_ids)), products)
+
+    address = {'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+               'shipping_postal_code': '75001', 'shipping_country': 'France'}
+    for start in range(1, len(sizes) + 1, chunk):
+        db.session.execute(insert(Order), [
+            {'id': order_id, 'user_id': 1, 'total_amount': 10.0, 'status': 'validated', **address}
+            for order_id in range(start, min(start + chunk, len(sizes) + 1))
+        ])
+    for start in range(0, len(order_ids), chunk):
+        db.session.execute(insert(OrderItem), [
+            {'order_id': order_id, 'product_id': product_id, 'quantity': 1, 'price_at_order': 10.0}
+            for order_id, product_id in zip(order_ids[start:start + chunk].tolist(), product_ids[start:start + chunk].tolist())
+        ])
+    db.session.commit()
+    return len(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=3_000_000)
+    parser.add_argument('--products', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--db', help='Fichier SQLite à réutiliser (créé et peuplé s\'il n\'existe pas).')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_related.db')
+    must_populate = not os.path.exists(path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app
+    from app.extensions import db
+    from app.products.related import rebuild_associations, top_related
+
+    app = create_app()
+    with app.app_context():
+        if must_populate:
+            db.create_all()
+            start = time.perf_counter()
+            orders = populate(db, args.lines, args.products)
+            print(f'{args.lines} lignes ({orders} commandes) insérées en {time.perf_counter() - start:.1f} s ({path})')
+
+        start = time.perf_counter()
+        stats = rebuild_associations()
+        print(f"Reconstruction : {stats['lines']} lignes -> {stats['pairs']} paires en {time.perf_counter() - start:.1f} s "
+              f"(lecture {stats['load_seconds']} s, comptage {stats['count_seconds']} s, écriture {stats['write_seconds']} s)")
+
+        cache = app.extensions['related_cache']
+        limit = app.config['RELATED_MAX_RESULTS']
+        for label, lookup in (
+            ('index SQL', lambda product_id: top_related(product_id, limit)),
+            ('cache', lambda product_id: cache.get(product_id)),
+        ):
+            timings = []
+            for product_id in range(1, args.repeat + 1):
+                if label == 'cache':
+                    cache.put(product_id, top_related(product_id, limit))
+                start = time.perf_counter()
+                lookup(product_id)
+                timings.append((time.perf_counter() - start) * 1e6)
+            timings.sort()
+            print(f"{label:>10} : p50 {statistics.median(timings):.1f} µs, "
+                  f"p99 {timings[min(len(timings) - 1, int(len(timings) * 0.99))]:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Démarrage d'un worker : import, création de l'application et latence des premières requêtes.
+
+Peuple une base SQLite temporaire (réutilisable avec --db), puis lance --runs processus neufs
+par mode : « froid » (premières requêtes servies sans préchauffage, comme un worker sans
+gunicorn.conf.py) et « préchauffé » (warm_worker avant les requêtes). Pour chaque chemin,
+affiche la médiane de la première requête puis celle d'une requête suivante (régime établi).
+Avec --gunicorn, mesure aussi le délai jusqu'à la première réponse 200 de /api/monitoring/ready,
+avec et sans préchargement.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_startup --products 100000 --runs 5 --gunicorn
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+PATHS = ['/api/categories/', '/api/categories/1', '/api/products/', '/api/products/?cursor=&sort=price',
+         '/api/products/42', '/api/products/?facets=category,price', '/api/products/suggest?prefix=prod']
+
+
+def populate(db, Product, Category, SalesRollup, count, categories=20, chunk=50_000):
+    from datetime import date, timedelta
+    from sqlalchemy import insert
+    db.session.execute(insert(Category), [{'name': f'Catégorie {i}'} for i in range(categories)])
+    rng = random.Random(42)
+    for start in range(0, count, chunk):
+        db.session.execute(insert(Product), [{
+            'name': f'Produit {i}',
+            'price': round(rng.lognormvariate(4.5, 1.2), 2),
+            'stock': rng.randint(0, 500),
+            'category_id': rng.randint(1, categories)
+        } for i in range(start, min(start + chunk, count))])
+        db.session.commit()
+    db.session.execute(insert(SalesRollup), [{
+        'day': date.today() - timedelta(days=rng.randint(0, 29)), 'product_id': product_id,
+        'category_id': 1, 'units': rng.randint(1, 50), 'revenue': 100.0
+    } for product_id in rng.sample(range(1, count + 1), min(count, 1000))])
+    db.session.commit()
+
+
+def child(mode):
+    """Processus mesuré : imprime ses temps en JSON sur la sortie standard."""
+    result = {}
+    start = time.perf_counter()
+    from app import create_app
+    from app.warmup import warm_worker
+    result['import_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    app = create_app()
+    result['create_app_ms'] = (time.perf_counter() - start) * 1000
+
+    if mode == 'warm':
+        start = time.perf_counter()
+        warm_worker(app)
+        result['warmup_ms'] = (time.perf_counter() - start) * 1000
+
+    client = app.test_client()
+    for key in ('first', 'next'):
+        timings = {}
+        for path in PATHS:
+            start = time.perf_counter()
+            client.get(path, headers={'Accept-Encoding': 'gzip'})
+            timings[path] = (time.perf_counter() - start) * 1000
+        result[key] = timings
+    print(json.dumps(result))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(preload, workers, timeout=60):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f'127.0.0.1:{port}')
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/monitoring/ready', timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.02)
+        raise RuntimeError('gunicorn n\'est pas prêt')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=5, help='Processus neufs par mode.')
+    parser.add_argument('--gunicorn', action='store_true', help='Mesure aussi le délai de disponibilité de gunicorn.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--db', help='Fichier SQLite à réutiliser (créé et peuplé s\'il n\'existe pas).')
+    parser.add_argument('--child', choices=['cold', 'warm'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child)
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_startup.db')
+    must_populate = not os.path.exists(path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    if must_populate:
+        from app import create_app
+        from app.extensions import db
+        from app.models import Product, Category, SalesRollup
+        with create_app().app_context():
+            db.create_all()
+            populate(db, Product, Category, SalesRollup, args.products)
+        print(f'{args.products} produits insérés ({path})')
+
+    results = {}
+    for mode in ('cold', 'warm'):
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode],
+                                    capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        results[mode] = runs
+
+    def median(mode, *keys):
+        values = []
+        for run in results[mode]:
+            value = run
+            for key in keys:
+                value = value.get(key, 0.0)
+            values.append(value)
+        return statistics.median(values)
+
+    print(f"\n{'étape (médiane, ms)':>42} {'froid':>9} {'préchauffé':>11}")
+    for label, keys in (('import', ('import_ms',)), ('create_app', ('create_app_ms',)), ('préchauffage', ('warmup_ms',))):
+        print(f"{label:>42} {median('cold', *keys):>9.1f} {median('warm', *keys):>11.1f}")
+    for path in PATHS:
+        print(f"{'1re ' + path:>42} {median('cold', 'first', path):>9.1f} {median('warm', 'first', path):>11.1f}")
+    for path in PATHS:
+        print(f"{'2e  ' + path:>42} {median('cold', 'next', path):>9.1f} {median('warm', 'next', path):>11.1f}")
+
+    if args.gunicorn:
+        print(f"\n{'gunicorn, délai de disponibilité':>42} {'ms':>9}")
+        for preload in (False, True):
+            label = f"{args.workers} workers, {'avec' if preload else 'sans'} préchargement"
+            print(f"{label:>42} {time_to_ready(preload, args.workers):>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
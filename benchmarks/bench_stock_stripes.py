@@ -0,0 +1,123 @@
+"""Contention sur un produit très demandé : stock sur une seule ligne contre stock réparti.
+
+Des acheteurs parallèles (threads, une session chacun) réservent une unité du même produit
+en boucle. Chaque réservation est une transaction qui garde son verrou pendant --work-ms
+(le reste de la commande : lignes, agrégats...). Le débit est mesuré avec le stock sur la
+seule ligne `product` (SELECT ... FOR UPDATE puis décrément, comme `create_order`), puis
+réparti sur --stripes sous-compteurs. Le stock restant est vérifié après chaque mesure :
+un décrément perdu est une survente.
+
+SQLite verrouille toute la base en écriture : les deux modes y sont sérialisés de la même
+façon, et SELECT ... FOR UPDATE y est sans effet (le décrément sur une seule ligne peut s'y
+perdre). L'effet des verrous de ligne se mesure sur PostgreSQL (--database-url).
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_stock_stripes --buyers 32 --stripes 16
+    python -m benchmarks.bench_stock_stripes --database-url postgresql://localhost/bench
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+
+def checkout(db, product_id, striped, work_seconds):
+    from app.orders.service import load_products
+    from app.products.stripes import reserve_striped
+
+    if striped:
+        reserved = reserve_striped(product_id, 1)
+    else:
+        product = load_products([product_id], lock=True)[product_id]
+        reserved = product.stock >= 1
+        if reserved:
+            product.stock -= 1
+            db.session.flush()
+    time.sleep(work_seconds)
+    db.session.commit()
+    return reserved
+
+
+def run(app, db, product_id, striped, buyers, duration, work_seconds):
+    counts = [0] * buyers
+    deadline = time.perf_counter() + duration
+
+    def buyer(index):
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                if checkout(db, product_id, striped, work_seconds):
+                    counts[index] += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=buyer, args=(index,)) for index in range(buyers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--buyers', type=int, default=32)
+    parser.add_argument('--stripes', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='Durée de chaque mesure (s).')
+    parser.add_argument('--work-ms', type=float, default=2.0, help='Durée du reste de la transaction, verrou tenu (ms).')
+    parser.add_argument('--database-url', help='Base de test (vidée) ; SQLite temporaire par défaut.')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_stripes.db')}"
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Category, Product
+    from app.products.stripes import configure_stripes, stripe_totals
+    from config import Config
+
+    class BenchConfig(Config):
+        # Un thread par acheteur : une connexion chacun ; SQLite attend le verrou au lieu d'échouer
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {'connect_args': {'timeout': 60, 'check_same_thread': False}}
+            if os.environ['DATABASE_URL'].startswith('sqlite') else {'pool_size': args.buyers + 2}
+        )
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        category = Category(name="Banc d'essai")
+        db.session.add(category)
+        db.session.commit()
+        initial = 10_000_000
+        product = Product(name='Produit très demandé', price=10.0, stock=initial, category_id=category.id)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+
+        print(f"{args.buyers} acheteurs, {args.work_ms} ms de transaction, {db.engine.url.get_backend_name()}")
+        results, stock = {}, initial
+        for label, striped in (('une ligne', False), (f'{args.stripes} sous-compteurs', True)):
+            if striped:
+                product = db.session.get(Product, product_id)
+                configure_stripes(product, args.stripes)
+                db.session.commit()
+            reserved, elapsed = run(app, db, product_id, striped, args.buyers, args.duration, args.work_ms / 1000)
+            results[label] = reserved / elapsed
+
+            # Contrôle : chaque réservation a bien décrémenté le stock
+            db.session.expire_all() # Stock modifié par les acheteurs (autres sessions)
+            remaining = (stripe_totals([product_id]).get(product_id, 0) if striped
+                         else db.session.get(Product, product_id).stock)
+            lost = remaining - (stock - reserved)
+            stock = remaining
+            print(f"{label:>18} : {reserved} réservations en {elapsed:.1f} s, {reserved / elapsed:.0f} commandes/s, "
+                  f"{lost} décréments perdus")
+
+        single, striped = results.values()
+        print(f"Débit du stock réparti : x{striped / single:.2f}")
+
+
+if __name__ == '__main__':
+    main()
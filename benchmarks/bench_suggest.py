@@ -0,0 +1,84 @@
+"""Latence de l'autocomplétion (GET /api/products/suggest) sur l'index en mémoire.
+
+Construit l'index à partir de noms de produits synthétiques (200 000 par défaut), puis
+mesure des suggestions pour des préfixes d'une à plusieurs lettres, avec un ou deux mots,
+et le coût d'une mise à jour incrémentale. Le code de sortie vaut 1 si le p99 d'une
+suggestion dépasse --budget-ms (1 ms par défaut).
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_suggest --products 200000
+"""
+import argparse
+import random
+import statistics
+import time
+
+BRANDS = ['Asus', 'Logitech', 'Samsung', 'Corsair', 'Razer', 'Dell', 'Lenovo', 'Kingston', 'Acer', 'Sony']
+KINDS = ['Souris', 'Clavier', 'Écran', 'Casque', 'Carte graphique', 'Carte mère', 'SSD', 'Câble USB', 'Laptop']
+TRAITS = ['Pro', 'Gamer', 'Ultra', 'Mini', 'Max', 'Slim', 'RGB', 'Wireless', 'Bureau', 'Silencieux']
+
+
+def product_rows(count, rng):
+    for product_id in range(1, count + 1):
+        name = f'{rng.choice(KINDS)} {rng.choice(BRANDS)} {rng.choice(TRAITS)} {rng.randint(100, 9999)}'
+        yield product_id, name, int(rng.paretovariate(1.2)) - 1
+
+
+def percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    parser.add_argument('--budget-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    from app.products.suggest import SuggestIndex
+
+    rng = random.Random(42)
+    index = SuggestIndex(max_results=10)
+    start = time.perf_counter()
+    index.load(product_rows(args.products, rng))
+    info = index.info()
+    print(f"Index construit en {time.perf_counter() - start:.2f} s : {info['products']} produits, {info['terms']} mots")
+
+    vocabulary = sorted({word.lower() for word in BRANDS + TRAITS + ' '.join(KINDS).split()})
+    scenarios = {
+        '1 lettre': lambda: rng.choice(vocabulary)[:1],
+        '3 lettres': lambda: rng.choice(vocabulary)[:3],
+        'mot entier': lambda: rng.choice(vocabulary),
+        'numéro': lambda: str(rng.randint(100, 9999))[:3],
+        'deux mots': lambda: f'{rng.choice(KINDS).split()[0][:4]} {rng.choice(BRANDS)[:3]}',
+    }
+
+    failed = False
+    print(f"{'préfixe':>12} {'p50 µs':>8} {'p99 µs':>8} {'max µs':>8}")
+    for scenario, make_prefix in scenarios.items():
+        prefixes = [make_prefix() for _ in range(args.queries)]
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.suggest(prefix)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        p99 = percentile(timings, 0.99)
+        over = p99 > args.budget_ms * 1000
+        failed |= over
+        print(f"{scenario:>12} {statistics.median(timings):>8.1f} {p99:>8.1f} {timings[-1]:>8.1f}{' !' if over else ''}")
+
+    # Mise à jour incrémentale (création ou commande d'un produit), qui vide aussi les résultats mémorisés
+    timings = []
+    for product_id, name, popularity in product_rows(1000, rng):
+        start = time.perf_counter()
+        index.update([(product_id, name, popularity + 1)])
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    print(f"mise à jour d'un produit : p50 {statistics.median(timings):.1f} µs, p99 {percentile(timings, 0.99):.1f} µs")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Coût de la validation des corps de requête par les schémas compilés.
+
+Mesure, pour des commandes de --items articles, le temps de validation seul (schéma
+compilé à l'import) et celui de l'analyse JSON du même corps, pour comparaison. Un corps
+invalide (un article mal formé en dernière position) est mesuré aussi : il est parcouru
+en entier avant d'être refusé.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.bench_validation --items 1 10 100 --repeat 20000
+"""
+import argparse
+import json
+import time
+from app.orders.schemas import order_schema
+from app.products.schemas import product_schema
+
+
+def order_payload(count, valid=True):
+    items = [{'product_id': i + 1, 'quantity': 1 + i % 3} for i in range(count)]
+    if not valid:
+        items[-1]['quantity'] = 'deux'
+    return {
+        'items': items,
+        'shipping_address': "123 Rue de l'Exemple", 'shipping_city': 'Paris',
+        'shipping_postal_code': '75001', 'shipping_country': 'France'
+    }
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, nargs='+', default=[1, 10, 100], help="Nombre d'articles par commande.")
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Les limites lues dans la configuration (ORDER_MAX_ITEMS) demandent une application
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        ORDER_MAX_ITEMS = max(args.items)
+
+    with create_app(BenchConfig).app_context():
+        print(f"{'corps':>28} {'octets':>8} {'validation':>12} {'json.loads':>12}")
+        for count in args.items:
+            for valid in (True, False):
+                data = order_payload(count, valid)
+                body = json.dumps(data)
+                assert bool(order_schema.validate(data)) is not valid
+                validate = per_call(lambda: order_schema.validate(data), args.repeat)
+                parse = per_call(lambda: json.loads(body), args.repeat)
+                label = f"commande {count} art.{'' if valid else ' (invalide)'}"
+                print(f"{label:>28} {len(body):>8} {validate:>9.2f} µs {parse:>9.2f} µs")
+
+        product = {'name': 'Souris', 'sku': 'SKU-0001', 'description': 'Souris sans fil', 'price': 19.9,
+                   'stock': 10, 'category_id': 1}
+        body = json.dumps(product)
+        validate = per_call(lambda: product_schema.validate(product), args.repeat)
+        parse = per_call(lambda: json.loads(body), args.repeat)
+        print(f"{'produit':>28} {len(body):>8} {validate:>9.2f} µs {parse:>9.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,4 +4,129 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'une-cle-secrete-tres-difficile-a-deviner'
     # SQLALCHEMY_DATABASE_URI sera défini dynamiquement dans create_app pour utiliser app.instance_path
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'une-cle-secrete-jwt-par-defaut' # Clé secrète pour JWT
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'une-cle-secrete-jwt-par-defaut' # Clé secrète pour JWT
+
+    # Import en masse des produits : nombre de lignes par lot (executemany)
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_IMPORT_CHUNK_SIZE', 1000))
+
+    # Mise à jour en masse du stock et des prix : nombre maximal de lignes et taille maximale du corps (octets)
+    PRODUCT_BULK_UPDATE_MAX_ITEMS = int(os.environ.get('PRODUCT_BULK_UPDATE_MAX_ITEMS', 10000))
+    PRODUCT_BULK_UPDATE_MAX_BYTES = int(os.environ.get('PRODUCT_BULK_UPDATE_MAX_BYTES', 4 * 1024 * 1024))
+
+    # Récupération groupée de produits (?ids=...) : nombre maximal d'identifiants
+    PRODUCT_MULTI_GET_MAX_IDS = int(os.environ.get('PRODUCT_MULTI_GET_MAX_IDS', 100))
+
+    # Flux de changements du catalogue : nombre maximal d'entrées par page
+    CHANGE_FEED_MAX_LIMIT = int(os.environ.get('CHANGE_FEED_MAX_LIMIT', 1000))
+    # Durée (s) au-delà de laquelle un trou dans les IDs du journal est tenu pour définitif ;
+    # doit dépasser la durée de la plus longue transaction qui écrit dans le catalogue
+    CHANGE_FEED_GAP_TIMEOUT = float(os.environ.get('CHANGE_FEED_GAP_TIMEOUT', 30.0))
+
+    # Flux SSE du stock : intervalle de scrutation du journal (s), tampon par abonné, keepalive (s)
+    STOCK_STREAM_POLL_INTERVAL = float(os.environ.get('STOCK_STREAM_POLL_INTERVAL', 1.0))
+    STOCK_STREAM_BUFFER_SIZE = int(os.environ.get('STOCK_STREAM_BUFFER_SIZE', 100))
+    STOCK_STREAM_KEEPALIVE = float(os.environ.get('STOCK_STREAM_KEEPALIVE', 15.0))
+    STOCK_STREAM_MAX_IDS = int(os.environ.get('STOCK_STREAM_MAX_IDS', 100))
+    # Flux ouverts au plus par worker (503 au-delà) : sous gunicorn, chaque flux occupe un thread
+    # (GUNICORN_THREADS) ; servis par asgi.py, ils n'en occupent aucun
+    STOCK_STREAM_MAX_CLIENTS = int(os.environ.get('STOCK_STREAM_MAX_CLIENTS', 4))
+    STOCK_STREAM_ASYNC_MAX_CLIENTS = int(os.environ.get('STOCK_STREAM_ASYNC_MAX_CLIENTS', 1000))
+
+    # Regroupement (single-flight) des lectures identiques simultanées du catalogue
+    SINGLEFLIGHT_ENABLED = os.environ.get('SINGLEFLIGHT_ENABLED', '1') == '1'
+
+    # Cache des réponses du détail produit (octets par worker, 0 pour désactiver)
+    PRODUCT_CACHE_MAX_BYTES = int(os.environ.get('PRODUCT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # Compression des réponses : taille minimale (octets), niveau zlib, cache des corps compressés par worker
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_CACHE_MAX_BYTES = int(os.environ.get('COMPRESS_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # Facettes de la liste de produits : bornes des tranches de prix, durée du cache sans filtre (s),
+    # budgets de latence par facette (ms) au-delà desquels un avertissement est journalisé
+    PRICE_FACET_BOUNDARIES = [0, 50, 100, 250, 500, 1000, 2000]
+    FACETS_CACHE_TTL = float(os.environ.get('FACETS_CACHE_TTL', 60))
+    FACET_LATENCY_BUDGETS_MS = {'category': 50, 'price': 50}
+
+    # Autocomplétion des noms de produits : nombre maximal de suggestions, délai maximal (s)
+    # avant la prise en compte des changements faits par les autres workers
+    SUGGEST_MAX_RESULTS = int(os.environ.get('SUGGEST_MAX_RESULTS', 10))
+    SUGGEST_SYNC_INTERVAL = float(os.environ.get('SUGGEST_SYNC_INTERVAL', 1.0))
+
+    # « Souvent achetés ensemble » : nombre de recommandations par produit, durée du cache par worker (s)
+    RELATED_MAX_RESULTS = int(os.environ.get('RELATED_MAX_RESULTS', 10))
+    RELATED_CACHE_TTL = float(os.environ.get('RELATED_CACHE_TTL', 300))
+
+    # Rapports de ventes : nombre maximal de lignes par réponse
+    ANALYTICS_MAX_ROWS = int(os.environ.get('ANALYTICS_MAX_ROWS', 500))
+
+    # Archivage des commandes expédiées ou annulées : âge minimal (jours), commandes par lot
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 180))
+    ORDER_ARCHIVE_CHUNK_SIZE = int(os.environ.get('ORDER_ARCHIVE_CHUNK_SIZE', 1000))
+
+    # Partitionnement des commandes par utilisateur : une URL de base par shard (séparées par des virgules) ;
+    # vide, les commandes restent dans la base principale. Taille maximale d'une page de commandes.
+    ORDER_SHARDS = [url for url in os.environ.get('ORDER_SHARD_URLS', '').split(',') if url]
+    ORDERS_PAGE_MAX_SIZE = int(os.environ.get('ORDERS_PAGE_MAX_SIZE', 100))
+
+    # Acceptation asynchrone des commandes (file durable traitée par `flask process-order-queue`) : activation,
+    # demandes par lot, durée de réservation (s), essais avant abandon, délai du premier nouvel essai (s),
+    # attente quand la file est vide (s)
+    ORDER_QUEUE_ENABLED = os.environ.get('ORDER_QUEUE_ENABLED', '0') == '1'
+    ORDER_QUEUE_BATCH_SIZE = int(os.environ.get('ORDER_QUEUE_BATCH_SIZE', 50))
+    ORDER_QUEUE_LEASE_SECONDS = float(os.environ.get('ORDER_QUEUE_LEASE_SECONDS', 60))
+    ORDER_QUEUE_MAX_ATTEMPTS = int(os.environ.get('ORDER_QUEUE_MAX_ATTEMPTS', 5))
+    ORDER_QUEUE_RETRY_DELAY = float(os.environ.get('ORDER_QUEUE_RETRY_DELAY', 5))
+    ORDER_QUEUE_POLL_INTERVAL = float(os.environ.get('ORDER_QUEUE_POLL_INTERVAL', 1.0))
+
+    # Stock réparti des produits très demandés : nombre maximal de sous-compteurs par produit,
+    # intervalle (s) du rééquilibrage en tâche de fond (`flask rebalance-stock-stripes --loop`)
+    STOCK_STRIPES_MAX = int(os.environ.get('STOCK_STRIPES_MAX', 64))
+    STOCK_REBALANCE_INTERVAL = float(os.environ.get('STOCK_REBALANCE_INTERVAL', 5.0))
+
+    # Group commit des créations de commandes : activation, fenêtre de regroupement (ms), commandes par lot
+    ORDER_GROUP_COMMIT_ENABLED = os.environ.get('ORDER_GROUP_COMMIT_ENABLED', '0') == '1'
+    ORDER_GROUP_COMMIT_WINDOW_MS = float(os.environ.get('ORDER_GROUP_COMMIT_WINDOW_MS', 3))
+    ORDER_GROUP_COMMIT_MAX_BATCH = int(os.environ.get('ORDER_GROUP_COMMIT_MAX_BATCH', 64))
+
+    # Instantané du stock partagé par les workers d'un hôte (fichier mappé en mémoire, 4 octets par produit) :
+    # chemin du fichier (vide pour désactiver), plus grand ID de produit couvert ; disponibilités par requête
+    STOCK_SNAPSHOT_PATH = os.environ.get('STOCK_SNAPSHOT_PATH', '')
+    STOCK_SNAPSHOT_CAPACITY = int(os.environ.get('STOCK_SNAPSHOT_CAPACITY', 4 * 1024 * 1024))
+    STOCK_AVAILABILITY_MAX_IDS = int(os.environ.get('STOCK_AVAILABILITY_MAX_IDS', 500))
+
+    # Contrôle d'admission par classe de routes (blueprint ou endpoint) : « nom=concurrence:attente_ms »,
+    # séparés par des virgules ; les routes sans classe (catalogue, supervision) ne sont pas limitées.
+    # Âge maximal (ms) d'une requête à son arrivée d'après X-Request-Start (0 : ignoré), délai Retry-After (s)
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', '1') == '1'
+    ADMISSION_LIMITS = {
+        name: tuple(int(value) for value in limit.split(':'))
+        for name, limit in (item.split('=') for item in
+                            os.environ.get('ADMISSION_LIMITS', 'orders=16:250,orders.get_orders=8:100,auth=8:250,analytics=4:100').split(',') if item)
+    }
+    ADMISSION_MAX_QUEUE_AGE_MS = float(os.environ.get('ADMISSION_MAX_QUEUE_AGE_MS', 0))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+
+    # Validation des corps de requête : taille maximale (octets) d'un corps JSON, nombre maximal
+    # d'articles d'une commande ou d'un devis
+    REQUEST_MAX_BYTES = int(os.environ.get('REQUEST_MAX_BYTES', 64 * 1024))
+    ORDER_MAX_ITEMS = int(os.environ.get('ORDER_MAX_ITEMS', 100))
+
+    # Service ASGI des lectures du catalogue (asgi.py) : URL de la base pour le moteur asynchrone (vide : celle
+    # de l'application, avec sqlite+aiosqlite ou postgresql+asyncpg), connexions du pool, threads de l'application Flask
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL', '')
+    ASYNC_POOL_SIZE = int(os.environ.get('ASYNC_POOL_SIZE', 10))
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 10))
+
+    # Préchauffage des workers avant de servir (gunicorn.conf.py, asgi.py) : activation, lectures GET exécutées
+    # (chemins séparés par des espaces), détails des produits les plus vendus mis en cache, connexions ouvertes
+    # d'avance par base
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') == '1'
+    WARMUP_PATHS = os.environ.get(
+        'WARMUP_PATHS',
+        '/api/categories/ /api/products/ /api/products/?cursor= /api/products/?facets=category,price /api/products/suggest?prefix=a'
+    ).split()
+    WARMUP_TOP_PRODUCTS = int(os.environ.get('WARMUP_TOP_PRODUCTS', 100))
+    WARMUP_CONNECTIONS = int(os.environ.get('WARMUP_CONNECTIONS', 2))
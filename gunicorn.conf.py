@@ -0,0 +1,44 @@
+"""Configuration gunicorn de DigiMarket : gunicorn -c gunicorn.conf.py
+
+Avec le préchargement (GUNICORN_PRELOAD=1, par défaut), l'application est importée et préchauffée
+une seule fois dans le maître, puis héritée par chaque worker au fork (modules, mappers, caches
+de réponses et requêtes SQL compilées). Aucune connexion à la base ne traverse le fork : le maître
+vide ses pools avant de créer les workers, et chaque worker abandonne ceux qu'il aurait hérités
+puis ouvre ses propres connexions avant d'accepter des requêtes.
+"""
+import multiprocessing
+import os
+from app.warmup import dispose_engines, warm_up, warm_worker
+
+wsgi_app = 'run:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threads par worker : flux SSE, contrôle d'admission et group commit supposent des workers multi-threads
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+# Sans préchargement, le préchauffage de chaque worker doit tenir dans ce délai
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def when_ready(server):
+    """Maître prêt, avant le premier fork : préchauffage unique de l'application préchargée."""
+    if not preload_app:
+        return
+    app = server.app.wsgi()
+    if app.config['WARMUP_ENABLED']:
+        state = warm_up(app, pools=False)
+        server.log.info('Préchauffage dans le maître : %s %s', state.status, state.steps)
+    dispose_engines(app)
+
+
+def post_fork(server, worker):
+    """Dans le worker : les connexions éventuellement héritées du maître ne sont ni utilisées ni fermées."""
+    if preload_app:
+        dispose_engines(server.app.wsgi(), close=False)
+
+
+def post_worker_init(worker):
+    """Avant la première connexion acceptée : connexions du worker, et préchauffage complet sans préchargement."""
+    state = warm_worker(worker.wsgi)
+    worker.log.info('Worker %s : préchauffage %s %s', worker.pid, state.status, state.steps)
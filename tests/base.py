@@ -11,13 +11,16 @@ class TestConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     BCRYPT_LOG_ROUNDS = 4
     JWT_SECRET_KEY = 'test-jwt-secret-key'
+    # Les tests déclenchent la scrutation du journal explicitement (poll_once)
+    STOCK_STREAM_POLL_INTERVAL = 3600
 
 class BaseTestCase(unittest.TestCase):
     """Classe de base pour les tests qui configure l'application et la base de données."""
+    config_class = TestConfig
 
     def setUp(self):
         """Configuration initiale pour chaque test."""
-        self.app = create_app(TestConfig)
+        self.app = create_app(self.config_class)
         self.app_context = self.app.app_context()
         self.app_context.push()
         db.create_all()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import time
+from .base import BaseTestCase, TestConfig
+
+class AdmissionConfig(TestConfig):
+    ADMISSION_LIMITS = {'orders': (1, 0), 'auth': (2, 0)}
+    ADMISSION_MAX_QUEUE_AGE_MS = 500
+    ADMISSION_RETRY_AFTER = 2
+
+class AdmissionTestCase(BaseTestCase):
+    """Cette classe teste le contrôle d'admission par classe de routes."""
+    config_class = AdmissionConfig
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        self.orders = self.app.extensions['admission'].classes['orders']
+
+    def test_saturated_class_is_shed(self):
+        """Teste le refus rapide (503 avec Retry-After) d'une classe saturée, le catalogue restant servi."""
+        self.assertTrue(self.orders.acquire()) # Une requête lente occupe la seule place
+        try:
+            res = self.client.get('/api/orders/', headers=self.client_headers)
+            self.assertEqual(res.status_code, 503)
+            self.assertEqual(res.headers['Retry-After'], '2')
+            self.assertEqual(self.client.get('/api/products/').status_code, 200)
+            self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+        finally:
+            self.orders.release()
+
+        self.assertEqual(self.client.get('/api/orders/', headers=self.client_headers).status_code, 200)
+        self.assertEqual(self.orders.info(), {'limit': 1, 'max_wait_ms': 0, 'admitted': 2, 'shed': 1,
+                                              'expired': 0, 'in_flight': 0, 'peak': 1})
+
+    def test_slot_released_after_error(self):
+        """Teste que la place est libérée même quand la route échoue."""
+        for _ in range(3):
+            res = self.client.get('/api/orders/999', headers=self.client_headers)
+            self.assertEqual(res.status_code, 404)
+        self.assertEqual(self.orders.stats['in_flight'], 0)
+        self.assertEqual(self.orders.stats['shed'], 0)
+
+    def test_stale_request_is_expired(self):
+        """Teste le refus d'une requête restée trop longtemps dans la file du proxy (X-Request-Start)."""
+        stale = {**self.client_headers, 'X-Request-Start': f't={int((time.time() - 2) * 1e6)}'}
+        self.assertEqual(self.client.get('/api/orders/', headers=stale).status_code, 503)
+        fresh = {**self.client_headers, 'X-Request-Start': f't={time.time():.3f}'}
+        self.assertEqual(self.client.get('/api/orders/', headers=fresh).status_code, 200)
+        self.assertEqual((self.orders.stats['expired'], self.orders.stats['admitted']), (1, 1))
+
+    def test_queue_age_units(self):
+        """Teste la détection de l'unité de X-Request-Start : secondes, millisecondes, microsecondes, nanosecondes."""
+        started = time.time() - 2
+        admission = self.app.extensions['admission']
+        for value in (f'{started:.3f}', f't={int(started * 1e3)}', f't={int(started * 1e6)}', str(int(started * 1e9))):
+            with self.app.test_request_context(headers={'X-Request-Start': value}):
+                self.assertAlmostEqual(admission.queue_age(), 2, delta=0.5, msg=value)
+        with self.app.test_request_context(headers={'X-Request-Start': 't=abc'}):
+            self.assertIsNone(admission.queue_age())
+
+    def test_counters_in_monitoring(self):
+        """Teste l'exposition des compteurs de délestage dans la supervision."""
+        self.client.post('/api/auth/login', data=json.dumps({'email': 'client@example.com', 'password': 'password123'}),
+                         content_type='application/json')
+        res = self.client.get('/api/monitoring/stats', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 200)
+        admission = res.get_json()['admission']
+        self.assertEqual(set(admission), {'orders', 'auth'})
+        self.assertEqual(admission['auth']['admitted'], 3) # Deux connexions dans setUp, une ici
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import json
+from datetime import datetime, timezone
+from app.extensions import db
+from app.models import Product, Category, Order, SalesRollup
+from app.analytics.rollups import rebuild_rollups
+from .base import BaseTestCase
+
+class AnalyticsTestCase(BaseTestCase):
+    """Cette classe teste les agrégats de ventes et les rapports d'administration."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        self.laptops = Category(name='Laptops')
+        self.peripherals = Category(name='Périphériques')
+        db.session.add_all([self.laptops, self.peripherals])
+        db.session.commit()
+        self.laptop = Product(name='Laptop Pro', price=1000.0, stock=50, category_id=self.laptops.id)
+        self.mouse = Product(name='Souris', price=20.0, stock=200, category_id=self.peripherals.id)
+        db.session.add_all([self.laptop, self.mouse])
+        db.session.commit()
+
+    def _order(self, *items):
+        res = self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in items],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.get_json()['order_id']
+
+    def _sales(self, query=''):
+        res = self.client.get(f'/api/analytics/sales{query}', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()
+
+    def _rollup_rows(self):
+        return sorted(
+            (row.day, row.product_id, row.category_id, row.units, round(row.revenue, 2))
+            for row in SalesRollup.query.all()
+        )
+
+    def test_rollups_follow_orders_and_cancellations(self):
+        """Teste la mise à jour incrémentale des agrégats à la commande et à l'annulation."""
+        self._order((self.laptop.id, 1), (self.mouse.id, 2))
+        self._order((self.mouse.id, 3), (self.mouse.id, 1))
+        cancelled = self._order((self.laptop.id, 2))
+
+        self.assertEqual(self._sales()['totals'], {'units': 9, 'revenue': 3120.0})
+        self.client.patch(
+            f'/api/orders/{cancelled}',
+            data=json.dumps({'status': 'cancelled'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        data = self._sales('?group_by=product')
+        self.assertEqual(data['totals'], {'units': 7, 'revenue': 1120.0})
+        self.assertEqual(
+            [(row['name'], row['units'], row['revenue']) for row in data['rows']],
+            [('Laptop Pro', 1, 1000.0), ('Souris', 6, 120.0)]
+        )
+
+        incremental = self._rollup_rows()
+        stats = rebuild_rollups()
+        self.assertEqual(stats['lines'], 4)
+        self.assertEqual(self._rollup_rows(), [row for row in incremental if row[3] != 0])
+
+    def test_sales_by_day_and_category(self):
+        """Teste les regroupements par jour et par catégorie, et le filtre de période."""
+        self._order((self.laptop.id, 1), (self.mouse.id, 1))
+        old = Order(user_id=self.client_user.id, total_amount=40.0, order_date=datetime(2025, 3, 1, tzinfo=timezone.utc),
+                    shipping_address='a', shipping_city='b', shipping_postal_code='c', shipping_country='d')
+        db.session.add(old)
+        db.session.flush()
+        db.session.execute(db.text(
+            'INSERT INTO order_item (order_id, product_id, quantity, price_at_order) VALUES (:o, :p, 2, 20.0)'
+        ), {'o': old.id, 'p': self.mouse.id})
+        db.session.commit()
+        rebuild_rollups()
+
+        today = datetime.now(timezone.utc).date().isoformat()
+        data = self._sales('?group_by=day&start=2025-01-01')
+        self.assertEqual([(row['day'], row['units']) for row in data['rows']], [('2025-03-01', 2), (today, 2)])
+
+        data = self._sales('?group_by=category&start=2025-03-01&end=2025-03-31')
+        self.assertEqual(data['rows'], [{'category_id': self.peripherals.id, 'name': 'Périphériques', 'units': 2, 'revenue': 40.0}])
+
+        data = self._sales('?group_by=category')
+        self.assertEqual([row['name'] for row in data['rows']], ['Laptops', 'Périphériques'])
+
+    def test_sales_invalid_parameters(self):
+        """Teste les paramètres invalides et l'accès réservé aux administrateurs."""
+        for query in ('?group_by=user', '?start=hier', '?start=2025-02-01&end=2025-01-01'):
+            res = self.client.get(f'/api/analytics/sales{query}', headers=self.admin_headers)
+            self.assertEqual(res.status_code, 400)
+        res = self.client.get('/api/analytics/sales', headers=self.client_headers)
+        self.assertEqual(res.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
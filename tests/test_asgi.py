@@ -0,0 +1,143 @@
+import unittest
+import asyncio
+import gzip
+from app.asgi import CatalogService, async_database_url
+from app.extensions import db
+from app.models import Product, Category
+from .base import BaseTestCase
+
+class AsgiTestCase(BaseTestCase):
+    """Cette classe teste le service ASGI des lectures du catalogue face aux routes Flask."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self.service = CatalogService(self.app)
+        parent = Category(name='Informatique')
+        db.session.add(parent)
+        db.session.commit()
+        child = Category(name='Stockage', parent_id=parent.id)
+        db.session.add(child)
+        db.session.commit()
+        db.session.add_all([
+            Product(name=f'Disque {i}', description='Disque ' * 40, price=10.0 + i, stock=i % 3,
+                    category_id=child.id if i % 2 else parent.id)
+            for i in range(15)
+        ])
+        db.session.commit()
+        self.parent_id, self.child_id = parent.id, child.id
+
+    def _asgi(self, path, headers=()):
+        """Exécute une requête GET sur le service ASGI ; retourne (statut, en-têtes, corps, servie en asynchrone)."""
+        path, _, query = path.partition('?')
+        scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': path,
+                 'raw_path': path.encode(), 'root_path': '', 'query_string': query.encode(),
+                 'server': ('localhost', 80), 'client': ('127.0.0.1', 1234),
+                 'headers': [(name.lower().encode(), value.encode()) for name, value in headers]}
+        messages = []
+        served = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async def run():
+            fallback = self.service.wsgi
+            async def wsgi(*args):
+                served.append('wsgi')
+                await fallback(*args)
+            self.service.wsgi = wsgi
+            try:
+                await self.service(scope, receive, send)
+            finally:
+                self.service.wsgi = fallback
+                await self.service.engine.dispose()
+        asyncio.run(run())
+
+        start = messages[0]
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+        return start['status'], headers, body, not served
+
+    def _assert_same(self, path, headers=()):
+        """Vérifie que le service ASGI sert la même réponse que l'application Flask."""
+        expected = self.client.get(path, headers=dict(headers))
+        status, response_headers, body, served = self._asgi(path, headers)
+        self.assertEqual(status, expected.status_code)
+        self.assertEqual(body, expected.get_data())
+        for name in ('Content-Type', 'Content-Encoding', 'Vary'):
+            self.assertEqual(response_headers.get(name.lower()), expected.headers.get(name), name)
+        return served
+
+    def test_async_database_url(self):
+        """Teste la substitution des pilotes asynchrones."""
+        self.assertEqual(str(async_database_url('sqlite:////tmp/x.db')), 'sqlite+aiosqlite:////tmp/x.db')
+        self.assertEqual(async_database_url('postgresql+psycopg2://u:p@h/db').drivername, 'postgresql+asyncpg')
+        with self.assertRaises(ValueError):
+            async_database_url('sqlite:///:memory:')
+
+    def test_product_reads_identical(self):
+        """Teste l'identité des réponses de la liste (pages, curseur, filtres, IDs) et du détail produit."""
+        product_id = Product.query.first().id
+        for path in ('/api/products/', '/api/products/?page=2&per_page=4&sort=-price',
+                     f'/api/products/?category_id={self.parent_id}&in_stock=1&q=disque',
+                     '/api/products/?cursor=&per_page=5&sort=name', f'/api/products/?ids={product_id},999',
+                     f'/api/products/{product_id}'):
+            for headers in ((), (('Accept-Encoding', 'gzip'),)):
+                self.assertTrue(self._assert_same(path, headers), path)
+
+        cursor = self.client.get('/api/products/?cursor=&per_page=5').get_json()['next_cursor']
+        self.assertTrue(self._assert_same(f'/api/products/?cursor={cursor}&per_page=5'))
+        _, headers, body, _ = self._asgi(f'/api/products/{product_id}', (('Accept-Encoding', 'gzip'),))
+        self.assertEqual(headers['content-encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), self.client.get(f'/api/products/{product_id}').get_data())
+
+    def test_category_reads_identical(self):
+        """Teste l'identité des réponses des catégories (liste, détail avec fil d'Ariane et sous-catégories)."""
+        for path in ('/api/categories/', f'/api/categories/{self.parent_id}', f'/api/categories/{self.child_id}'):
+            self.assertTrue(self._assert_same(path), path)
+
+    def test_errors_and_other_routes_use_flask(self):
+        """Teste le repli sur l'application Flask pour les erreurs, les facettes et les autres routes."""
+        for path in ('/api/products/999', '/api/categories/999', '/api/products/?sort=stock',
+                     '/api/products/?facets=category', '/api/products/suggest?prefix=dis', '/api/products'):
+            self.assertFalse(self._assert_same(path), path)
+
+    def test_stock_stream_served_async(self):
+        """Teste le flux SSE servi sur la boucle asyncio : état initial, événement, fin à la déconnexion."""
+        product = Product.query.order_by(Product.id).first()
+        broker = self.app.extensions['stock_broker']
+        scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': '/api/products/stream',
+                 'raw_path': b'/api/products/stream', 'root_path': '', 'query_string': f'ids={product.id}'.encode(),
+                 'server': ('localhost', 80), 'client': ('127.0.0.1', 1234), 'headers': []}
+
+        async def run():
+            disconnected = asyncio.Event()
+            messages = asyncio.Queue()
+
+            async def receive():
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            task = asyncio.create_task(self.service(scope, receive, messages.put))
+            start, first = await messages.get(), await messages.get()
+            self.assertEqual(broker.stats['subscribers'], 1)
+            product.stock = 42
+            db.session.commit()
+            self.assertEqual(broker.poll_once(), 1)
+            event = await asyncio.wait_for(messages.get(), 5)
+            disconnected.set()
+            await asyncio.wait_for(task, 5)
+            await self.service.engine.dispose()
+            return start, first, event
+        start, first, event = asyncio.run(run())
+
+        self.assertEqual((start['status'], dict(start['headers'])[b'content-type']), (200, b'text/event-stream; charset=utf-8'))
+        self.assertIn(b'"stock": 0,', first['body'])
+        self.assertIn(b'"stock": 42', event['body'])
+        self.assertEqual(broker.stats['subscribers'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
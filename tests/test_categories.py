@@ -0,0 +1,124 @@
+import unittest
+import json
+from app.extensions import db
+from app.models import Product, Category, CategoryClosure
+from .base import BaseTestCase
+
+class CategoryTreeTestCase(BaseTestCase):
+    """Cette classe teste l'arborescence des catégories et sa table de fermeture."""
+
+    def setUp(self):
+        """Configuration initiale : Composants > Cartes graphiques > Haut de gamme, et Périphériques."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        self.components = self._create('Composants')
+        self.gpus = self._create('Cartes graphiques', self.components)
+        self.high_end = self._create('Haut de gamme', self.gpus)
+        self.peripherals = self._create('Périphériques')
+        db.session.add_all([
+            Product(name='Alimentation', price=90.0, stock=5, category_id=self.components),
+            Product(name='GPU milieu de gamme', price=300.0, stock=5, category_id=self.gpus),
+            Product(name='GPU haut de gamme', price=1200.0, stock=5, category_id=self.high_end),
+            Product(name='Clavier', price=50.0, stock=5, category_id=self.peripherals),
+        ])
+        db.session.commit()
+
+    def _create(self, name, parent_id=None):
+        res = self.client.post(
+            '/api/categories/',
+            data=json.dumps({'name': name, 'parent_id': parent_id}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.get_json()['id']
+
+    def _product_names(self, category_id):
+        res = self.client.get(f'/api/products/?category_id={category_id}&sort=price')
+        return [p['name'] for p in res.get_json()['products']]
+
+    def _assert_closure_consistent(self):
+        """La table de fermeture doit correspondre exactement aux liens parent_id."""
+        expected = set()
+        for category in Category.query.all():
+            node, depth = category, 0
+            while node is not None:
+                expected.add((node.id, category.id, depth))
+                node, depth = node.parent, depth + 1
+        rows = db.session.execute(
+            db.select(CategoryClosure.ancestor_id, CategoryClosure.descendant_id, CategoryClosure.depth)
+        ).all()
+        self.assertEqual(set(map(tuple, rows)), expected)
+
+    def test_filter_by_parent_includes_descendants(self):
+        """Teste qu'une catégorie parente liste les produits de toutes ses sous-catégories."""
+        self.assertEqual(
+            self._product_names(self.components),
+            ['Alimentation', 'GPU milieu de gamme', 'GPU haut de gamme']
+        )
+        self.assertEqual(self._product_names(self.high_end), ['GPU haut de gamme'])
+        self._assert_closure_consistent()
+
+    def test_get_category_path_and_children(self):
+        """Teste le fil d'Ariane et les sous-catégories directes."""
+        data = self.client.get(f'/api/categories/{self.gpus}').get_json()
+        self.assertEqual(data['parent_id'], self.components)
+        self.assertEqual([c['name'] for c in data['path']], ['Composants', 'Cartes graphiques'])
+        self.assertEqual([c['name'] for c in data['children']], ['Haut de gamme'])
+
+    def test_move_subtree(self):
+        """Teste le déplacement d'une catégorie avec ses descendants."""
+        res = self.client.put(
+            f'/api/categories/{self.gpus}',
+            data=json.dumps({'parent_id': self.peripherals}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._product_names(self.components), ['Alimentation'])
+        self.assertEqual(
+            self._product_names(self.peripherals),
+            ['Clavier', 'GPU milieu de gamme', 'GPU haut de gamme']
+        )
+        self._assert_closure_consistent()
+
+    def test_move_under_own_descendant_rejected(self):
+        """Teste qu'un déplacement créant un cycle est refusé."""
+        for parent_id in (self.high_end, self.components):
+            res = self.client.put(
+                f'/api/categories/{self.components}',
+                data=json.dumps({'parent_id': parent_id}),
+                headers=self.admin_headers,
+                content_type='application/json'
+            )
+            self.assertEqual(res.status_code, 400)
+        self._assert_closure_consistent()
+
+    def test_create_with_unknown_parent(self):
+        """Teste la création d'une catégorie sous un parent inexistant."""
+        res = self.client.post(
+            '/api/categories/',
+            data=json.dumps({'name': 'Orpheline', 'parent_id': 999}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 400)
+
+    def test_delete_reparents_children(self):
+        """Teste que la suppression d'une catégorie rattache ses enfants à son parent."""
+        res = self.client.delete(f'/api/categories/{self.gpus}', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(db.session.get(Category, self.high_end).parent_id, self.components)
+        self.assertEqual(
+            self._product_names(self.components),
+            ['Alimentation', 'GPU milieu de gamme', 'GPU haut de gamme']
+        )
+        self._assert_closure_consistent()
+
+    def test_delete_root_with_products_rejected(self):
+        """Teste qu'une catégorie racine contenant des produits ne peut pas être supprimée."""
+        res = self.client.delete(f'/api/categories/{self.peripherals}', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 409)
+
+if __name__ == '__main__':
+    unittest.main()
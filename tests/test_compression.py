@@ -0,0 +1,59 @@
+import unittest
+import gzip
+import json
+import zlib
+from app.extensions import db
+from app.models import Product, Category
+from app.compression import compress_stream
+from .base import BaseTestCase
+
+class CompressionTestCase(BaseTestCase):
+    """Cette classe teste la compression des réponses."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self.category = Category(name='Composants')
+        db.session.add(self.category)
+        db.session.commit()
+        db.session.add_all([
+            Product(name=f'Produit {i}', price=10.0 + i, stock=i, category_id=self.category.id) for i in range(30)
+        ])
+        db.session.commit()
+
+    def test_large_response_is_gzipped(self):
+        """Teste qu'une liste volumineuse est compressée en gzip si le client l'accepte."""
+        plain = self.client.get('/api/products/?per_page=30')
+        res = self.client.get('/api/products/?per_page=30', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(res.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res.headers['Vary'])
+        self.assertLess(len(res.data), len(plain.data))
+        self.assertEqual(gzip.decompress(res.data), plain.data)
+
+    def test_deflate_and_compressed_body_reuse(self):
+        """Teste la négociation deflate et la réutilisation du corps compressé pour une réponse identique."""
+        cache = self.app.extensions['compression_cache']
+        for _ in range(2):
+            res = self.client.get('/api/products/?per_page=30', headers={'Accept-Encoding': 'deflate'})
+            self.assertEqual(res.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(res.data))['total'], 30)
+        self.assertEqual(cache.stats['hits'], 1)
+
+    def test_small_response_is_not_compressed(self):
+        """Teste qu'une réponse sous le seuil n'est pas compressée."""
+        res = self.client.get('/api/categories/', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', res.headers)
+
+    def test_no_compression_without_accept_encoding(self):
+        """Teste qu'aucune compression n'est appliquée si le client ne l'annonce pas."""
+        res = self.client.get('/api/products/?per_page=30')
+        self.assertNotIn('Content-Encoding', res.headers)
+
+    def test_compress_stream(self):
+        """Teste la compression en flux : chaque morceau est émis et le tout se décompresse."""
+        chunks = list(compress_stream(['{"a": 1}\n', '{"b": 2}\n'], 'gzip'))
+        self.assertGreaterEqual(len(chunks), 3)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), b'{"a": 1}\n{"b": 2}\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import json
+import threading
+from unittest import mock
+from app.extensions import db
+from app.models import Product, Category, Order
+from app.orders.group_commit import GroupCommitter, _Request, place_orders
+from app.orders.service import fill_order
+from .base import BaseTestCase, TestConfig
+
+class GroupCommitConfig(TestConfig):
+    ORDER_GROUP_COMMIT_ENABLED = True
+    ORDER_GROUP_COMMIT_WINDOW_MS = 1
+
+class GroupCommitTestCase(BaseTestCase):
+    """Cette classe teste le regroupement des créations de commandes dans une seule transaction."""
+    config_class = GroupCommitConfig
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        category = Category(name='Périphériques')
+        db.session.add(category)
+        db.session.commit()
+        self.mouse = Product(name='Souris', price=20.0, stock=5, category_id=category.id)
+        self.keyboard = Product(name='Clavier', price=50.0, stock=100, category_id=category.id)
+        db.session.add_all([self.mouse, self.keyboard])
+        db.session.commit()
+        self.mouse_id, self.keyboard_id = self.mouse.id, self.keyboard.id
+        self.user_id = str(self.client_user.id)
+
+    def _data(self, *items):
+        return {
+            'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in items],
+            'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+            'shipping_postal_code': '75001', 'shipping_country': 'France'
+        }
+
+    def test_batch_isolates_rejected_orders(self):
+        """Teste qu'une commande en rupture de stock n'empêche pas les autres commandes du lot."""
+        requests = [
+            _Request(self.user_id, self._data((self.mouse_id, 3))),
+            _Request(self.user_id, self._data((self.mouse_id, 3), (self.keyboard_id, 1))), # Plus que le stock restant
+            _Request(self.user_id, self._data((self.mouse_id, 2), (self.keyboard_id, 1))),
+        ]
+        self.assertEqual(place_orders(requests), 0)
+
+        self.assertEqual([request.result[0] for request in requests], [201, 400, 201])
+        self.assertEqual(db.session.get(Product, self.mouse_id).stock, 0)
+        self.assertEqual(db.session.get(Product, self.keyboard_id).stock, 99)
+        self.assertEqual(sorted(order.id for order in Order.query.all()),
+                         sorted(request.result[1]['order_id'] for request in requests if request.result[0] == 201))
+
+    def test_failed_batch_is_replayed_order_by_order(self):
+        """Teste le rejeu individuel quand le lot échoue : seule la commande fautive est en erreur."""
+        def failing_fill(order, items):
+            if items[0]['quantity'] == 2:
+                raise RuntimeError('erreur inattendue')
+            return fill_order(order, items)
+
+        requests = [_Request(self.user_id, self._data((self.keyboard_id, quantity))) for quantity in (1, 2, 3)]
+        with mock.patch('app.orders.group_commit.fill_order', side_effect=failing_fill):
+            self.assertEqual(place_orders(requests), 3)
+        self.assertEqual([request.result[0] for request in requests], [201, 500, 201])
+        self.assertEqual(db.session.get(Product, self.keyboard_id).stock, 96)
+
+    def test_concurrent_submissions_share_one_batch(self):
+        """Teste que des requêtes simultanées forment un lot unique, chacune recevant son propre résultat."""
+        committer = GroupCommitter(window=0.5, max_batch=4)
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def submit(quantity):
+            with self.app.app_context():
+                barrier.wait()
+                results[quantity] = committer.submit(self.user_id, self._data((self.mouse_id, quantity)))
+                db.session.remove()
+
+        threads = [threading.Thread(target=submit, args=(quantity,)) for quantity in (1, 2, 3, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(committer.stats, {'orders': 4, 'batches': 1, 'fallbacks': 0})
+        statuses = sorted(status for status, _ in results.values())
+        self.assertIn(statuses, ([201, 201, 400, 400], [201, 201, 201, 400]))
+        db.session.expire_all()
+        sold = sum(quantity for quantity, (status, _) in results.items() if status == 201)
+        self.assertEqual(db.session.get(Product, self.mouse_id).stock, 5 - sold)
+
+    def test_follower_timeout(self):
+        """Teste l'expiration d'un suiveur : retiré du lot encore ouvert (503), attendu si le lot est en cours."""
+        committer = GroupCommitter(window=0.3, max_batch=10)
+        results = []
+
+        def lead():
+            with self.app.app_context():
+                results.append(committer.submit(self.user_id, self._data((self.mouse_id, 1))))
+                db.session.remove()
+
+        def follow(timeout):
+            leader = threading.Thread(target=lead)
+            leader.start()
+            while committer._batch is None:
+                pass
+            status, _ = committer.submit(self.user_id, self._data((self.mouse_id, 1)), timeout=timeout)
+            leader.join()
+            return status
+
+        # Expiration pendant la fenêtre du meneur : la commande n'est pas créée
+        self.assertEqual((follow(0.01), results[-1][0]), (503, 201))
+        self.assertEqual((committer.stats['orders'], Order.query.count()), (1, 1))
+
+        # Expiration pendant le traitement du lot : le suiveur reçoit le résultat réel
+        committer.window = 0.05
+        slow = lambda requests: threading.Event().wait(0.3) or place_orders(requests)
+        with mock.patch('app.orders.group_commit.place_orders', side_effect=slow):
+            self.assertEqual(follow(0.1), 201)
+        self.assertEqual((committer.stats['orders'], Order.query.count()), (3, 3))
+
+    def test_create_order_route(self):
+        """Teste la route de création de commande en mode group commit."""
+        res = self.client.post('/api/orders/', data=json.dumps(self._data((self.mouse_id, 2))),
+                               headers=self.client_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(db.session.get(Order, res.get_json()['order_id']).total_amount, 40.0)
+
+        res = self.client.post('/api/orders/', data=json.dumps(self._data((self.mouse_id, 10))),
+                               headers=self.client_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(self.app.extensions['order_committer'].stats['orders'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import json
+import threading
+import time
+from app.singleflight import SingleFlight
+from .base import BaseTestCase
+
+class SingleFlightTestCase(unittest.TestCase):
+    """Cette classe teste le regroupement des appels concurrents identiques."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Teste que des appels simultanés de même clé n'exécutent la fonction qu'une fois."""
+        flight = SingleFlight()
+        release = threading.Event()
+        executions = []
+
+        def slow_query():
+            executions.append(1)
+            release.wait(5)
+            return b'resultat'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('cle', slow_query))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        # Attendre que tous les appels soient en vol avant de libérer le premier
+        while flight.stats['calls'] < 5:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(results, [b'resultat'] * 5)
+        self.assertEqual(flight.stats['shared'], 4)
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Teste qu'une erreur est propagée et que l'appel suivant s'exécute à nouveau."""
+        flight = SingleFlight()
+
+        def failing():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            flight.do('cle', failing)
+        self.assertEqual(flight.do('cle', lambda: 42), 42)
+        self.assertEqual(flight.stats['executions'], 2)
+
+class MonitoringTestCase(BaseTestCase):
+    """Cette classe teste les endpoints de supervision."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+
+    def test_stats_as_admin(self):
+        """Teste que les compteurs de regroupement reflètent les lectures du catalogue."""
+        self.client.get('/api/categories/')
+        res = self.client.get('/api/monitoring/stats', headers=self.admin_headers)
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['singleflight']['calls'], 1)
+        self.assertEqual(data['singleflight']['executions'], 1)
+
+    def test_stats_as_client(self):
+        """Teste qu'un client ne peut pas consulter les compteurs."""
+        res = self.client.get('/api/monitoring/stats', headers=self.client_headers)
+        self.assertEqual(res.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from app.extensions import db
+from app.models import Product, Category, Order, OrderJob, SalesRollup
+from app.orders.queue import claim_jobs, drain_queue, fail_job
+from app.orders.service import fill_order
+from .base import BaseTestCase, TestConfig
+
+class QueueConfig(TestConfig):
+    ORDER_QUEUE_ENABLED = True
+
+class OrderQueueTestCase(BaseTestCase):
+    """Cette classe teste l'acceptation asynchrone des commandes et le worker de la file."""
+    config_class = QueueConfig
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        category = Category(name='Périphériques')
+        db.session.add(category)
+        db.session.commit()
+        self.mouse = Product(name='Souris', price=20.0, stock=10, category_id=category.id)
+        db.session.add(self.mouse)
+        db.session.commit()
+
+    def _post_order(self, items):
+        return self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': items,
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+
+    def _enqueue(self, quantity):
+        res = self._post_order([{'product_id': self.mouse.id, 'quantity': quantity}])
+        self.assertEqual(res.status_code, 202)
+        return res.get_json()['order_id']
+
+    def _drain(self, **kwargs):
+        options = dict(batch_size=10, lease_seconds=60, max_attempts=3, retry_delay=0)
+        options.update(kwargs)
+        return drain_queue(**options)
+
+    def _status(self, order_id):
+        res = self.client.get(f'/api/orders/{order_id}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()
+
+    def test_order_is_accepted_then_processed(self):
+        """Teste la réponse 202, l'absence d'effet avant le worker, puis le traitement par lot."""
+        res = self._post_order([{'product_id': self.mouse.id, 'quantity': 3}])
+        self.assertEqual(res.status_code, 202)
+        data = res.get_json()
+        self.assertEqual(data['status'], 'queued')
+        self.assertEqual(res.headers['Location'], f"/api/orders/{data['order_id']}")
+        self.assertEqual(data['status_url'], res.headers['Location'])
+        self.assertEqual(self._status(data['order_id'])['status'], 'queued')
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 10)
+
+        rejected = self._enqueue(20)
+        self.assertEqual(self._drain(), {'pending': 1, 'rejected': 1})
+
+        order = self._status(data['order_id'])
+        self.assertEqual((order['status'], order['total_amount'], len(order['items'])), ('pending', 60.0, 1))
+        self.assertEqual(self._status(rejected)['status'], 'rejected')
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 7)
+        self.assertEqual(sum(row.units for row in SalesRollup.query.all()), 3)
+        self.assertEqual({job.status for job in OrderJob.query.all()}, {'done'})
+        self.assertEqual(self._drain(), {})
+
+    def test_redelivery_is_idempotent(self):
+        """Teste la livraison au moins une fois : une réservation expirée est reprise, sans double traitement."""
+        order_id = self._enqueue(2)
+        # Un premier worker réserve la demande puis s'arrête sans la traiter
+        claim_jobs(10, lease_seconds=-1, max_attempts=3, worker_id='worker-a')
+        self.assertEqual(self._drain(), {'pending': 1})
+        self.assertEqual(db.session.get(OrderJob, 1).attempts, 2)
+
+        # Livraison répétée d'une demande déjà traitée : la commande n'est plus 'queued'
+        job = db.session.get(OrderJob, 1)
+        job.status = 'queued'
+        db.session.commit()
+        self.assertEqual(self._drain(), {'skipped': 1})
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 8)
+        self.assertEqual(len(self._status(order_id)['items']), 1)
+
+    def test_expired_lease_is_not_processed_twice(self):
+        """Teste la reprise d'une demande dont la réservation expire en cours de traitement : une seule réservation du stock."""
+        order_id = self._enqueue(2)
+        redelivered = []
+
+        def slow_fill(order, items):
+            # Réservation expirée pendant le traitement : un second worker reprend la demande
+            db.session.execute(db.update(OrderJob).values(locked_until=datetime(2000, 1, 1)))
+            redelivered.append(self._drain())
+            return fill_order(order, items)
+
+        with mock.patch('app.orders.queue.fill_order', side_effect=slow_fill):
+            self.assertEqual(self._drain(), {'pending': 1})
+        self.assertEqual(redelivered, [{'skipped': 1}])
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 8)
+        self.assertEqual(len(self._status(order_id)['items']), 1)
+        self.assertEqual(db.session.get(OrderJob, 1).status, 'done')
+
+    def test_expired_worker_does_not_overwrite_new_owner(self):
+        """Teste qu'un worker dont la réservation a été reprise ne modifie plus la demande."""
+        self._enqueue(1)
+        claim_jobs(10, lease_seconds=-1, max_attempts=3, worker_id='worker-a')
+        claim_jobs(10, lease_seconds=60, max_attempts=3, worker_id='worker-b')
+        self.assertEqual(fail_job(1, 1, 'worker-a', 'erreur', max_attempts=3, retry_delay=0), 'lost')
+        job = db.session.get(OrderJob, 1)
+        self.assertEqual((job.status, job.locked_by, job.last_error), ('processing', 'worker-b', None))
+
+    def test_retries_then_dead_letter(self):
+        """Teste les nouveaux essais après une erreur, puis l'abandon de la demande et l'échec de la commande."""
+        order_id = self._enqueue(1)
+        with mock.patch('app.orders.queue.fill_order', side_effect=RuntimeError('base indisponible')):
+            self.assertEqual(self._drain(max_attempts=2), {'queued': 1})
+            job = db.session.get(OrderJob, 1)
+            self.assertEqual((job.status, job.attempts, job.last_error), ('queued', 1, 'RuntimeError: base indisponible'))
+            self.assertEqual(self._drain(max_attempts=2), {'dead': 1})
+
+        self.assertEqual(db.session.get(OrderJob, 1).status, 'dead')
+        self.assertEqual(self._status(order_id)['status'], 'failed')
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 10)
+        self.assertEqual(self._drain(max_attempts=2), {})
+
+    def test_retry_is_delayed(self):
+        """Teste le délai avant un nouvel essai et l'abandon d'une réservation expirée au dernier essai."""
+        self._enqueue(1)
+        with mock.patch('app.orders.queue.fill_order', side_effect=RuntimeError('erreur')):
+            self._drain(retry_delay=60)
+        job = db.session.get(OrderJob, 1)
+        self.assertGreater(job.available_at, datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=30))
+        self.assertEqual(self._drain(retry_delay=60), {})
+
+        job.available_at = datetime.now(timezone.utc)
+        db.session.commit()
+        claim_jobs(10, lease_seconds=-1, max_attempts=2, worker_id='worker-a')
+        self.assertEqual(self._drain(max_attempts=2), {'dead': 1})
+
+    def test_cancelled_before_processing(self):
+        """Teste l'annulation d'une commande encore en file : le worker ne réserve pas de stock."""
+        order_id = self._enqueue(4)
+        res = self.client.patch(
+            f'/api/orders/{order_id}',
+            data=json.dumps({'status': 'cancelled'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._drain(), {'skipped': 1})
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 10)
+
+    def test_invalid_items_are_rejected_synchronously(self):
+        """Teste la validation de la forme des articles avant la mise en file."""
+        for items in ([], [{'quantity': 1}], [{'product_id': self.mouse.id, 'quantity': 0}], 'souris'):
+            self.assertEqual(self._post_order(items).status_code, 400)
+        self.assertEqual(OrderJob.query.count(), 0)
+        self.assertEqual(Order.query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import json
+from datetime import datetime
+from app.extensions import db
+from app.models import Product, Category, Order, SalesRollup, User, UserOrderStats
+from app.orders.queue import drain_queue
+from app.orders.stats import rebuild_order_stats
+from .base import BaseTestCase
+
+class OrderStatsTestCase(BaseTestCase):
+    """Cette classe teste les statistiques de commandes par utilisateur et leur réconciliation."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        category = Category(name='Stockage')
+        db.session.add(category)
+        db.session.commit()
+        self.disk = Product(name='Disque SSD', price=90.0, stock=10, category_id=category.id)
+        db.session.add(self.disk)
+        db.session.commit()
+        self.disk_id = self.disk.id
+
+    def _order(self, quantity, headers=None):
+        return self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': self.disk_id, 'quantity': quantity}],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=headers or self.client_headers,
+            content_type='application/json'
+        )
+
+    def _summary(self, query=''):
+        res = self.client.get(f'/api/orders/summary{query}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()
+
+    def _cancel(self, order_id):
+        res = self.client.patch(f'/api/orders/{order_id}', data=json.dumps({'status': 'cancelled'}),
+                                headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+
+    def test_stats_follow_orders_and_cancellations(self):
+        """Teste la mise à jour des statistiques par les commandes, les refus et les annulations."""
+        self.assertEqual(self._summary(), {'user_id': self.client_user.id, 'order_count': 0,
+                                           'total_spent': 0.0, 'last_order_date': None})
+        first_id = self._order(1).get_json()['order_id']
+        second_id = self._order(2).get_json()['order_id']
+        self.assertEqual(self._order(50).status_code, 400) # Stock insuffisant : rien n'est compté
+        second = db.session.get(Order, second_id)
+
+        summary = self._summary()
+        self.assertEqual((summary['order_count'], summary['total_spent']), (2, 270.0))
+        self.assertEqual(summary['last_order_date'], second.order_date.isoformat())
+
+        # Annuler la dernière commande ramène la date à la commande précédente
+        self._cancel(second_id)
+        summary = self._summary()
+        self.assertEqual((summary['order_count'], summary['total_spent']), (1, 90.0))
+        self.assertEqual(summary['last_order_date'], db.session.get(Order, first_id).order_date.isoformat())
+        self._cancel(first_id)
+        self.assertEqual(self._summary()['last_order_date'], None)
+
+    def test_cancelling_uncounted_order(self):
+        """Teste l'annulation d'une commande en file : ni statistiques, ni ventes, ni stock modifiés."""
+        self._order(1)
+        self.app.config['ORDER_QUEUE_ENABLED'] = True
+        res = self._order(2)
+        self.assertEqual(res.status_code, 202)
+        self._cancel(res.get_json()['order_id'])
+
+        summary = self._summary()
+        self.assertEqual((summary['order_count'], summary['total_spent']), (1, 90.0))
+        self.assertEqual(db.session.get(Product, self.disk_id).stock, 9)
+        self.assertEqual(sum(rollup.units for rollup in SalesRollup.query), 1)
+
+    def test_uncounted_order_cannot_be_reactivated(self):
+        """Teste qu'une commande refusée ne peut plus changer de statut : ni remise en attente, ni annulation à rebours."""
+        self._order(1)
+        self.app.config['ORDER_QUEUE_ENABLED'] = True
+        order_id = self._order(20).get_json()['order_id']
+        drain_queue(batch_size=10, lease_seconds=60, max_attempts=3, retry_delay=0)
+        self.assertEqual(db.session.get(Order, order_id).status, 'rejected')
+
+        for status in ('pending', 'validated', 'shipped', 'cancelled'):
+            res = self.client.patch(f'/api/orders/{order_id}', data=json.dumps({'status': status}),
+                                    headers=self.admin_headers, content_type='application/json')
+            self.assertEqual(res.status_code, 409)
+
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Order, order_id).status, 'rejected')
+        summary = self._summary()
+        self.assertEqual((summary['order_count'], summary['total_spent']), (1, 90.0))
+        self.assertEqual(db.session.get(Product, self.disk_id).stock, 9)
+        self.assertEqual(sum(rollup.units for rollup in SalesRollup.query), 1)
+
+    def test_register_creates_stats_row(self):
+        """Teste la création de la ligne de statistiques à l'inscription."""
+        res = self.client.post('/api/auth/register', data=json.dumps({'email': 'new@example.com', 'password': 'secret'}),
+                               content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        user = User.query.filter_by(email='new@example.com').one()
+        self.assertEqual((user.order_stats.order_count, user.order_stats.total_spent), (0, 0.0))
+
+    def test_summary_of_another_user(self):
+        """Teste l'accès aux statistiques d'un autre utilisateur, réservé aux administrateurs."""
+        self._order(3)
+        res = self.client.get(f'/api/orders/summary?user_id={self.client_user.id}', headers=self.admin_headers)
+        self.assertEqual((res.status_code, res.get_json()['order_count']), (200, 1))
+        res = self.client.get(f'/api/orders/summary?user_id={self.admin_user.id}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 403)
+        res = self.client.get('/api/orders/summary?user_id=999', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 404)
+
+    def test_reconcile_matches_incremental_stats(self):
+        """Teste que la réconciliation groupée retrouve les statistiques tenues à jour par les commandes."""
+        order_id = self._order(1).get_json()['order_id']
+        self._order(2)
+        self._order(1, headers=self.admin_headers)
+        self._cancel(order_id)
+        expected = {stats.user_id: (stats.order_count, stats.total_spent, stats.last_order_date)
+                    for stats in UserOrderStats.query.all()}
+
+        # Statistiques faussées puis recalculées
+        db.session.execute(db.update(UserOrderStats).values(order_count=42, last_order_date=datetime(2000, 1, 1)))
+        db.session.commit()
+        result = rebuild_order_stats(chunk_size=1)
+        self.assertEqual((result['users'], result['with_orders']), (2, 2))
+        db.session.expire_all()
+        self.assertEqual({stats.user_id: (stats.order_count, stats.total_spent, stats.last_order_date)
+                          for stats in UserOrderStats.query.all()}, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 import json
 from app.extensions import db
-from app.models import User, Product, Order, OrderItem, Category
+from datetime import datetime, timedelta, timezone
+from app.models import User, Product, Order, OrderItem, Category, ArchivedOrder, SalesRollup
+from app.orders.archive import archive_orders
+from app.analytics.rollups import rebuild_rollups
 from .base import BaseTestCase
 
 class OrdersTestCase(BaseTestCase):
@@ -293,5 +296,113 @@ class OrdersTestCase(BaseTestCase):
         updated_order = db.session.get(Order, order.id)
         self.assertEqual(updated_order.status, 'pending')
 
+    def test_quote_order(self):
+        """Teste le devis d'un panier : prix, disponibilité par ligne et aucun effet sur le stock."""
+        quote_data = {'items': [
+            {'product_id': self.product1.id, 'quantity': 2},
+            {'product_id': self.product2.id, 'quantity': 500},
+            {'product_id': 999, 'quantity': 1}
+        ]}
+        res = self.client.post(
+            '/api/orders/quote',
+            data=json.dumps(quote_data),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(data['orderable'])
+        self.assertEqual([line['available'] for line in data['lines']], [True, False, False])
+        self.assertEqual(data['lines'][0]['line_total'], 2400.00)
+        self.assertEqual(data['total_amount'], 2400.00)
+        self.assertEqual(db.session.get(Product, self.product1.id).stock, 50)
+        self.assertEqual(Order.query.count(), 0)
+
+    def test_quote_order_counts_repeated_products(self):
+        """Teste qu'un produit répété dans le panier est vérifié sur la quantité cumulée, comme create_order."""
+        quote_data = {'items': [
+            {'product_id': self.product1.id, 'quantity': 30},
+            {'product_id': self.product1.id, 'quantity': 30}
+        ]}
+        res = self.client.post(
+            '/api/orders/quote',
+            data=json.dumps(quote_data),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        data = json.loads(res.data)
+        self.assertEqual([line['available'] for line in data['lines']], [True, False])
+
+    def test_quote_order_empty_cart(self):
+        """Teste qu'un panier vide est refusé, comme à la création de commande, au lieu d'être commandable à 0."""
+        res = self.client.post(
+            '/api/orders/quote',
+            data=json.dumps({'items': []}),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['errors'][0]['code'], 'min_items')
+
+    def _add_order(self, status, days_ago, quantity=1):
+        """Méthode d'aide pour créer directement une commande datée."""
+        order = Order(user_id=self.client_user_id, total_amount=75.50 * quantity, status=status,
+                      order_date=datetime.now(timezone.utc) - timedelta(days=days_ago),
+                      shipping_address='1 rue du Test', shipping_city='Testville',
+                      shipping_postal_code='75001', shipping_country='France')
+        order.items.append(OrderItem(product_id=self.product2.id, quantity=quantity, price_at_order=75.50))
+        db.session.add(order)
+        db.session.commit()
+        return order.id
+
+    def test_archive_orders(self):
+        """Teste l'archivage par lots et la lecture transparente des commandes archivées."""
+        old_shipped = [self._add_order('shipped', 400) for _ in range(3)]
+        old_pending = self._add_order('pending', 400)
+        recent_cancelled = self._add_order('cancelled', 10)
+        newest = self._add_order('shipped', 400)
+
+        result = archive_orders(older_than_days=180, chunk_size=2)
+        self.assertEqual(result, {'orders': 3, 'items': 3})
+        self.assertEqual(sorted(o.id for o in Order.query.all()), [old_pending, recent_cancelled, newest])
+        self.assertEqual(sorted(o.id for o in ArchivedOrder.query.all()), old_shipped)
+        self.assertEqual(OrderItem.query.count(), 3)
+
+        # Lecture par ID : client propriétaire et admin, archives comprises
+        res = self.client.get(f'/api/orders/{old_shipped[0]}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.data)['status'], 'shipped')
+        res = self.client.get(f'/api/orders/{old_shipped[1]}/lignes', headers=self.admin_headers)
+        self.assertEqual(json.loads(res.data), [{'product_id': self.product2.id, 'quantity': 1, 'price_at_order': 75.5}])
+
+        # Les listes ne contiennent les archives que sur demande
+        res = self.client.get('/api/orders/', headers=self.client_headers)
+        self.assertEqual(len(json.loads(res.data)), 3)
+        res = self.client.get('/api/orders/?include_archived=true', headers=self.client_headers)
+        self.assertEqual(len(json.loads(res.data)), 6)
+
+        # Un autre client ne voit pas les archives d'autrui ; une commande archivée n'est plus modifiable
+        other = User(email='other@example.com', password='password123')
+        db.session.add(other)
+        db.session.commit()
+        res = self.client.post('/api/auth/login', data=json.dumps({'email': 'other@example.com', 'password': 'password123'}),
+                               content_type='application/json')
+        other_headers = {'Authorization': f"Bearer {json.loads(res.data)['token']}"}
+        self.assertEqual(self.client.get(f'/api/orders/{old_shipped[0]}', headers=other_headers).status_code, 404)
+        res = self.client.patch(f'/api/orders/{old_shipped[0]}', data=json.dumps({'status': 'pending'}),
+                                headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 404)
+
+    def test_rebuilds_include_archived_orders(self):
+        """Teste que les reconstructions d'agrégats couvrent aussi les commandes archivées."""
+        self._add_order('shipped', 400, quantity=2)
+        self._add_order('shipped', 1, quantity=3)
+        archive_orders(older_than_days=180)
+        self.assertEqual(ArchivedOrder.query.count(), 1)
+
+        self.assertEqual(rebuild_rollups()['lines'], 2)
+        self.assertEqual(db.session.execute(db.select(db.func.sum(SalesRollup.units))).scalar(), 5)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
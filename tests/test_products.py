@@ -1,7 +1,14 @@
 import unittest
+import gzip
 import json
 from app.extensions import db
-from app.models import User, Product, Category
+from app.models import User, Product, Category, ProductAssociation, CatalogChange
+from datetime import datetime
+from app.cache import ResponseCache
+from app.changefeed import current_cursor
+from app.products.suggest import SuggestIndex, _popularity_statement
+from app.products.related import count_pairs, rebuild_associations
+from app.products.listing import listing_statement, keyset_condition, encode_cursor
 from .base import BaseTestCase
 
 class ProductsTestCase(BaseTestCase):
@@ -46,6 +53,35 @@ class ProductsTestCase(BaseTestCase):
         self.assertEqual(data['name'], 'Laptop Pro')
         self.assertEqual(data['category_name'], 'Laptops')
 
+    def test_get_products_by_ids(self):
+        """Teste la récupération groupée de produits par IDs, dans l'ordre demandé."""
+        res = self.client.get(f'/api/products/?ids={self.product2.id},999,{self.product1.id}')
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([product['id'] for product in data['products']], [self.product2.id, self.product1.id])
+        self.assertEqual(data['missing'], [999])
+
+    def test_get_single_product_cached_and_gzipped(self):
+        """Teste le cache des réponses encodées du détail produit, variante gzip et invalidation."""
+        cache = self.app.extensions['product_cache']
+        first = self.client.get(f'/api/products/{self.product1.id}')
+        second = self.client.get(f'/api/products/{self.product1.id}')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(cache.stats['hits'], 1)
+
+        res = self.client.get(f'/api/products/{self.product1.id}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(res.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.data), first.data)
+
+        self.client.put(
+            f'/api/products/{self.product1.id}',
+            data=json.dumps({'name': 'Laptop Pro X'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(cache.info()['entries'], 0)
+        self.assertEqual(self.client.get(f'/api/products/{self.product1.id}').get_json()['name'], 'Laptop Pro X')
+
     def test_get_non_existent_product(self):
         """Teste la récupération d'un produit qui n'existe pas."""
         res = self.client.get('/api/products/999')
@@ -78,6 +114,159 @@ class ProductsTestCase(BaseTestCase):
         self.assertEqual(len(data['products']), 1)
         self.assertEqual(data['products'][0]['name'], 'Souris Gamer')
 
+    def test_product_facets(self):
+        """Teste les facettes par catégorie et par tranche de prix, avec et sans filtre."""
+        res = self.client.get('/api/products/?facets=category,price')
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(sorted(f['count'] for f in data['facets']['category']), [1, 1])
+        price = {bucket['min']: bucket['count'] for bucket in data['facets']['price']}
+        self.assertEqual(price[50], 1) # Souris Gamer : 75.50
+        self.assertEqual(price[1000], 1) # Laptop Pro : 1200.00
+
+        data = self.client.get('/api/products/?q=Laptop&facets=category').get_json()
+        self.assertEqual(data['facets']['category'], [{'id': self.category1.id, 'name': 'Laptops', 'count': 1}])
+
+    def test_product_facets_invalid(self):
+        """Teste qu'une facette inconnue est refusée."""
+        res = self.client.get('/api/products/?facets=color')
+        self.assertEqual(res.status_code, 400)
+
+    def test_filter_by_price_range_and_stock(self):
+        """Teste les filtres de fourchette de prix et de disponibilité."""
+        self.client.patch(
+            '/api/products/bulk',
+            data=json.dumps({'updates': [{'id': self.product2.id, 'stock': 0}]}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        data = self.client.get('/api/products/?min_price=100&max_price=2000').get_json()
+        self.assertEqual([p['name'] for p in data['products']], ['Laptop Pro'])
+        data = self.client.get('/api/products/?in_stock=true').get_json()
+        self.assertEqual([p['name'] for p in data['products']], ['Laptop Pro'])
+        self.assertEqual(self.client.get('/api/products/?min_price=abc').status_code, 400)
+
+    def test_sort_products(self):
+        """Teste les tris de la liste de produits."""
+        data = self.client.get('/api/products/?sort=price').get_json()
+        self.assertEqual([p['name'] for p in data['products']], ['Souris Gamer', 'Laptop Pro'])
+        data = self.client.get('/api/products/?sort=-price').get_json()
+        self.assertEqual([p['name'] for p in data['products']], ['Laptop Pro', 'Souris Gamer'])
+        self.assertEqual(self.client.get('/api/products/?sort=stock').status_code, 400)
+
+    def test_keyset_pagination(self):
+        """Teste la pagination par curseur combinée à un tri et un filtre."""
+        db.session.add_all([
+            Product(name=f'Accessoire {i}', price=10.0 + i % 3, stock=5, category_id=self.category2.id) for i in range(7)
+        ])
+        db.session.commit()
+
+        seen, cursor = [], ''
+        while cursor is not None:
+            res = self.client.get(f'/api/products/?category_id={self.category2.id}&sort=price&per_page=3&cursor={cursor}')
+            data = json.loads(res.data)
+            self.assertEqual(res.status_code, 200)
+            self.assertNotIn('total', data)
+            seen.extend((p['price'], p['id']) for p in data['products'])
+            cursor = data['next_cursor']
+
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(self.client.get('/api/products/?cursor=pas-un-curseur').status_code, 400)
+
+    def test_suggest_products(self):
+        """Teste l'autocomplétion : préfixes, accents, plusieurs mots, mise à jour après écriture."""
+        res = self.client.get('/api/products/suggest?prefix=sou')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([s['name'] for s in res.get_json()['suggestions']], ['Souris Gamer'])
+        self.assertEqual(self.client.get('/api/products/suggest?prefix=lap pr').get_json()['suggestions'][0]['id'], self.product1.id)
+        self.assertEqual(self.client.get('/api/products/suggest?prefix=lap ga').get_json()['suggestions'], [])
+        self.assertEqual(self.client.get('/api/products/suggest?prefix=').get_json()['suggestions'], [])
+
+        self.client.post(
+            '/api/products/',
+            data=json.dumps({'name': 'Écran Gamer', 'price': 300.0, 'stock': 5, 'category_id': self.category2.id}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.client.delete(f'/api/products/{self.product2.id}', headers=self.admin_headers)
+        data = self.client.get('/api/products/suggest?prefix=ga').get_json()
+        self.assertEqual([s['name'] for s in data['suggestions']], ['Écran Gamer'])
+        self.assertEqual(len(self.client.get('/api/products/suggest?prefix=ecr').get_json()['suggestions']), 1)
+
+    def test_suggest_ranked_by_orders(self):
+        """Teste le classement des suggestions par quantité commandée."""
+        self.client.post(
+            '/api/products/',
+            data=json.dumps({'name': 'Souris Bureau', 'price': 20.0, 'stock': 50, 'category_id': self.category2.id}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        names = [s['name'] for s in self.client.get('/api/products/suggest?prefix=souris').get_json()['suggestions']]
+        self.assertEqual(names, ['Souris Bureau', 'Souris Gamer'])
+
+        self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': self.product2.id, 'quantity': 3}],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        suggestions = self.client.get('/api/products/suggest?prefix=souris').get_json()['suggestions']
+        self.assertEqual([s['name'] for s in suggestions], ['Souris Gamer', 'Souris Bureau'])
+        self.assertEqual(suggestions[0]['popularity'], 3)
+
+    def _order(self, *product_ids):
+        res = self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': product_id, 'quantity': 1} for product_id in product_ids],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.get_json()['order_id']
+
+    def _related(self, product_id):
+        return self.client.get(f'/api/products/{product_id}/related').get_json()['related']
+
+    def test_related_products(self):
+        """Teste « souvent achetés ensemble » : mise à jour à la commande et à l'annulation, reconstruction."""
+        keyboard = Product(name='Clavier', price=40.0, stock=10, category_id=self.category2.id)
+        db.session.add(keyboard)
+        db.session.commit()
+
+        self.assertEqual(self._related(self.product1.id), [])
+        self._order(self.product1.id, self.product2.id)
+        order_id = self._order(self.product1.id, self.product2.id, keyboard.id)
+        self._order(self.product1.id, keyboard.id, keyboard.id)
+
+        related = self._related(self.product1.id)
+        self.assertEqual([(r['id'], r['orders']) for r in related], [(self.product2.id, 2), (keyboard.id, 2)])
+        self.assertEqual([r['id'] for r in self._related(self.product2.id)], [self.product1.id, keyboard.id])
+
+        self.client.patch(
+            f'/api/orders/{order_id}',
+            data=json.dumps({'status': 'cancelled'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual([(r['id'], r['orders']) for r in self._related(self.product2.id)], [(self.product1.id, 1)])
+
+        incremental = db.session.execute(db.select(ProductAssociation.__table__).where(ProductAssociation.orders > 0)).all()
+        stats = rebuild_associations()
+        self.assertEqual(stats['lines'], 5)
+        rebuilt = db.session.execute(db.select(ProductAssociation.__table__)).all()
+        self.assertEqual(sorted(rebuilt), sorted(incremental))
+
+        self.assertEqual(self.client.get('/api/products/999/related').status_code, 404)
+
     def test_create_product_as_admin(self):
         """Teste la création d'un produit par un admin."""
         product_data = {'name': 'Nouveau Clavier', 'price': 99.99, 'stock': 100, 'category_id': self.category2.id}
@@ -150,5 +339,297 @@ class ProductsTestCase(BaseTestCase):
         self.assertIsNone(db.session.get(Product, self.product1.id))
         self.assertEqual(Product.query.count(), 1)
 
+    def test_import_products_ndjson_upsert(self):
+        """Teste l'import NDJSON : création, mise à jour par SKU et erreurs par ligne."""
+        self.product1.sku = 'LAP-PRO'
+        db.session.commit()
+        lines = [
+            {'sku': 'LAP-PRO', 'name': 'Laptop Pro 2', 'price': 1100.0, 'stock': 10, 'category_id': self.category1.id},
+            {'sku': 'KB-01', 'name': 'Clavier', 'price': 49.9, 'stock': 30, 'category_id': self.category2.id},
+            {'sku': 'BAD-CAT', 'name': 'Orphelin', 'price': 1.0, 'stock': 1, 'category_id': 999},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\nceci nest pas du json\n'
+        res = self.client.post(
+            '/api/products/import',
+            data=body,
+            headers=self.admin_headers,
+            content_type='application/x-ndjson'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['processed'], 4)
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual([error['line'] for error in data['errors']], [3, 4])
+        self.assertIn('rows_per_second', data)
+        self.assertEqual(db.session.get(Product, self.product1.id).name, 'Laptop Pro 2')
+        self.assertEqual(Product.query.filter_by(sku='KB-01').one().stock, 30)
+
+    def test_import_products_csv(self):
+        """Teste l'import CSV en plusieurs lots."""
+        body = 'sku,name,price,stock,category_id\n'
+        body += ''.join(f'SKU-{i},Produit {i},{i}.5,{i},{self.category1.id}\n' for i in range(5))
+        body += 'SKU-X,Produit X,pas-un-prix,1,1\n'
+        res = self.client.post(
+            '/api/products/import?chunk_size=2',
+            data=body,
+            headers=self.admin_headers,
+            content_type='text/csv'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['created'], 5)
+        self.assertEqual(data['error_count'], 1)
+        self.assertEqual(Product.query.count(), 7)
+
+    def test_import_products_row_errors_within_chunk(self):
+        """Teste un lot avec un SKU répété et une ligne refusée par la base : les autres lignes sont importées."""
+        db.session.execute(db.text(
+            "CREATE TRIGGER refuse_product BEFORE INSERT ON product WHEN NEW.name = 'Refusé' "
+            "BEGIN SELECT RAISE(ABORT, 'produit refusé'); END"
+        ))
+        db.session.commit()
+        body = 'sku,name,price,stock,category_id\n'
+        body += f'DUP,Premier,1,1,{self.category1.id}\n'
+        body += f'DUP,Second,2,2,{self.category1.id}\n'
+        body += f'REF,Refusé,3,3,{self.category1.id}\n'
+        body += f'OK,Accepté,4,4,{self.category1.id}\n'
+        res = self.client.post('/api/products/import', data=body, headers=self.admin_headers, content_type='text/csv')
+        data = res.get_json()
+        self.assertEqual((data['created'], data['error_count']), (2, 2))
+        self.assertEqual([error['line'] for error in data['errors']], [3, 4])
+        self.assertIn('ligne 2', data['errors'][0]['message'])
+        self.assertEqual(Product.query.filter_by(sku='DUP').one().name, 'Premier')
+        self.assertIsNotNone(Product.query.filter_by(sku='OK').first())
+
+    def test_import_products_unreadable_stream(self):
+        """Teste un flux illisible en cours d'import : lecture arrêtée, lots précédents conservés, rapport rendu."""
+        header = 'sku,name,price,stock,category_id\n'
+        rows = ''.join(f'SKU-{i},Produit {i},1,1,{self.category1.id}\n' for i in range(3))
+        for body, message in (((header + rows).encode() + b'SKU-X,Produit \xff,1,1,1\n', 'Encodage invalide'),
+                              ((header + rows + 'SKU-Y,' + 'x' * 200_000 + ',1,1,1\n').encode(), 'CSV invalide')):
+            Product.query.filter(Product.sku.like('SKU-%')).delete(synchronize_session=False)
+            db.session.commit()
+            res = self.client.post('/api/products/import?chunk_size=2', data=body, headers=self.admin_headers,
+                                   content_type='text/csv')
+            data = res.get_json()
+            self.assertEqual((res.status_code, data['created'], data['error_count']), (200, 3, 1), message)
+            self.assertIn(message, data['errors'][0]['message'])
+            self.assertEqual(data['errors'][0]['line'], 5)
+
+        res = self.client.post('/api/products/import', data=b'{"name": "\xff"}\n', headers=self.admin_headers,
+                               content_type='application/x-ndjson')
+        self.assertEqual((res.status_code, res.get_json()['errors'][0]['line']), (200, 1))
+
+    def test_import_products_as_client(self):
+        """Teste qu'un client ne peut pas importer de produits."""
+        res = self.client.post('/api/products/import', data='', headers=self.client_headers)
+        self.assertEqual(res.status_code, 403)
+
+    def test_bulk_update_absolute(self):
+        """Teste la mise à jour en masse en valeurs absolues avec erreurs par ligne."""
+        updates = [
+            {'id': self.product1.id, 'stock': 5, 'price': 999.0},
+            {'id': self.product2.id, 'stock': -1},
+            {'id': 999, 'stock': 1},
+        ]
+        res = self.client.patch(
+            '/api/products/bulk',
+            data=json.dumps({'updates': updates}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2])
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Product, self.product1.id).stock, 5)
+        self.assertEqual(db.session.get(Product, self.product1.id).price, 999.0)
+        self.assertEqual(db.session.get(Product, self.product2.id).stock, 200)
+
+    def test_bulk_update_delta_with_version_conflict(self):
+        """Teste les deltas et la détection de conflit sur `updated_at`."""
+        current_version = self.client.get(f'/api/products/{self.product2.id}').get_json()['updated_at']
+        updates = [
+            {'id': self.product1.id, 'stock': -10, 'updated_at': '2001-01-01T00:00:00'},
+            {'id': self.product2.id, 'stock': -10, 'updated_at': current_version},
+        ]
+        res = self.client.patch(
+            '/api/products/bulk',
+            data=json.dumps({'mode': 'delta', 'updates': updates}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual([conflict['id'] for conflict in data['conflicts']], [self.product1.id])
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Product, self.product1.id).stock, 50)
+        self.assertEqual(db.session.get(Product, self.product2.id).stock, 190)
+
+    def test_catalog_changes_feed(self):
+        """Teste le flux de changements : créations, modifications, suppressions et pagination par curseur."""
+        cursor = self.client.get('/api/products/changes?limit=1000').get_json()['next_cursor']
+
+        self.client.put(
+            f'/api/products/{self.product1.id}',
+            data=json.dumps({'stock': 10}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.client.delete(f'/api/products/{self.product2.id}', headers=self.admin_headers)
+        self.client.patch(
+            '/api/products/bulk',
+            data=json.dumps({'updates': [{'id': self.product1.id, 'price': 10.0}]}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+
+        res = self.client.get(f'/api/products/changes?since={cursor}&limit=2')
+        data = json.loads(res.data)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['has_more'])
+        self.assertEqual([(c['id'], c['op']) for c in data['changes']],
+                         [(self.product1.id, 'upsert'), (self.product2.id, 'delete')])
+
+        data = self.client.get(f"/api/products/changes?since={data['next_cursor']}").get_json()
+        self.assertFalse(data['has_more'])
+        self.assertEqual([(c['entity'], c['id']) for c in data['changes']], [('product', self.product1.id)])
+
+    def test_catalog_changes_stop_at_recent_gap(self):
+        """Teste l'horizon sûr du flux : arrêt devant un ID manquant récent, franchi une fois le délai écoulé."""
+        cursor = self.client.get('/api/products/changes?limit=1000').get_json()['next_cursor']
+        # L'ID cursor + 1 est encore détenu par une transaction non validée
+        change = CatalogChange(id=cursor + 2, entity='product', entity_id=self.product1.id, op='upsert')
+        db.session.add(change)
+        db.session.commit()
+
+        data = self.client.get(f'/api/products/changes?since={cursor}').get_json()
+        self.assertEqual((data['changes'], data['next_cursor']), ([], cursor))
+        self.assertEqual(current_cursor(), cursor)
+
+        change.changed_at = datetime(2024, 1, 1)
+        db.session.commit()
+        data = self.client.get(f'/api/products/changes?since={cursor}').get_json()
+        self.assertEqual([c['cursor'] for c in data['changes']], [cursor + 2])
+        self.assertEqual(current_cursor(), cursor + 2)
+
+    def test_stock_stream(self):
+        """Teste le flux SSE : état initial puis événement après une modification du stock."""
+        res = self.client.get(f'/api/products/stream?ids={self.product1.id}', buffered=False)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'text/event-stream')
+        events = iter(res.response)
+        first = next(events)
+        self.assertIn(b'"stock": 50', first)
+
+        self.client.put(
+            f'/api/products/{self.product1.id}',
+            data=json.dumps({'stock': 42}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        broker = self.app.extensions['stock_broker']
+        self.assertEqual(broker.poll_once(), 1)
+        self.assertIn(b'"stock": 42', next(events))
+
+        res.close()
+        self.assertEqual(broker.stats['subscribers'], 0)
+
+    def test_stock_stream_limit(self):
+        """Teste le plafond de flux ouverts par worker : 503 au-delà, place libérée à la fermeture."""
+        self.app.config['STOCK_STREAM_MAX_CLIENTS'] = 1
+        first = self.client.get(f'/api/products/stream?ids={self.product1.id}', buffered=False)
+        self.assertEqual(first.status_code, 200)
+        res = self.client.get(f'/api/products/stream?ids={self.product2.id}', buffered=False)
+        self.assertEqual((res.status_code, res.headers['Retry-After']), (503, '5'))
+        first.close()
+        second = self.client.get(f'/api/products/stream?ids={self.product2.id}', buffered=False)
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+class ProductListingPlanTestCase(BaseTestCase):
+    """Cette classe vérifie, via EXPLAIN QUERY PLAN (SQLite), que chaque tri est servi par un index."""
+
+    def _plan(self, statement):
+        sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        return ' | '.join(row[3] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')))
+
+    def test_each_sort_uses_an_index(self):
+        """Teste chaque tri, avec et sans filtre de catégorie, avec et sans curseur."""
+        product = Product(id=5, name='Produit', price=10.0, created_at=datetime(2025, 1, 1))
+        expected_indexes = {
+            'price': ('ix_product_price_id', 'ix_product_category_id_price'),
+            '-price': ('ix_product_price_id', 'ix_product_category_id_price'),
+            'created_at': ('ix_product_created_at_id', 'ix_product_category_id_created_at_id'),
+            'name': ('ix_product_name_id', 'ix_product_category_id_name_id'),
+        }
+        for sort, (global_index, category_index) in expected_indexes.items():
+            for conditions, index in (([], global_index), ([Product.category_id == 1], category_index)):
+                for cursor in (None, encode_cursor(product, sort)):
+                    statement = listing_statement(conditions, sort)
+                    if cursor:
+                        statement = statement.where(keyset_condition(cursor, sort))
+                    plan = self._plan(statement.limit(10))
+                    with self.subTest(sort=sort, category=bool(conditions), cursor=bool(cursor)):
+                        self.assertIn(f'USING INDEX {index}', plan)
+                        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_suggest_refresh_reads_only_changed_products(self):
+        """Teste que la relecture de quelques produits de l'autocomplétion ne parcourt pas tous les agrégats de ventes."""
+        plan = self._plan(_popularity_statement([1, 2]))
+        self.assertIn('SEARCH sales_rollup USING INDEX ix_sales_rollup_product_id_day', plan)
+        self.assertNotIn('SCAN sales_rollup', plan)
+
+class SuggestIndexTestCase(unittest.TestCase):
+    """Cette classe teste l'index de l'autocomplétion, sans base de données."""
+
+    def test_top_results_across_terms(self):
+        """Teste que les meilleurs produits d'une plage de mots sont trouvés sans doublon."""
+        index = SuggestIndex(max_results=3)
+        index.load([
+            (1, 'Câble USB', 5), (2, 'Casque USB Casque', 50), (3, 'Carte mère', 1),
+            (4, 'Carte graphique', 20), (5, 'Clavier', 100),
+        ])
+        self.assertEqual([s['id'] for s in index.suggest('ca')], [2, 4, 1])
+        self.assertEqual([s['id'] for s in index.suggest('ca', limit=1)], [2])
+        self.assertEqual([s['id'] for s in index.suggest('carte g')], [4])
+
+        index.update([(3, 'Carte mère', 80)], removed_ids=[2])
+        self.assertEqual([s['id'] for s in index.suggest('ca')], [3, 4, 1])
+        self.assertEqual(index.info()['products'], 4)
+
+class CountPairsTestCase(unittest.TestCase):
+    """Cette classe teste le comptage vectorisé des co-occurrences."""
+
+    def test_count_pairs(self):
+        """Teste le comptage des paires, doublons de ligne compris."""
+        products, related, counts = count_pairs([1, 1, 1, 2, 2, 3, 3], [10, 20, 20, 10, 20, 30, 10])
+        pairs = dict(zip(zip(products.tolist(), related.tolist()), counts.tolist()))
+        self.assertEqual(pairs, {(10, 20): 2, (20, 10): 2, (10, 30): 1, (30, 10): 1})
+        self.assertEqual(len(count_pairs([], [])[2]), 0)
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """Cette classe teste l'éviction du cache de réponses borné en octets."""
+
+    def test_lru_eviction_by_size(self):
+        """Teste que les entrées les moins récemment lues sont évincées au-delà de la limite."""
+        cache = ResponseCache(max_bytes=10)
+        cache.put(1, 'v1', 'identity', b'aaaa')
+        cache.put(2, 'v1', 'identity', b'bbbb')
+        cache.get(1, 'v1')
+        cache.put(3, 'v1', 'identity', b'cccc')
+        self.assertIsNone(cache.get(2, 'v1'))
+        self.assertEqual(cache.get(1, 'v1'), b'aaaa')
+        self.assertEqual(cache.info()['bytes'], 8)
+
+    def test_stale_version_is_ignored(self):
+        """Teste qu'une entrée d'une version précédente n'est jamais servie."""
+        cache = ResponseCache(max_bytes=100)
+        cache.put(1, 'v1', 'identity', b'ancien')
+        self.assertIsNone(cache.get(1, 'v2'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
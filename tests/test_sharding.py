@@ -0,0 +1,184 @@
+import unittest
+import json
+import shutil
+import tempfile
+from app.extensions import db
+from app.models import Product, Category, Order, SalesRollup, UserOrderStats
+from app.orders.sharding import bind_key, create_shard_schema, order_id_counter, shard_session
+from app.analytics.rollups import rebuild_rollups
+from app.orders.stats import rebuild_order_stats
+from .base import BaseTestCase, TestConfig
+
+class ShardingTestCase(BaseTestCase):
+    """Cette classe teste le partitionnement des commandes par utilisateur sur deux bases."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test : deux shards SQLite dans un dossier temporaire."""
+        self.shard_dir = tempfile.mkdtemp()
+        shard_dir = self.shard_dir
+
+        class ShardedConfig(TestConfig):
+            ORDER_SHARDS = [f'sqlite:///{shard_dir}/orders_0.db', f'sqlite:///{shard_dir}/orders_1.db']
+
+        self.config_class = ShardedConfig
+        super().setUp()
+        for index in range(2):
+            create_shard_schema(db.engines[bind_key(index)], index)
+        self._setup_users_and_tokens()
+        category = Category(name='Périphériques')
+        db.session.add(category)
+        db.session.commit()
+        self.mouse = Product(name='Souris', price=20.0, stock=100, category_id=category.id)
+        self.keyboard = Product(name='Clavier', price=50.0, stock=100, category_id=category.id)
+        db.session.add_all([self.mouse, self.keyboard])
+        db.session.commit()
+
+    def tearDown(self):
+        """Nettoyage après chaque test (y compris les fichiers des shards)."""
+        super().tearDown()
+        # Flask-SQLAlchemy garde une MetaData par bind déclaré : celles des shards ne doivent pas survivre au test
+        for index in range(2):
+            db.metadatas.pop(bind_key(index), None)
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+
+    def _order(self, headers, quantity=1):
+        res = self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': self.mouse.id, 'quantity': quantity}, {'product_id': self.keyboard.id, 'quantity': 1}],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.get_json()['order_id']
+
+    def test_orders_are_stored_on_the_user_shard(self):
+        """Teste le placement des commandes sur le shard de l'utilisateur, et les IDs qui désignent le shard."""
+        client_ids = [self._order(self.client_headers) for _ in range(3)]
+        admin_ids = [self._order(self.admin_headers) for _ in range(2)]
+
+        client_shard, admin_shard = self.client_user.id % 2, self.admin_user.id % 2
+        self.assertEqual({order_id % 2 for order_id in client_ids}, {client_shard})
+        self.assertEqual({order_id % 2 for order_id in admin_ids}, {admin_shard})
+        self.assertEqual(len(set(client_ids + admin_ids)), 5)
+        for shard, ids in ((client_shard, client_ids), (admin_shard, admin_ids)):
+            stored = shard_session(shard).execute(db.select(Order.id).order_by(Order.id)).scalars().all()
+            self.assertEqual(stored, ids)
+        self.assertEqual(Order.query.count(), 0) # Rien dans la base principale
+
+        # Stock et agrégats restent dans la base principale
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 95)
+        self.assertEqual(rebuild_rollups()['lines'], 10)
+
+    def test_order_ids_come_from_the_shard_counter(self):
+        """Teste les compteurs d'IDs : premier ID `shard + N` (jamais 0), reprise après les IDs existants."""
+        users = {self.client_user.id % 2: self.client_headers, self.admin_user.id % 2: self.admin_headers}
+        self.assertEqual({shard: self._order(headers) for shard, headers in users.items()}, {0: 2, 1: 3})
+
+        # Shard réinitialisé sur des commandes existantes : le compteur repart du plus grand ID
+        shard_session(0).close()
+        with db.engines[bind_key(0)].begin() as connection:
+            connection.execute(db.text('DROP TABLE order_id_counter'))
+        create_shard_schema(db.engines[bind_key(0)], 0)
+        self.assertEqual(self._order(users[0]), 4)
+
+    def test_counter_seeded_from_existing_orders(self):
+        """Teste l'initialisation d'un shard qui contient déjà des commandes : IDs toujours congrus au shard."""
+        shard = self.client_user.id % 2
+        existing_id = 7 - shard # Non congru au shard (commandes copiées d'une base non partitionnée)
+        session = shard_session(shard)
+        session.add(Order(id=existing_id, user_id=self.client_user.id, total_amount=0, shipping_address='1 rue du Test',
+                          shipping_city='Testville', shipping_postal_code='75001', shipping_country='France'))
+        session.execute(db.delete(order_id_counter))
+        session.commit()
+        session.close()
+        create_shard_schema(db.engines[bind_key(shard)], shard)
+
+        order_id = self._order(self.client_headers)
+        self.assertEqual((order_id, order_id % 2), (existing_id + 3, shard))
+        res = self.client.get(f'/api/orders/{order_id}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 200)
+
+    def test_order_lookups_are_routed(self):
+        """Teste la consultation d'une commande et de ses lignes sur le bon shard, et l'isolation entre clients."""
+        order_id = self._order(self.client_headers, quantity=2)
+        admin_order_id = self._order(self.admin_headers)
+
+        res = self.client.get(f'/api/orders/{order_id}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()['total_amount'], 90.0)
+        res = self.client.get(f'/api/orders/{order_id}/lignes', headers=self.admin_headers)
+        self.assertEqual(sorted(item['quantity'] for item in res.get_json()), [1, 2])
+
+        res = self.client.get(f'/api/orders/{admin_order_id}', headers=self.client_headers)
+        self.assertEqual(res.status_code, 404)
+        res = self.client.get('/api/orders/', headers=self.client_headers)
+        self.assertEqual([order['id'] for order in res.get_json()], [order_id])
+
+    def test_admin_pagination_across_shards(self):
+        """Teste la pagination par curseur des commandes de tous les shards, les plus récentes d'abord."""
+        created = []
+        for index in range(5):
+            created.append(self._order(self.client_headers if index % 2 else self.admin_headers))
+
+        pages, cursor = [], ''
+        while cursor is not None:
+            res = self.client.get(f'/api/orders/?cursor={cursor}&limit=2', headers=self.admin_headers)
+            self.assertEqual(res.status_code, 200)
+            data = res.get_json()
+            pages.append([order['id'] for order in data['orders']])
+            cursor = data['next_cursor']
+        self.assertEqual(pages, [created[::-1][0:2], created[::-1][2:4], created[::-1][4:]])
+
+        res = self.client.get('/api/orders/?cursor=abc', headers=self.admin_headers)
+        self.assertEqual(res.status_code, 400)
+
+    def test_cancellation_updates_both_databases(self):
+        """Teste l'annulation d'une commande partitionnée : statut sur le shard, stock et agrégats en base principale."""
+        order_id = self._order(self.client_headers, quantity=4)
+        res = self.client.patch(
+            f'/api/orders/{order_id}',
+            data=json.dumps({'status': 'cancelled'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(db.session.get(Product, self.mouse.id).stock, 100)
+        self.assertEqual({row.units for row in SalesRollup.query.all()}, {0})
+
+        res = self.client.get(f'/api/orders/{order_id}', headers=self.client_headers)
+        self.assertEqual(res.get_json()['status'], 'cancelled')
+        res = self.client.patch(
+            '/api/orders/9999',
+            data=json.dumps({'status': 'cancelled'}),
+            headers=self.admin_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_order_stats_follow_sharded_orders(self):
+        """Teste les statistiques par utilisateur (base principale) de commandes partitionnées, et leur réconciliation."""
+        first_id = self._order(self.client_headers)
+        self._order(self.client_headers, quantity=2)
+        self.client.patch(f'/api/orders/{first_id}', data=json.dumps({'status': 'cancelled'}),
+                          headers=self.admin_headers, content_type='application/json')
+        summary = self.client.get('/api/orders/summary', headers=self.client_headers).get_json()
+        self.assertEqual((summary['order_count'], summary['total_spent']), (1, 90.0))
+
+        db.session.execute(db.delete(UserOrderStats))
+        db.session.commit()
+        self.assertEqual(rebuild_order_stats()['with_orders'], 1)
+        self.assertEqual(self.client.get('/api/orders/summary', headers=self.client_headers).get_json(), summary)
+
+    def test_suggest_popularity_of_sharded_orders(self):
+        """Teste la popularité des suggestions, tirée des agrégats de ventes et non des lignes des shards."""
+        self._order(self.client_headers, quantity=3)
+        self._order(self.admin_headers, quantity=2)
+        suggestions = self.client.get('/api/products/suggest?prefix=so').get_json()['suggestions']
+        self.assertEqual([(s['id'], s['popularity']) for s in suggestions], [(self.mouse.id, 5)])
+
+if __name__ == '__main__':
+    unittest.main()
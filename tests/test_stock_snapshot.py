@@ -0,0 +1,137 @@
+import unittest
+import json
+import os
+import tempfile
+from app.extensions import db
+from app.models import Product, Category
+from app.products.availability import rebuild_snapshot, verify_snapshot
+from app.warmup import warm_up
+from app.stock_snapshot import BLOCK_SIZE, StockSnapshot
+from .base import BaseTestCase, TestConfig
+
+class StockSnapshotConfig(TestConfig):
+    STOCK_SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), f'digimarket_stock_{os.getpid()}.bin')
+    STOCK_SNAPSHOT_CAPACITY = 1024
+
+class StockSnapshotTestCase(BaseTestCase):
+    """Cette classe teste l'instantané du stock partagé par les workers d'un hôte."""
+    config_class = StockSnapshotConfig
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        category = Category(name='Audio')
+        db.session.add(category)
+        db.session.commit()
+        self.headphones = Product(name='Casque', price=80.0, stock=3, category_id=category.id)
+        self.speaker = Product(name='Enceinte', price=120.0, stock=0, category_id=category.id)
+        db.session.add_all([self.headphones, self.speaker])
+        db.session.commit()
+        self.headphones_id, self.speaker_id = self.headphones.id, self.speaker.id
+        self.snapshot = self.app.extensions['stock_snapshot']
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        super().tearDown()
+        os.remove(StockSnapshotConfig.STOCK_SNAPSHOT_PATH)
+
+    def _availability(self, *product_ids):
+        res = self.client.get(f"/api/products/availability?ids={','.join(str(product_id) for product_id in product_ids)}")
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()
+
+    def test_availability_before_and_after_build(self):
+        """Teste la lecture en base tant que l'instantané n'est pas construit, puis sa construction au préchauffage."""
+        data = self._availability(self.headphones_id)
+        self.assertEqual((data['products'][0]['stock'], data['generation']), (3, None))
+        self.assertEqual(self.snapshot.generation, 0) # Jamais construit pendant une requête
+
+        state = warm_up(self.app, pools=False)
+        self.assertIn('stock_snapshot', state.steps)
+        data = self._availability(self.headphones_id, self.speaker_id, 999)
+        self.assertEqual(data['products'], [
+            {'id': self.headphones_id, 'stock': 3, 'available': True},
+            {'id': self.speaker_id, 'stock': 0, 'available': False},
+        ])
+        self.assertEqual((data['missing'], data['generation']), ([999], 1))
+        self.assertEqual(self.snapshot.get([self.headphones_id, self.speaker_id]),
+                         {self.headphones_id: 3, self.speaker_id: 0})
+
+        # Un autre processus (ou worker) lit le même fichier
+        other = StockSnapshot(StockSnapshotConfig.STOCK_SNAPSHOT_PATH, StockSnapshotConfig.STOCK_SNAPSHOT_CAPACITY)
+        self.assertEqual(other.get([self.headphones_id]), {self.headphones_id: 3})
+        self.assertEqual(other.generation, 1)
+
+    def test_catalogue_and_quote_read_snapshot(self):
+        """Teste le stock de la liste, du détail, de la récupération par IDs et du devis, lu dans l'instantané."""
+        rebuild_snapshot(self.snapshot)
+        self.snapshot.set({self.headphones_id: 1}) # Écart volontaire avec la base (3)
+        self.assertEqual(self.client.get(f'/api/products/{self.headphones_id}').get_json()['stock'], 1)
+        listed = {product['id']: product['stock'] for product in self.client.get('/api/products/').get_json()['products']}
+        self.assertEqual(listed, {self.headphones_id: 1, self.speaker_id: 0})
+        res = self.client.get(f'/api/products/?ids={self.headphones_id}')
+        self.assertEqual(res.get_json()['products'][0]['stock'], 1)
+        res = self.client.post('/api/orders/quote', data=json.dumps({'items': [{'product_id': self.headphones_id, 'quantity': 2}]}),
+                               headers=self.client_headers, content_type='application/json')
+        self.assertEqual((res.get_json()['lines'][0]['stock'], res.get_json()['orderable']), (1, False))
+
+        # Lecture perturbée par une écriture : stock lu en base
+        block = self.headphones_id // BLOCK_SIZE
+        self.snapshot._sequences[block] += 1
+        try:
+            self.assertEqual(self.client.get(f'/api/products/{self.headphones_id}').get_json()['stock'], 3)
+        finally:
+            self.snapshot._sequences[block] += 1
+
+    def test_stock_writes_update_snapshot(self):
+        """Teste la mise à jour de l'instantané par les commandes, leur annulation et la modification du produit."""
+        rebuild_snapshot(self.snapshot)
+        res = self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': self.headphones_id, 'quantity': 3}],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.snapshot.get([self.headphones_id]), {self.headphones_id: 0})
+
+        res = self.client.patch(f"/api/orders/{res.get_json()['order_id']}", data=json.dumps({'status': 'cancelled'}),
+                               headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.snapshot.get([self.headphones_id]), {self.headphones_id: 3})
+
+        self.client.put(f'/api/products/{self.speaker_id}', data=json.dumps({'stock': 7}),
+                        headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(self._availability(self.speaker_id)['products'][0], {'id': self.speaker_id, 'stock': 7, 'available': True})
+
+        self.client.delete(f'/api/products/{self.speaker_id}', headers=self.admin_headers)
+        self.assertEqual(self.snapshot.get([self.speaker_id]), {})
+
+    def test_read_during_write_falls_back_to_database(self):
+        """Teste qu'une lecture pendant une écriture (séquence impaire) est refusée, puis lue en base."""
+        rebuild_snapshot(self.snapshot)
+        block = self.headphones_id // BLOCK_SIZE
+        self.snapshot._sequences[block] += 1
+        try:
+            self.assertIsNone(self.snapshot.get([self.headphones_id]))
+            self.assertEqual(self._availability(self.headphones_id)['products'][0]['stock'], 3)
+        finally:
+            self.snapshot._sequences[block] += 1
+        self.assertEqual(self.snapshot.get([self.headphones_id]), {self.headphones_id: 3})
+
+    def test_verify_repairs_drift(self):
+        """Teste la vérification de l'instantané contre la base."""
+        rebuild_snapshot(self.snapshot)
+        self.snapshot.set({self.headphones_id: 42, self.speaker_id: None})
+        self.assertEqual(sorted(verify_snapshot(self.snapshot)), sorted([self.headphones_id, self.speaker_id]))
+        self.assertEqual(self.snapshot.get([self.headphones_id, self.speaker_id]),
+                         {self.headphones_id: 3, self.speaker_id: 0})
+        self.assertEqual(verify_snapshot(self.snapshot), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import json
+from datetime import datetime
+from app.extensions import db
+from app.models import Product, Category, StockStripe, CatalogChange
+from app.products.stripes import rebalance_stripes, reserve_striped, split
+from .base import BaseTestCase
+
+class StockStripesTestCase(BaseTestCase):
+    """Cette classe teste le stock réparti en sous-compteurs des produits très demandés."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+        category = Category(name='Consoles')
+        db.session.add(category)
+        db.session.commit()
+        self.console = Product(name='Console', price=300.0, stock=10, category_id=category.id)
+        db.session.add(self.console)
+        db.session.commit()
+        self.product_id = self.console.id
+
+    def _put(self, data):
+        return self.client.put(f'/api/products/{self.product_id}', data=json.dumps(data),
+                               headers=self.admin_headers, content_type='application/json')
+
+    def _stripes(self):
+        return [stripe.quantity for stripe in
+                StockStripe.query.filter_by(product_id=self.product_id).order_by(StockStripe.stripe)]
+
+    def _order(self, quantity):
+        return self.client.post(
+            '/api/orders/',
+            data=json.dumps({
+                'items': [{'product_id': self.product_id, 'quantity': quantity}],
+                'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+                'shipping_postal_code': '75001', 'shipping_country': 'France'
+            }),
+            headers=self.client_headers,
+            content_type='application/json'
+        )
+
+    def test_split(self):
+        """Teste la répartition d'un total en parts entières."""
+        self.assertEqual(split(10, 4), [3, 3, 2, 2])
+        self.assertEqual(split(2, 4), [1, 1, 0, 0])
+        self.assertEqual(split(-1, 2), [0, 0])
+
+    def test_enable_and_disable_striping(self):
+        """Teste l'activation, la modification et la désactivation de la répartition (stock conservé)."""
+        res = self._put({'stock_stripes': 4})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.get_json()['stock'], res.get_json()['stock_stripes']), (10, 4))
+        self.assertEqual(self._stripes(), [3, 3, 2, 2])
+
+        self.assertEqual(self._order(3).status_code, 201)
+        self.assertEqual(sum(self._stripes()), 7)
+        self.assertEqual(self._put({'stock_stripes': 2}).get_json()['stock'], 7)
+        self.assertEqual(self._stripes(), [4, 3])
+
+        self.assertEqual(self._put({'stock': 20}).get_json()['stock'], 20)
+        self.assertEqual(self._stripes(), [10, 10])
+
+        res = self._put({'stock_stripes': 0})
+        self.assertEqual((res.get_json()['stock'], res.get_json()['stock_stripes']), (20, 0))
+        self.assertEqual(self._stripes(), [])
+        self.assertEqual(self._put({'stock_stripes': 1000}).status_code, 400)
+
+    def test_orders_take_from_stripes(self):
+        """Teste les commandes sur un produit réparti : prélèvement sur plusieurs sous-compteurs, refus, annulation."""
+        self._put({'stock_stripes': 4})
+
+        # 5 unités : plus qu'aucun sous-compteur n'en contient
+        res = self._order(5)
+        self.assertEqual(res.status_code, 201)
+        order_id = res.get_json()['order_id']
+        self.assertEqual(sum(self._stripes()), 5)
+        self.assertEqual(db.session.get(Product, self.product_id).stock, 10) # Mis à jour au rééquilibrage
+
+        res = self.client.post('/api/orders/quote', data=json.dumps({'items': [{'product_id': self.product_id, 'quantity': 6}]}),
+                               headers=self.client_headers, content_type='application/json')
+        self.assertEqual((res.get_json()['lines'][0]['stock'], res.get_json()['orderable']), (5, False))
+        self.assertEqual(self._order(6).status_code, 400)
+        self.assertEqual(sum(self._stripes()), 5)
+
+        self.client.patch(f'/api/orders/{order_id}', data=json.dumps({'status': 'cancelled'}),
+                          headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(sum(self._stripes()), 10)
+
+    def test_reads_show_stripe_total(self):
+        """Teste les lectures d'un produit réparti : détail (cache compris), liste, filtre en stock et journal."""
+        self._put({'stock_stripes': 2})
+        self.assertEqual(self.client.get(f'/api/products/{self.product_id}').get_json()['stock'], 10) # Mis en cache
+        before = CatalogChange.query.count()
+
+        self.assertEqual(self._order(10).status_code, 201)
+        self.assertEqual(self.client.get(f'/api/products/{self.product_id}').get_json()['stock'], 0)
+        self.assertEqual(self.client.get('/api/products/').get_json()['products'][0]['stock'], 0)
+        self.assertEqual(self.client.get('/api/products/?in_stock=1').get_json()['total'], 0)
+        self.assertEqual(CatalogChange.query.filter(CatalogChange.id > before, CatalogChange.entity_id == self.product_id).count(), 1)
+
+    def test_failed_reservation_gives_back_partial_takes(self):
+        """Teste qu'un prélèvement impossible rend les prélèvements partiels déjà faits."""
+        self._put({'stock_stripes': 2})
+        self.assertFalse(reserve_striped(self.product_id, 11))
+        self.assertEqual(self._stripes(), [5, 5])
+        self.assertTrue(reserve_striped(self.product_id, 7))
+        self.assertEqual(sum(self._stripes()), 3)
+
+    def test_rebalance(self):
+        """Teste le rééquilibrage : sous-compteurs égalisés, stock affiché mis à jour et journalisé."""
+        self._put({'stock_stripes': 4})
+        self._order(3)
+        self._order(2)
+        before = CatalogChange.query.count()
+
+        self.assertEqual(rebalance_stripes(), [self.product_id])
+        db.session.commit()
+        self.assertEqual(self._stripes(), [2, 1, 1, 1])
+        self.assertEqual(db.session.get(Product, self.product_id).stock, 5)
+        self.assertEqual(CatalogChange.query.count(), before + 1)
+        self.assertEqual(rebalance_stripes(), [])
+
+    def test_bulk_delta_on_striped_product(self):
+        """Teste une mise à jour en masse (mode delta) d'un produit réparti : base réelle, puis nouvelle répartition."""
+        self._put({'stock_stripes': 2})
+        self._order(4)
+        res = self.client.patch('/api/products/bulk', data=json.dumps({'mode': 'delta', 'updates': [{'id': self.product_id, 'stock': 5}]}),
+                                headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(db.session.get(Product, self.product_id).stock, 11)
+        self.assertEqual(self._stripes(), [6, 5])
+
+    def test_bulk_update_version_of_striped_product(self):
+        """Teste qu'un `updated_at` fraîchement lu reste valide malgré le rééquilibrage préalable à la mise à jour."""
+        self._put({'stock_stripes': 2})
+        self._order(3)
+        db.session.execute(db.update(Product).values(updated_at=datetime(2024, 1, 1)))
+        db.session.commit()
+        updated_at = self.client.get(f'/api/products/{self.product_id}').get_json()['updated_at']
+        res = self.client.patch('/api/products/bulk', data=json.dumps({
+            'mode': 'delta', 'updates': [{'id': self.product_id, 'stock': 1, 'updated_at': updated_at}]
+        }), headers=self.admin_headers, content_type='application/json')
+        self.assertEqual((res.status_code, res.get_json()['conflicts']), (200, []))
+        self.assertEqual(sum(self._stripes()), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import json
+from app.validation import MAX_ERRORS, Integer, List, Number, Object, Schema, String
+from .base import BaseTestCase, TestConfig
+
+class SchemaTestCase(unittest.TestCase):
+    """Cette classe teste les schémas compilés de validation des corps de requête."""
+
+    schema = Schema({
+        'name': String(required=True, max_length=5),
+        'price': Number(minimum=0),
+        'parent_id': Integer(nullable=True),
+        'lines': List(Object({'id': Integer(required=True)}), max_items=3),
+        'mode': String(choices=('a', 'b')),
+    }, max_bytes=1000)
+
+    def test_valid_payload(self):
+        """Teste un corps valide (champs inconnus ignorés, null autorisé si déclaré)."""
+        data = {'name': 'abc', 'price': 1.5, 'parent_id': None, 'lines': [{'id': 1}], 'other': [1, 2]}
+        self.assertEqual(self.schema.validate(data), [])
+
+    def test_structured_errors(self):
+        """Teste les erreurs détaillées par champ, chemins imbriqués compris."""
+        data = {'price': True, 'parent_id': '3', 'lines': [{'id': 1}, {'id': 2.5}, 'x'], 'mode': 'c'}
+        self.assertEqual(
+            [(error['field'], error['code']) for error in self.schema.validate(data)],
+            [('name', 'required'), ('price', 'type'), ('parent_id', 'type'), ('lines[1].id', 'type'),
+             ('lines[2]', 'type'), ('mode', 'choices')]
+        )
+        self.assertEqual(self.schema.validate({'name': 'abcdef', 'price': -1})[0]['code'], 'max_length')
+        self.assertEqual(self.schema.validate({'name': None})[0]['code'], 'null')
+        self.assertEqual(self.schema.validate([])[0], {'field': '(corps)', 'code': 'type', 'message': 'Un objet est attendu'})
+
+    def test_limits_checked_before_items(self):
+        """Teste le refus d'une liste trop longue sans en parcourir les éléments, et le plafond d'erreurs."""
+        errors = self.schema.validate({'name': 'a', 'lines': ['x'] * 1000})
+        self.assertEqual([error['code'] for error in errors], ['max_items'])
+
+        many = Schema({'lines': List(Object({'id': Integer(required=True)}))})
+        self.assertEqual(len(many.validate({'lines': [{}] * 1000})), MAX_ERRORS)
+
+class LimitsConfig(TestConfig):
+    REQUEST_MAX_BYTES = 2048
+    ORDER_MAX_ITEMS = 3
+
+class RequestValidationTestCase(BaseTestCase):
+    """Cette classe teste la validation des corps de requête des routes d'écriture."""
+    config_class = LimitsConfig
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        self._setup_users_and_tokens()
+
+    def _order(self, items, **extra):
+        return self.client.post('/api/orders/', data=json.dumps({
+            'items': items, 'shipping_address': '1 rue du Test', 'shipping_city': 'Testville',
+            'shipping_postal_code': '75001', 'shipping_country': 'France', **extra
+        }), headers=self.client_headers, content_type='application/json')
+
+    def test_invalid_order_rejected_before_database(self):
+        """Teste le refus (400, erreurs détaillées) d'articles mal formés."""
+        res = self._order([{'product_id': '1'}, {'product_id': 1, 'quantity': 0}], shipping_city=None)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([(error['field'], error['code']) for error in res.get_json()['errors']],
+                         [('items[0].product_id', 'type'), ('items[1].quantity', 'minimum'), ('shipping_city', 'null')])
+        self.assertEqual(self._order([]).status_code, 400)
+
+    def test_size_limits(self):
+        """Teste les limites de nombre d'articles et de taille du corps (413)."""
+        res = self._order([{'product_id': 1}] * 4)
+        self.assertEqual(res.status_code, 413)
+        self.assertEqual(res.get_json()['errors'][0]['code'], 'max_items')
+
+        res = self._order([{'product_id': 1}], shipping_address='x' * 4096)
+        self.assertEqual(res.status_code, 413)
+        res = self.client.post('/api/orders/quote', data='{"items": [', headers=self.client_headers,
+                               content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+
+    def test_other_write_routes(self):
+        """Teste la validation des routes d'authentification, de produits, de catégories et de statut."""
+        res = self.client.post('/api/auth/login', data=json.dumps({'email': 'client@example.com'}),
+                               content_type='application/json')
+        self.assertEqual((res.status_code, res.get_json()['errors'][0]['field']), (400, 'password'))
+
+        res = self.client.post('/api/products/', data=json.dumps({'name': 'Souris', 'price': '20', 'stock': -1}),
+                               headers=self.admin_headers, content_type='application/json')
+        self.assertEqual([error['field'] for error in res.get_json()['errors']], ['price', 'stock', 'category_id'])
+
+        res = self.client.post('/api/categories/', data=json.dumps({'name': 'Audio', 'parent_id': 'racine'}),
+                               headers=self.admin_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.patch('/api/orders/1', data=json.dumps({'status': 'lost'}),
+                                headers=self.admin_headers, content_type='application/json')
+        self.assertEqual((res.status_code, res.get_json()['errors'][0]['code']), (400, 'choices'))
+
+        # Le contrôle d'accès précède la validation
+        res = self.client.post('/api/products/', data='{}', headers=self.client_headers, content_type='application/json')
+        self.assertEqual(res.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import date
+from app.extensions import db
+from app.models import Product, Category, SalesRollup
+from app.warmup import dispose_engines, warm_up, warm_worker
+from .base import BaseTestCase, TestConfig
+
+class WarmupTestCase(BaseTestCase):
+    """Cette classe teste le préchauffage des workers et la route de disponibilité."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        super().setUp()
+        category = Category(name='Audio')
+        db.session.add(category)
+        db.session.commit()
+        self.products = [Product(name=f'Casque {i}', price=50.0 + i, stock=5, category_id=category.id) for i in range(3)]
+        db.session.add_all(self.products)
+        db.session.commit()
+        db.session.add(SalesRollup(day=date.today(), product_id=self.products[2].id, category_id=category.id,
+                                   units=4, revenue=208.0))
+        db.session.commit()
+
+    def _readiness(self):
+        res = self.client.get('/api/monitoring/ready')
+        return res.status_code, res.get_json()
+
+    def test_ready_after_warmup(self):
+        """Teste la disponibilité (503 puis 200) et le préchauffage des caches du catalogue."""
+        status, body = self._readiness()
+        self.assertEqual((status, body['ready'], body['warmup']['status']), (503, False, 'cold'))
+
+        state = warm_worker(self.app)
+        self.assertEqual(state.status, 'ready')
+        self.assertEqual(set(state.steps), {'mappers', 'paths', 'top_products', 'connections'})
+        # Seul le détail du produit le plus vendu est déjà en cache
+        cache = self.app.extensions['product_cache']
+        self.assertEqual(list(cache._entries), [self.products[2].id])
+        self.assertEqual(self.app.extensions['suggest_index'].info()['products'], 3)
+
+        status, body = self._readiness()
+        self.assertEqual((status, body['ready']), (200, True))
+
+    def test_inherited_warmup_only_opens_connections(self):
+        """Teste le worker forké d'un maître préchauffé : seules ses connexions sont ouvertes."""
+        warm_up(self.app, pools=False)
+        dispose_engines(self.app, close=False)
+        self.app.extensions['warmup'].steps = {}
+        state = warm_worker(self.app)
+        self.assertEqual((state.status, list(state.steps)), ('ready', ['connections']))
+        # Les bases restent utilisables après l'abandon des pools hérités
+        self.assertEqual(self.client.get(f'/api/products/{self.products[0].id}').status_code, 200)
+
+    def test_failed_warmup_is_not_ready(self):
+        """Teste un préchauffage en échec : le worker sert, mais n'est pas déclaré prêt."""
+        self.app.config['WARMUP_PATHS'] = ['/api/products/?sort=stock']
+        state = warm_worker(self.app)
+        self.assertEqual(state.status, 'failed')
+        self.assertIn('statut 400', state.error)
+        status, body = self._readiness()
+        self.assertEqual((status, body['warmup']['error']), (503, state.error))
+        self.assertEqual(self.client.get('/api/products/').status_code, 200)
+
+class NoWarmupConfig(TestConfig):
+    WARMUP_ENABLED = False
+
+class DisabledWarmupTestCase(BaseTestCase):
+    """Cette classe teste un worker dont le préchauffage est désactivé."""
+    config_class = NoWarmupConfig
+
+    def test_ready_without_warmup(self):
+        """Teste la disponibilité immédiate sans préchauffage."""
+        self.assertEqual(warm_worker(self.app).steps, {})
+        self.assertEqual(self.client.get('/api/monitoring/ready').status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()